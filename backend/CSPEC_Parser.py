@@ -54,13 +54,16 @@ class CSPEC_sub_Parser_1_0_0:
         chart_name = self.__CSPEC_json["chart_name"]
         data_requests = self.__parse_call_group("data_requests")
         post_processing = self.__parse_call_group("post_processing")
-        csv_name, included_columns = self.__parse_csv_config(self.__CSPEC_json["csv_config"])
+        csv_name, included_columns, exports = self.__parse_csv_config(self.__CSPEC_json["csv_config"])
+        schedule = self.__parse_schedule(self.__CSPEC_json.get("schedule"))
         return CSPEC(
             chart_name=chart_name,
             data_requests=data_requests,
             post_processing=post_processing,
             csv_name=csv_name,
-            included_columns=included_columns
+            included_columns=included_columns,
+            schedule=schedule,
+            exports=exports
         )
 
 
@@ -84,12 +87,38 @@ class CSPEC_sub_Parser_1_0_0:
         )
     
 
-    def __parse_csv_config(self, csv_config_json: dict) -> tuple[str, list[str]]:
+    def __parse_csv_config(self, csv_config_json: dict) -> tuple[str, list[str], list[Call]]:
         """ Parses a the csv_config from the CSPEC.
             :param csv_config_json: dict - The dictionary from the json, to be parsed.
             :return str - The csv name.
             :return list[str] - The included columns in the csv.
+            :return list[Call] - The optional exports in other formats, next to the csv.
         """
         csv_name = csv_config_json["csv_name"]
         included_columns = csv_config_json["included_columns"]
-        return csv_name, included_columns
\ No newline at end of file
+        exports = [self.__parse_call(call) for call in csv_config_json.get("exports", [])]
+        return csv_name, included_columns, exports
+
+
+    def __parse_schedule(self, schedule_json: dict | None) -> dict | None:
+        """ Parses the optional schedule from the CSPEC. This is only used when flare runs as a daemon.
+            :param schedule_json: dict | None - The dictionary from the json, to be parsed.
+            :return dict | None - The schedule with an "interval" and "offset" in seconds, or None if the CSPEC has no schedule.
+        """
+        if schedule_json is None: return None
+        return parse_schedule(schedule_json)
+
+
+def parse_schedule(schedule_json: dict) -> dict:
+    """ Parses and validates a schedule dictionary. A schedule runs a CSPEC every "interval" seconds, aligned to
+    local midnight and shifted by "offset" seconds. (ex. {"interval": 900} is the same as the cron */15 * * * *)
+        :param schedule_json: dict - The schedule dictionary, from a CSPEC or a schedule file.
+        :return dict - The validated schedule.
+    """
+    interval = int(schedule_json["interval"])
+    offset = int(schedule_json.get("offset", 0))
+    if interval <= 0:
+        raise ValueError(f'Schedule interval must be greater than 0, got {interval} instead.')
+    if not 0 <= offset < interval:
+        raise ValueError(f'Schedule offset must be between 0 and the interval ({interval}), got {offset} instead.')
+    return {"interval": interval, "offset": offset}
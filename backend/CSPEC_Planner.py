@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+#CSPEC_Planner.py
+#----------------------------------
+# Created By: Flare Team
+#----------------------------------
+""" The planner turns a parsed CSPEC into the plan generate_csv runs. Each ingestion class declares the columns a call adds
+and each post processing class the columns a call reads and writes (see IDataIngestion.output_columns and IPostProcessing.column_usage).
+From that the planner:
+    - checks every call's kwargs (exports included) against its class, so a bad CSPEC fails before any network request is made,
+    - drops post processing calls whose columns never reach the included columns,
+    - frees the columns of ingestion calls that never reach them, the call is still run as its timestamps are rows of the CSV
+      (it is only dropped when another call makes the same request, so its rows are there anyway),
+    - lists, for each step, the columns no later step needs so they can be freed as soon as possible.
+Calls whose class does not declare its columns are always kept, and are assumed to read every column.
+ """
+#----------------------------------
+#
+#
+#Imports
+from DataClasses import Call, CSPEC
+from Ingestion.I_Ingestion import data_ingestion_class
+from PostProcessing.IPostProcessing import post_process_class
+from Export.I_Export import export_class
+from PluginRegistry import method_signature
+
+
+class PlannedStep():
+    def __init__(self, call: Call, reads: list[str] | None, writes: list[str] | None, free_after: list[str] | None = None) -> None:
+        """
+            :param call: Call - The post processing call.
+            :param reads: list[str] | None - The columns the call reads, None if unknown.
+            :param writes: list[str] | None - The columns the call writes, None if unknown.
+            :param free_after: list[str] - The columns that can be removed from the data frame once the call is done.
+        """
+        self.call = call
+        self.reads = reads if reads is None else list(dict.fromkeys(reads))
+        self.writes = writes if writes is None else list(dict.fromkeys(writes))
+        self.free_after = free_after or []
+
+
+class CSPEC_Plan():
+    def __init__(self, CSPEC: CSPEC, data_requests: list[Call], free_after_ingestion: list[str], post_processing: list[PlannedStep], dropped: list[tuple[str, Call, str]]) -> None:
+        """
+            :param CSPEC: CSPEC - The CSPEC that was planned.
+            :param data_requests: list[Call] - The ingestion calls to run, in CSPEC order.
+            :param free_after_ingestion: list[str] - Ingested columns that no step or export needs, but whose rows are still exported.
+            :param post_processing: list[PlannedStep] - The post processing calls to run, in CSPEC order.
+            :param dropped: list[tuple[str, Call, str]] - (stage, call, reason) for every call that was dropped.
+        """
+        self.CSPEC = CSPEC
+        self.data_requests = data_requests
+        self.free_after_ingestion = free_after_ingestion
+        self.post_processing = post_processing
+        self.dropped = dropped
+
+
+    def explain(self) -> str:
+        """ Describes the plan in a human readable form."""
+        lines = [f'Plan for {self.CSPEC.chart_name} -> {self.CSPEC.csv_name}']
+
+        lines.append(f'  Ingestion ({len(self.data_requests)} of {len(self.CSPEC.data_requests)} calls):')
+        for call in self.data_requests:
+            lines.append(f'    {call.call_key} -> {call.kwargs.get("kwargs", {}).get("column_name", "?")}')
+        if self.free_after_ingestion:
+            lines.append(f'    free: {self.free_after_ingestion}')
+
+        lines.append(f'  Post processing ({len(self.post_processing)} of {len(self.CSPEC.post_processing)} calls):')
+        for step in self.post_processing:
+            reads = 'every column' if step.reads is None else step.reads
+            writes = 'unknown columns' if step.writes is None else step.writes
+            lines.append(f'    {step.call.call_key} reads {reads} writes {writes}')
+            if step.free_after:
+                lines.append(f'      free: {step.free_after}')
+
+        if self.dropped:
+            lines.append('  Dropped:')
+            for stage, call, reason in self.dropped:
+                lines.append(f'    {stage} {call.call_key}: {reason}')
+
+        lines.append(f'  Export ({", ".join(["CSV"] + [call.call_key for call in self.CSPEC.exports])}): {self.CSPEC.included_columns}')
+        return '\n'.join(lines)
+
+
+def plan_CSPEC(CSPEC: CSPEC) -> CSPEC_Plan:
+    """ Validates a CSPEC and plans its run.
+        :param CSPEC: CSPEC - The parsed CSPEC.
+        :return CSPEC_Plan - The plan.
+        :raises ModuleNotFoundError - If a call's key has no class.
+        :raises TypeError - If a call's kwargs do not match its class.
+    """
+    included = set(CSPEC.included_columns)
+    dropped: list[tuple[str, Call, str]] = []
+
+    # Validate every call before anything is dropped, a dropped call with bad kwargs is still a bad CSPEC
+    ingestion_columns = [_ingestion_columns(call) for call in CSPEC.data_requests]
+    usages = [_column_usage(call) for call in CSPEC.post_processing]
+    for call in CSPEC.exports: _check_export(call)
+
+    # Walk the steps backwards keeping track of the columns that are still needed (live)
+    # A live set of None means every column is live (a later step with unknown usage may read anything)
+    live: set[str] | None = set(included)
+    kept: list[tuple[Call, tuple[list[str], list[str]] | None, bool]] = []
+    for call, (usage, uses_index) in reversed(list(zip(CSPEC.post_processing, usages))):
+        if usage is None:
+            kept.append((call, usage, uses_index))
+            live = None
+            continue
+
+        reads, writes = usage
+        if live is not None and not uses_index and not live.intersection(writes):
+            dropped.append(('post_processing', call, f'writes {writes}, which are never used'))
+            continue
+
+        kept.append((call, usage, uses_index))
+        if live is not None:
+            live = (live - set(writes)) | set(reads)
+    kept.reverse()
+    dropped.reverse()
+
+    # Every ingested row is in the data frame and the CSV, so ingestion that is never used is still run for its rows and only
+    # its columns are freed. It is dropped only when a call that is run makes the same request (its rows are there anyway).
+    used = [columns is None or live is None or bool(live.intersection(columns)) for columns in ingestion_columns]
+    requested = {_request_key(call) for call, is_used in zip(CSPEC.data_requests, used) if is_used}
+    data_requests, free_after_ingestion = [], []
+    ingestion_dropped = []
+    for call, columns, is_used in zip(CSPEC.data_requests, ingestion_columns, used):
+        if is_used:
+            data_requests.append(call)
+        elif _request_key(call) in requested:
+            ingestion_dropped.append(('data_requests', call, f'adds {columns}, which are never used, and its rows come from the same request made by another call'))
+        else:
+            data_requests.append(call)
+            free_after_ingestion.extend(columns)
+            requested.add(_request_key(call))
+    dropped = ingestion_dropped + dropped
+
+    # Free each column right after the last step that reads it, unless it is exported
+    steps = [PlannedStep(call, *(usage or (None, None))) for call, usage, _ in kept]
+    needed_later: set[str] | None = set()
+    for step in reversed(steps):
+        if needed_later is not None and step.reads is not None:
+            step.free_after = [column for column in dict.fromkeys(step.reads + step.writes) if column not in needed_later and column not in included]
+            needed_later.update(step.reads)
+        elif step.reads is None:
+            needed_later = None
+
+    return CSPEC_Plan(CSPEC, data_requests, free_after_ingestion, steps, dropped)
+
+
+def _request_key(call: Call) -> tuple:
+    """ Identifies the request an ingestion call makes, every kwarg but the column it is saved under."""
+    kwargs = call.kwargs.get('kwargs', {})
+    return call.call_key, tuple(sorted((name, repr(value)) for name, value in kwargs.items() if name != 'column_name'))
+
+
+def _ingestion_columns(call: Call) -> list[str] | None:
+    """ Checks an ingestion call's kwargs, returning the columns it adds (None if unknown)."""
+    ingestion_class = data_ingestion_class(call.call_key)
+    kwargs = call.kwargs.get('kwargs', {})
+    try:
+        method_signature(ingestion_class, 'ingest_data').bind(None, None, None, **kwargs) # self, data, ref_time
+        return ingestion_class().output_columns(**kwargs)
+    except TypeError as e:
+        raise TypeError(f'{e}.kwargs mismatch for key: {call.call_key} and kwargs: {kwargs}') from e
+
+
+def _column_usage(call: Call) -> tuple[tuple[list[str], list[str]] | None, bool]:
+    """ Checks a post processing call's kwargs, returning the columns it reads and writes (None if unknown) and whether it uses the whole index."""
+    post_processing_class = post_process_class(call.call_key)
+    kwargs = call.kwargs.get('kwargs', {})
+    try:
+        method_signature(post_processing_class, 'post_process').bind(None, None, **kwargs) # self, data
+        return post_processing_class().column_usage(**kwargs), post_processing_class.USES_INDEX
+    except TypeError as e:
+        raise TypeError(f'{e}.kwargs mismatch for key: {call.call_key} and kwargs: {kwargs}') from e
+
+
+def _check_export(call: Call) -> None:
+    """ Checks an export call's kwargs, file_name is taken by the runner and not passed on."""
+    kwargs = {name: value for name, value in call.kwargs.get('kwargs', {}).items() if name != 'file_name'}
+    try:
+        method_signature(export_class(call.call_key), 'export').bind(None, None, **kwargs) # self, table
+    except TypeError as e:
+        raise TypeError(f'{e}.kwargs mismatch for key: {call.call_key} and kwargs: {kwargs}') from e
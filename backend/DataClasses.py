@@ -27,12 +27,14 @@ class Call():
     
 
 class CSPEC():
-    def __init__(self, chart_name: str, data_requests: list[Call], post_processing: list[Call], csv_name: str, included_columns: list[str]) -> None:
+    def __init__(self, chart_name: str, data_requests: list[Call], post_processing: list[Call], csv_name: str, included_columns: list[str], schedule: dict | None = None, exports: list[Call] | None = None) -> None:
         self.chart_name = chart_name
         self.data_requests = data_requests
         self.post_processing = post_processing
         self.csv_name = csv_name 
         self.included_columns = included_columns
+        self.schedule = schedule
+        self.exports = exports or []
 
     def __str__(self) -> str:
 
@@ -53,6 +55,8 @@ class CSPEC():
     post_processing: \n{post_processing}\n\
     csv_name: {self.csv_name}\n\
     included_columns: {self.included_columns}\n\
+    schedule: {self.schedule}\n\
+    exports: {[e.call_key for e in self.exports]}\n\
 ---------------------------------------' 
 
 
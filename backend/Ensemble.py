@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+#Ensemble.py
+#----------------------------------
+# Created By: Flare Team
+#----------------------------------
+""" This file contains the ensemble column type used by Flare. An ensemble column holds several members
+(ex. the TWC forecast members, or the lead time models of an MRE) for every timestamp.
+Instead of a python list inside every cell of an object column, the members are stored in one contiguous
+time x members float array. Rows with fewer members are padded with NaN, and a row with no members is missing (NA).
+Reading a single cell still gives back a plain list of floats, so the CSV output and row wise code are unchanged,
+while post processing can take the whole matrix with to_member_matrix and work along an axis.
+ """
+#----------------------------------
+#
+#
+#Imports
+from pandas.api.extensions import ExtensionArray, ExtensionDtype, register_extension_dtype, take as extension_take
+from pandas import Series, isna
+from typing import Any, Callable
+import numpy as np
+import re
+
+
+@register_extension_dtype
+class EnsembleDtype(ExtensionDtype):
+
+    SUBTYPES = ('float64', 'float32')
+    _match = re.compile(r'^ensemble(\[(?P<subtype>float64|float32)\])?$')
+    _metadata = ('subtype',)
+
+    def __init__(self, subtype: str = 'float64') -> None:
+        """
+            :param subtype: str - The float type the members are stored as, float64 (default) or float32.
+        """
+        subtype = np.dtype(subtype).name
+        if subtype not in self.SUBTYPES:
+            raise TypeError(f'Ensemble members must be one of {self.SUBTYPES}, got {subtype}')
+        self.subtype = subtype
+
+    @property
+    def name(self) -> str:
+        return f'ensemble[{self.subtype}]'
+
+    @property
+    def type(self) -> type:
+        return list
+
+    @property
+    def na_value(self) -> float:
+        return np.nan
+
+    @property
+    def _is_numeric(self) -> bool:
+        return False
+
+    @classmethod
+    def construct_array_type(cls) -> type:
+        return EnsembleArray
+
+    @classmethod
+    def construct_from_string(cls, string: str) -> 'EnsembleDtype':
+        if not isinstance(string, str):
+            raise TypeError(f"'construct_from_string' expects a string, got {type(string)}")
+        match = cls._match.match(string)
+        if match is None:
+            raise TypeError(f"Cannot construct a 'EnsembleDtype' from '{string}'")
+        return cls(match.group('subtype') or 'float64')
+
+
+class EnsembleArray(ExtensionArray):
+
+    def __init__(self, members: np.ndarray, dtype: EnsembleDtype | None = None, copy: bool = False) -> None:
+        """
+            :param members: np.ndarray - A 2-D (time x members) float array, padded with NaN.
+            :param dtype: EnsembleDtype | None - The dtype, defaults to the subtype of members when it is float32 otherwise float64.
+            :param copy: bool - Copy members instead of wrapping them.
+        """
+        if dtype is None: dtype = EnsembleDtype('float32' if getattr(members, 'dtype', None) == np.float32 else 'float64')
+        members = np.array(members, dtype=dtype.subtype, copy=copy or None, ndmin=2)
+        if members.ndim != 2:
+            raise ValueError(f'Ensemble members must be 2-D (time x members), got {members.ndim} dimensions')
+        self._members = members
+        self._dtype = dtype
+        self._version = _Version()
+        self._derived = {}
+
+    @property
+    def members(self) -> np.ndarray:
+        """ The time x members matrix (a read only view, no copy)."""
+        return _read_only(self._members)
+
+    def derived(self, name: str, compute: Callable[[np.ndarray], Any]) -> Any:
+        """ Returns a value derived from the members (ex. the sorted members), computing it only the first time it is asked for.
+        Every post processing step working on this column shares it. Setting values in the array drops everything derived,
+        and a column that is replaced gets a new array, so a derived value never outlives the members it came from.
+        A slice views the members of its parent and shares its version, so setting values in either one drops what both derived.
+        A copy (ex. when pandas concatenates frames) starts with what its source derived.
+            :param name: str - Identifies the derived value.
+            :param compute: Callable[[np.ndarray], Any] - Computes the value from the members matrix.
+            :return Any - The value, arrays are read only as they are shared.
+        """
+        key = (name, self._version.value)
+        value = self._derived.get(key)
+        if value is None:
+            value = compute(self.members)
+            value = tuple(_read_only(v) for v in value) if isinstance(value, tuple) else _read_only(value)
+            self._derived[key] = value
+        return value
+
+    # ---- Construction ----
+
+    @classmethod
+    def from_rows(cls, rows, dtype: EnsembleDtype | str | None = None) -> 'EnsembleArray':
+        """ Builds an array from one entry per timestamp. An entry is a list (or array) of members,
+        a single number (one member), or missing (None/NaN, no members).
+            :param rows: Iterable - The entries.
+            :param dtype: EnsembleDtype | str | None - The dtype, defaults to ensemble[float64].
+        """
+        dtype = _as_dtype(dtype)
+        rows = list(rows)
+        if rows and all(isinstance(row, list) and len(row) == len(rows[0]) > 0 for row in rows):
+            # Every row has the same number of members, numpy can convert them all at once
+            return cls(np.array(rows, dtype=dtype.subtype), dtype)
+        rows = [_as_members(row) for row in rows]
+        width = max((len(row) for row in rows), default=0)
+        members = np.full((len(rows), max(width, 1)), np.nan, dtype=dtype.subtype)
+        for i, row in enumerate(rows):
+            members[i, :len(row)] = row
+        return cls(members, dtype)
+
+    @classmethod
+    def from_ragged(cls, values: np.ndarray, lengths: np.ndarray, dtype: EnsembleDtype | str | None = None) -> 'EnsembleArray':
+        """ Builds an array from every member of every row laid out one after the other.
+            :param values: np.ndarray - The members of all rows, flattened in row order.
+            :param lengths: np.ndarray - How many members each row has.
+            :param dtype: EnsembleDtype | str | None - The dtype, defaults to ensemble[float64].
+        """
+        dtype = _as_dtype(dtype)
+        lengths = np.asarray(lengths, dtype=np.intp)
+        members = np.full((len(lengths), max(int(lengths.max(initial=0)), 1)), np.nan, dtype=dtype.subtype)
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        columns = np.arange(len(rows)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        members[rows, columns] = values
+        return cls(members, dtype)
+
+    @classmethod
+    def _from_sequence(cls, scalars, *, dtype=None, copy: bool = False) -> 'EnsembleArray':
+        if isinstance(scalars, EnsembleArray):
+            return scalars.astype(_as_dtype(dtype or scalars.dtype), copy=copy)
+        return cls.from_rows(scalars, dtype)
+
+    @classmethod
+    def _from_factorized(cls, values, original: 'EnsembleArray') -> 'EnsembleArray':
+        return cls.from_rows([None if value is None else list(value) for value in values], original.dtype)
+
+    def _values_for_factorize(self) -> tuple[np.ndarray, None]:
+        values = np.empty(len(self), dtype=object)
+        for i, row in enumerate(self):
+            values[i] = None if row is np.nan else tuple(row)
+        return values, None
+
+    def unique(self) -> 'EnsembleArray':
+        first = {}
+        for i, row in enumerate(self._values_for_factorize()[0]):
+            first.setdefault(row, i)
+        return self.take(list(first.values()))
+
+    # ---- Array interface ----
+
+    @property
+    def dtype(self) -> EnsembleDtype:
+        return self._dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self._members.nbytes
+
+    def __len__(self) -> int:
+        return self._members.shape[0]
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return _row_to_list(self._members[item])
+        item = _normalize_indexer(self, item)
+        result = type(self)(self._members[item], self._dtype)
+        if np.may_share_memory(result._members, self._members):
+            result._version = self._version # A view, not a copy
+            if result._members.shape == self._members.shape: result._derived = self._derived # The same members (ex. [:])
+        return result
+
+    def __setitem__(self, key, value) -> None:
+        key = _normalize_indexer(self, key)
+        rows = np.arange(len(self))[key]
+        if np.ndim(rows) == 0:
+            rows, values = np.array([rows]), [value]
+        elif isinstance(value, EnsembleArray):
+            values = list(value)
+        elif _is_missing(value) or np.ndim(value) == 0 or (isinstance(value, list) and not any(isinstance(v, (list, tuple, np.ndarray)) for v in value)):
+            values = [value] * len(rows) # One row value broadcast to every row
+        else:
+            values = list(value)
+        if len(values) != len(rows):
+            raise ValueError(f'Can not set {len(values)} values into {len(rows)} rows')
+
+        # The members change, so everything derived from them is stale
+        self._version.value += 1
+        self._derived = {}
+
+        new_rows = [_as_members(v) for v in values]
+        width = max((len(row) for row in new_rows), default=0)
+        if width > self._members.shape[1]:
+            padding = np.full((len(self), width - self._members.shape[1]), np.nan, dtype=self._members.dtype)
+            self._members = np.hstack([self._members, padding])
+        for row, members in zip(rows, new_rows):
+            self._members[row] = np.nan
+            self._members[row, :len(members)] = members
+
+    def __iter__(self):
+        for row in self._members:
+            yield _row_to_list(row)
+
+    def __eq__(self, other):
+        if isinstance(other, Series): return NotImplemented
+        if isinstance(other, EnsembleArray):
+            others = list(other)
+        elif _is_missing(other) or np.ndim(other) == 0 or (isinstance(other, list) and not any(isinstance(v, (list, tuple, np.ndarray)) for v in other)):
+            others = [other] * len(self)
+        else:
+            others = list(other)
+        return np.array([_rows_equal(left, right) for left, right in zip(self, others)], dtype=bool)
+
+    def isna(self) -> np.ndarray:
+        return np.isnan(self._members).all(axis=1)
+
+    def take(self, indices, allow_fill: bool = False, fill_value=None) -> 'EnsembleArray':
+        indices = np.asarray(indices, dtype=np.intp)
+        if allow_fill and fill_value is not None and not _is_missing(fill_value):
+            raise ValueError(f'An ensemble can only be filled with missing values, got {fill_value}')
+        # Take row indices so the whole members matrix moves at once, -1 picks a missing row when filling
+        positions = extension_take(np.arange(len(self)), indices, allow_fill=allow_fill, fill_value=-1)
+        members = self._members[positions]
+        if allow_fill: members[positions == -1] = np.nan
+        return type(self)(members, self._dtype)
+
+    def copy(self) -> 'EnsembleArray':
+        # The copy has the same members, what was derived from them still holds until one of the two changes
+        result = type(self)(self._members.copy(), self._dtype)
+        result._version.value = self._version.value
+        result._derived = dict(self._derived)
+        return result
+
+    def astype(self, dtype, copy: bool = True):
+        if isinstance(dtype, str) and EnsembleDtype._match.match(dtype): dtype = EnsembleDtype.construct_from_string(dtype)
+        if isinstance(dtype, EnsembleDtype):
+            if dtype == self._dtype: return self.copy() if copy else self
+            return type(self)(self._members.astype(dtype.subtype), dtype)
+        values = np.empty(len(self), dtype=object)
+        for i, row in enumerate(self):
+            values[i] = row
+        if np.dtype(dtype) == object: return values
+        return values.astype(dtype)
+
+    @classmethod
+    def _concat_same_type(cls, to_concat) -> 'EnsembleArray':
+        to_concat = list(to_concat)
+        width = max(array._members.shape[1] for array in to_concat)
+        subtype = np.result_type(*[array._members.dtype for array in to_concat])
+        members = np.full((sum(len(array) for array in to_concat), width), np.nan, dtype=subtype)
+        start = 0
+        for array in to_concat:
+            members[start:start + len(array), :array._members.shape[1]] = array._members
+            start += len(array)
+        return cls(members, EnsembleDtype(subtype.name))
+
+    def _formatter(self, boxed: bool = False):
+        return str
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        return self.astype(object if dtype is None else dtype)
+
+
+def to_member_matrix(series: Series, dtype: str = 'float64') -> np.ndarray:
+    """ Returns the members of a column as a time x members matrix, padded with NaN.
+    Ensemble columns hand back their matrix without copying. Older list in cell columns are converted, and plain
+    number columns become a one member matrix.
+        :param series: Series - The column.
+        :param dtype: str - The float type wanted when the column has to be converted.
+        :return np.ndarray - The matrix. Do not modify it, it may be the storage of the column.
+    """
+    values = series.array
+    if isinstance(values, EnsembleArray): return values.members
+    if values.dtype.kind in 'fiub': return np.asarray(values, dtype=dtype).reshape(-1, 1)
+    return EnsembleArray.from_rows(values, dtype).members
+
+
+def sorted_members(series: Series) -> tuple[np.ndarray, np.ndarray]:
+    """ Sorts the members of every row, NaN (missing members) sort to the end of the row.
+    For ensemble columns the result is computed once and shared by every step that asks for it.
+        :param series: Series - The column.
+        :return tuple[np.ndarray, np.ndarray] - The sorted matrix and the number of present members in each row.
+    """
+    return _derive(series, 'sorted_members', lambda members: (np.sort(members, axis=1), np.count_nonzero(~np.isnan(members), axis=1)))
+
+
+def missing_members(series: Series) -> np.ndarray:
+    """ Marks the missing (NaN) members of every row.
+    For ensemble columns the result is computed once and shared by every step that asks for it.
+        :param series: Series - The column.
+        :return np.ndarray - A time x members bool matrix, True where a member is missing.
+    """
+    return _derive(series, 'missing_members', np.isnan)
+
+
+class _Version():
+    """ Counts the changes to a members matrix, shared by an array and the arrays viewing its members."""
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+
+def _derive(series: Series, name: str, compute: Callable[[np.ndarray], Any]) -> Any:
+    values = series.array
+    if isinstance(values, EnsembleArray): return values.derived(name, compute)
+    return compute(to_member_matrix(series))
+
+
+def _read_only(value):
+    if isinstance(value, np.ndarray) and value.flags.writeable:
+        value = value.view()
+        value.flags.writeable = False
+    return value
+
+
+def _as_dtype(dtype) -> EnsembleDtype:
+    if dtype is None: return EnsembleDtype()
+    if isinstance(dtype, EnsembleDtype): return dtype
+    if isinstance(dtype, str) and EnsembleDtype._match.match(dtype): return EnsembleDtype.construct_from_string(dtype)
+    return EnsembleDtype(dtype)
+
+
+def _is_missing(value) -> bool:
+    return value is None or (np.ndim(value) == 0 and bool(isna(value)))
+
+
+def _as_members(value) -> np.ndarray:
+    """ Converts one cell into its members."""
+    if _is_missing(value): return np.empty(0)
+    return np.atleast_1d(np.asarray(value, dtype=float)).ravel()
+
+
+def _row_to_list(row: np.ndarray) -> list[float] | float:
+    """ Converts one row of the matrix back to a list, dropping the NaN padding. A row with no members is NaN."""
+    present = np.flatnonzero(~np.isnan(row))
+    if len(present) == 0: return np.nan
+    return row[:present[-1] + 1].tolist()
+
+
+def _rows_equal(left, right) -> bool:
+    if not isinstance(left, list) or _is_missing(right): return False
+    right = _as_members(right)
+    return len(left) == len(right) and bool(np.all((np.asarray(left) == right) | (np.isnan(left) & np.isnan(right))))
+
+
+def _normalize_indexer(array: EnsembleArray, item):
+    from pandas.api.indexers import check_array_indexer
+    if isinstance(item, tuple) and len(item) == 1: item = item[0]
+    if isinstance(item, slice) or item is Ellipsis: return item
+    return check_array_indexer(array, item)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+#ArrowIPC.py
+#----------------------------------
+# Created By: Flare Team
+#----------------------------------
+""" This file is an export class under the IExport interface.
+Exports the columns as an Arrow IPC file (Feather version 2), which apache-arrow can load in the browser without parsing. Needs pyarrow.
+ """
+#----------------------------------
+#
+#
+#Imports
+from Export.I_Export import IExport
+from Export.Export_Utility import ExportTable
+
+
+class ArrowIPC(IExport):
+
+    STATELESS = True
+
+    FILE_EXTENSION = '.arrow'
+
+    def export(self, table: ExportTable, compression: str | None = None) -> bytes:
+        """
+        Args:
+            table (ExportTable): The columns to export.
+            compression (str | None): The buffer compression (lz4 or zstd), None for uncompressed.
+                Uncompressed files can be memory mapped and are read by every apache-arrow version.
+
+        JSON Call :
+            {
+                "key": "ArrowIPC",
+                "args": {
+                    "compression": "zstd",   <-- optional
+                    "file_name": ""          <-- optional
+                }
+            },
+        """
+        arrow_table = table.arrow_table # Raises a clear error when pyarrow is missing
+        import pyarrow
+        import pyarrow.ipc
+
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_file(sink, arrow_table.schema, options=pyarrow.ipc.IpcWriteOptions(compression=compression)) as writer:
+            writer.write_table(arrow_table)
+        return sink.getvalue().to_pybytes()
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+#CSV.py
+#----------------------------------
+# Created By: Flare Team
+#----------------------------------
+""" This file is an export class under the IExport interface.
+Exports the columns as a CSV, the format every CSPEC exports.
+ """
+#----------------------------------
+#
+#
+#Imports
+from Export.I_Export import IExport
+from Export.Export_Utility import ExportTable
+
+
+class CSV(IExport):
+
+    STATELESS = True
+
+    FILE_EXTENSION = '.csv'
+
+    def export(self, table: ExportTable) -> bytes:
+        """
+        JSON Call :
+            {
+                "key": "CSV",
+                "args": {
+                    "file_name": ""   <-- optional
+                }
+            },
+        """
+        return table.frame.to_csv().encode()
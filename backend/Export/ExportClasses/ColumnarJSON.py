@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#ColumnarJSON.py
+#----------------------------------
+# Created By: Flare Team
+#----------------------------------
+""" This file is an export class under the IExport interface.
+Exports the columns as JSON arrays instead of rows, so the frontend can load each series with one JSON.parse:
+    {"time": [epoch milliseconds, ...], "columns": {"column name": [value, ...], ...}}
+Missing values are null. Ensemble columns hold a list of members per time, padded with null to the same length.
+ """
+#----------------------------------
+#
+#
+#Imports
+from Export.I_Export import IExport
+from Export.Export_Utility import ExportTable
+import numpy as np
+import json
+
+
+class ColumnarJSON(IExport):
+
+    STATELESS = True
+
+    FILE_EXTENSION = '.json'
+
+    def export(self, table: ExportTable, float_precision: int | None = None) -> bytes:
+        """
+        Args:
+            table (ExportTable): The columns to export.
+            float_precision (int | None): The number of decimals to round values to, None keeps full precision.
+
+        JSON Call :
+            {
+                "key": "ColumnarJSON",
+                "args": {
+                    "float_precision": 2,   <-- optional
+                    "file_name": ""         <-- optional
+                }
+            },
+        """
+        if float_precision is not None and (not isinstance(float_precision, int) or float_precision < 0):
+            raise ValueError(f'float_precision must be an integer >= 0, got {float_precision} instead.')
+
+        columns = {str(name): self.to_list(table.column(name), float_precision) for name in table.frame.columns}
+        return json.dumps({'time': table.epoch_ms.tolist(), 'columns': columns}, separators=(',', ':')).encode()
+
+
+    def to_list(self, values: np.ndarray, float_precision: int | None) -> list:
+        """ Converts values to (nested) lists with NaN as None."""
+        if float_precision is not None:
+            values = np.round(values, float_precision)
+        missing = np.isnan(values)
+        if not missing.any():
+            return values.tolist()
+        values = values.astype(object)
+        values[missing] = None
+        return values.tolist()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+#Parquet.py
+#----------------------------------
+# Created By: Flare Team
+#----------------------------------
+""" This file is an export class under the IExport interface.
+Exports the columns as a Parquet file. Needs pyarrow.
+ """
+#----------------------------------
+#
+#
+#Imports
+from Export.I_Export import IExport
+from Export.Export_Utility import ExportTable
+
+
+class Parquet(IExport):
+
+    STATELESS = True
+
+    FILE_EXTENSION = '.parquet'
+
+    def export(self, table: ExportTable, compression: str = 'zstd') -> bytes:
+        """
+        Args:
+            table (ExportTable): The columns to export.
+            compression (str): The Parquet compression codec (ex. zstd, snappy, gzip, none).
+
+        JSON Call :
+            {
+                "key": "Parquet",
+                "args": {
+                    "compression": "zstd",   <-- optional
+                    "file_name": ""          <-- optional
+                }
+            },
+        """
+        arrow_table = table.arrow_table # Raises a clear error when pyarrow is missing
+        import pyarrow
+        import pyarrow.parquet
+
+        sink = pyarrow.BufferOutputStream()
+        pyarrow.parquet.write_table(arrow_table, sink, compression=compression)
+        return sink.getvalue().to_pybytes()
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+#Export_Utility.py
+#----------------------------------
+# Created By: Flare Team
+#----------------------------------
+""" Prepares the data of a run for the exporters and writes exported files for the web tier.
+Every exporter reads the same ExportTable, so the conversions they share (ex. times to epoch milliseconds, the arrow table)
+are done once per run no matter how many formats are exported. A file is written to a temp file in the same directory and renamed into place,
+so a reader (nginx serving the dashboards) only ever sees the old or the new file, never a half written one.
+Each file has a sidecar holding the SHA-256 of its content. When an export has the same content as the file already
+there nothing is written, so the file keeps its modification time and the web tier can keep answering with 304s.
+The hash sidecars and the manifest lock are bookkeeping, they can be kept in a state directory outside the served directory.
+A file can also be precompressed, .gz (and .br when brotli is installed) sidecars are written next to it whenever it changes
+so nginx (gzip_static) serves them as they are instead of compressing the file again on every request.
+The export directory also holds a manifest (manifest.json) describing every exported file (its hash, when it was generated
+and last changed, its reference time, rows, and null counts), so a client can check whether a file changed, or how stale
+a chart is, with one small request.
+ """
+#----------------------------------
+#
+#
+#Imports
+from datetime import datetime
+from functools import cached_property
+from hashlib import sha256
+from threading import Lock
+from pandas import DataFrame
+from Ensemble import to_member_matrix
+import numpy as np
+import fcntl
+import gzip
+import json
+import os
+import tempfile
+
+try:
+    import brotli
+except ImportError: # Optional, without it only .gz sidecars are written
+    brotli = None
+
+# The sidecar holding the hash of a file is the file name plus this suffix (ex. chart.csv.sha256), in its state directory
+HASH_SUFFIX = '.sha256'
+
+# The precompressed sidecars of a file are the file path plus one of these suffixes (ex. chart.csv.gz)
+COMPRESSED_SUFFIXES = ('.gz', '.br')
+
+# The manifest of the exported files, in the export directory
+MANIFEST_NAME = 'manifest.json'
+
+# CSPECs running on other threads update the manifest too, the file lock covers other flare processes
+_manifest_lock = Lock()
+
+
+class ExportTable():
+    """The exported columns of a run, with the conversions every exporter needs computed once."""
+
+    def __init__(self, frame: DataFrame) -> None:
+        """
+            :param frame: DataFrame - The included columns, with a DatetimeIndex.
+        """
+        self.frame = frame
+        self.__columns: dict[str, np.ndarray] = {}
+
+
+    @cached_property
+    def epoch_ms(self) -> np.ndarray:
+        """ The index as milliseconds since the epoch."""
+        return np.asarray(self.frame.index.values, dtype='datetime64[ms]').astype(np.int64)
+
+
+    def column(self, name: str) -> np.ndarray:
+        """ Returns a column as floats. Plain columns are 1-D, ensemble columns a time x members matrix padded with NaN.
+            :param name: str - The column name.
+            :return np.ndarray - The values, do not modify them.
+        """
+        if name not in self.__columns:
+            series = self.frame[name]
+            self.__columns[name] = series.to_numpy(dtype=float, na_value=np.nan) if series.dtype.kind in 'fiub' else to_member_matrix(series)
+        return self.__columns[name]
+
+
+    @cached_property
+    def arrow_table(self):
+        """ The columns as a pyarrow Table, the time as a millisecond timestamp and ensembles as fixed size lists (missing members are null)."""
+        try:
+            import pyarrow
+        except ImportError as e:
+            raise ImportError('pyarrow is required for the Parquet and ArrowIPC exports, install it with pip install pyarrow') from e
+
+        arrays = [pyarrow.array(self.epoch_ms, type=pyarrow.timestamp('ms'))]
+        for name in self.frame.columns:
+            values = self.column(name)
+            if values.ndim == 1:
+                arrays.append(pyarrow.array(values, from_pandas=True))
+            else:
+                arrays.append(pyarrow.FixedSizeListArray.from_arrays(pyarrow.array(values.ravel(), from_pandas=True), values.shape[1]))
+        return pyarrow.Table.from_arrays(arrays, names=[self.frame.index.name or 'Date', *map(str, self.frame.columns)])
+
+
+    @cached_property
+    def null_counts(self) -> dict[str, int]:
+        """ The number of times each column has no value, for ensembles the times where every member is missing."""
+        counts = {}
+        for name in self.frame.columns:
+            try:
+                missing = np.isnan(self.column(name))
+                missing = missing if missing.ndim == 1 else missing.all(axis=1)
+            except (TypeError, ValueError): # Not numbers or members (ex. text), counted the same as pandas
+                missing = self.frame[name].isna().to_numpy()
+            counts[str(name)] = int(missing.sum())
+        return counts
+
+
+def manifest_entry(table: ExportTable, digest: str, size: int, reference_time: datetime, generated: datetime) -> dict:
+    """ Describes an exported file for the manifest.
+        :param table: ExportTable - The table the file was exported from.
+        :param digest: str - The SHA-256 of the file.
+        :param size: int - The size of the file in bytes.
+        :param reference_time: datetime - The reference time of the run.
+        :param generated: datetime - When the file was exported.
+        :return dict - The entry, update_manifest adds when the file last changed.
+    """
+    index = table.frame.index
+    return {
+        'sha256': digest,
+        'size': size,
+        'generated': generated.isoformat(timespec='seconds'),
+        'reference_time': reference_time.isoformat(timespec='seconds'),
+        'rows': len(index),
+        'first': index.min().isoformat() if len(index) else None,
+        'last': index.max().isoformat() if len(index) else None,
+        'null_counts': table.null_counts,
+    }
+
+
+def update_manifest(directory: str, entries: dict[str, dict], state_dir: str | None = None) -> None:
+    """ Adds or replaces the entries of some files in the manifest of a directory, keeping every other entry.
+    An entry whose hash is the same as before keeps the time it last changed, otherwise it changed when it was generated.
+        :param directory: str - The export directory.
+        :param entries: dict[str, dict] - Entries (see manifest_entry) by file name.
+        :param state_dir: str | None - Where the lock file is kept, None keeps it next to the manifest.
+    """
+    path = os.path.join(directory, MANIFEST_NAME)
+    with _manifest_lock, open(state_path(path, '.lock', state_dir), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX) # Released when the lock file is closed
+        try:
+            with open(path) as manifest_file:
+                files = json.load(manifest_file)['files']
+        except (FileNotFoundError, ValueError, KeyError, TypeError): # A missing or broken manifest is started over
+            files = {}
+        if not isinstance(files, dict): files = {}
+
+        for file_name, entry in entries.items():
+            previous = files.get(file_name) or {}
+            changed = previous.get('changed') if previous.get('sha256') == entry['sha256'] else None
+            files[file_name] = {**entry, 'changed': changed or entry['generated']}
+
+        manifest = {'updated': datetime.now().isoformat(timespec='seconds'), 'files': dict(sorted(files.items()))}
+        write_atomic(path, json.dumps(manifest, indent=2).encode())
+
+
+def write_if_changed(path: str, content: bytes, precompress: bool = False, digest: str | None = None, state_dir: str | None = None) -> bool:
+    """ Writes content to path atomically, unless path already holds the same content.
+        :param path: str - The file to write.
+        :param content: bytes - The content of the file.
+        :param precompress: bool - Also write the compressed sidecars of the file (see compressed_suffixes).
+        :param digest: str | None - The SHA-256 of content if the caller already has it.
+        :param state_dir: str | None - Where the hash sidecar is kept, None keeps it next to the file.
+        :return bool - True if the file was written, False if it was unchanged.
+    """
+    digest = digest or sha256(content).hexdigest()
+    hash_path = state_path(path, HASH_SUFFIX, state_dir)
+    suffixes = compressed_suffixes() if precompress else []
+    if os.path.exists(path) and current_hash(path, state_dir) == digest:
+        if not os.path.exists(hash_path): write_atomic(hash_path, f'{digest}\n'.encode())
+        # Sidecars are never older than the file, so only missing ones (ex. precompress was just turned on) need writing
+        for suffix in suffixes:
+            if not os.path.exists(path + suffix): write_atomic(path + suffix, compress(content, suffix))
+        return False
+
+    # The old sidecar is removed first, if we stop between the two writes the next export hashes the file itself
+    if os.path.exists(hash_path): os.remove(hash_path)
+    # Compressed sidecars are replaced before the file and stale ones removed, nginx must never serve an old one in its place
+    for suffix in COMPRESSED_SUFFIXES:
+        if suffix in suffixes: write_atomic(path + suffix, compress(content, suffix))
+        elif os.path.exists(path + suffix): os.remove(path + suffix)
+    write_atomic(path, content)
+    write_atomic(hash_path, f'{digest}\n'.encode())
+    return True
+
+
+def compressed_suffixes() -> list[str]:
+    """ Returns the suffixes of the compressed sidecars that can be written, .br only if brotli is installed."""
+    return ['.gz', '.br'] if brotli is not None else ['.gz']
+
+
+def compress(content: bytes, suffix: str) -> bytes:
+    """ Compresses content for a sidecar as small as possible. The output only depends on the content (gzip mtime is 0),
+    so an unchanged file always has byte identical sidecars.
+        :param content: bytes - The content of the file.
+        :param suffix: str - The sidecar suffix, '.gz' or '.br'.
+        :return bytes - The compressed content.
+    """
+    if suffix == '.gz': return gzip.compress(content, compresslevel=9, mtime=0)
+    if suffix == '.br' and brotli is not None: return brotli.compress(content, quality=11)
+    raise ValueError(f'Can not compress for suffix {suffix}! Available: {compressed_suffixes()}')
+
+
+def current_hash(path: str, state_dir: str | None = None) -> str:
+    """ Returns the SHA-256 of a file, read from its sidecar if there is one.
+        :param path: str - The file.
+        :param state_dir: str | None - Where the hash sidecar is kept, None if it is next to the file.
+        :return str - The hex digest.
+    """
+    try:
+        with open(state_path(path, HASH_SUFFIX, state_dir)) as hash_file:
+            return hash_file.read().strip()
+    except FileNotFoundError:
+        with open(path, 'rb') as file:
+            return sha256(file.read()).hexdigest()
+
+
+def state_path(path: str, suffix: str, state_dir: str | None = None) -> str:
+    """ Returns the path of a bookkeeping file of path (ex. its hash sidecar). A state directory holds the files of one export directory.
+        :param path: str - The file the bookkeeping is for.
+        :param suffix: str - The suffix of the bookkeeping file (ex. HASH_SUFFIX).
+        :param state_dir: str | None - The state directory, None for next to the file.
+        :return str - The path.
+    """
+    if state_dir is None: return path + suffix
+    return os.path.join(state_dir, os.path.basename(path) + suffix)
+
+
+def write_atomic(path: str, content: bytes) -> None:
+    """ Writes content to a temp file next to path then renames it over path.
+        :param path: str - The file to write.
+        :param content: bytes - The content of the file.
+    """
+    directory, name = os.path.split(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory or '.', prefix=f'.{name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(content)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.chmod(temp_path, 0o644) # mkstemp only lets the owner read, the web server must be able to as well
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path): os.remove(temp_path)
+        raise
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#I_Export.py
+#----------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""Export is responsible for writing the result of a run to the files the frontend reads. This module provides
+an interface to decouple the file formats from the main body of code. The factory method will
+import and execute the correct code for a given format (based on a keyword) returning the file content.
+Every CSPEC exports a CSV, more formats can be declared in its csv_config:
+    "csv_config": {
+        "csv_name": "chart.csv",
+        "included_columns": [...],
+        "exports": [
+            {"key": "ColumnarJSON", "args": {"float_precision": 2}},
+            {"key": "Parquet", "args": {"file_name": "chart_data.parquet"}}
+        ]
+    }
+ """
+#----------------------------------
+#
+#
+#Imports
+from abc import ABC, abstractmethod
+from Export.Export_Utility import ExportTable
+from PluginRegistry import PluginRegistry
+import os
+
+
+
+class IExport(ABC):
+
+    # The extension of the exported file, the file is named after the CSV unless a file_name is passed
+    FILE_EXTENSION = ''
+
+    # True for classes that keep no state on self between calls, one instance is then shared by every call
+    STATELESS = False
+
+    @abstractmethod
+    def export(self, table: ExportTable, **kwargs) -> bytes:
+        raise NotImplementedError
+
+
+# The ExportClasses plugins, each module is imported the first time its key is used
+export_registry = PluginRegistry('Export', 'ExportClasses')
+
+
+def export_class(key: str) -> type[IExport]:
+    """ Returns the class of IExport for a key.
+        :param key: str - The string key that will be used to detect the correct module.
+        :returns type[IExport] - The class, named the same as its module.
+    """
+    return export_registry.get_class(key)
+
+
+def export_file_name(csv_name: str, key: str, kwargs) -> str:
+    """ Returns the file name of an export, its file_name argument or else the CSV name with the format's extension.
+        :param csv_name: str - The CSV name of the CSPEC.
+        :param key: str - The string key that will be used to detect the correct module.
+        :kwargs: dict - The export's args.
+        :returns str - The file name.
+    """
+    return kwargs.get('file_name') or os.path.splitext(csv_name)[0] + export_class(key).FILE_EXTENSION
+
+
+def export_factory(table: ExportTable, key: str, kwargs) -> bytes:
+    """ Initiates a call to a class of IExport returning the file content. The call is determined by a passed key, and arguments through the kwargs.
+        :param table: ExportTable - The columns to export.
+        :param key: str - The string key that will be used to detect the correct module.
+        :kwargs: dict - The keyword args to pas to the resulting method, file_name is handled here and not passed on.
+        :returns bytes - The content of the exported file.
+    """
+
+    export_instance: IExport = export_registry.get_instance(key)
+    kwargs = {name: value for name, value in kwargs.items() if name != 'file_name'}
+    try:
+        return export_instance.export(table, **kwargs)
+    except TypeError as e:
+        raise TypeError(f'{e}.kwargs mismatch for key: {key} and kwargs: {kwargs}') from e
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#Fetch_Coordinator.py
+#----------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""A run scoped fetch layer for windowed requests (like the Semaphore input endpoint). Several CSPECs in one run
+often ask for the same series, or for overlapping time windows of it. Requests are registered before the run starts,
+overlapping windows of the same key are merged, and each merged window is fetched once. Every caller then gets
+only the slice of the response that falls in its own window.
+ """
+#----------------------------------
+#
+#
+#Imports
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Callable
+
+
+class _Fetch():
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.done = False
+        self.response = None
+
+
+class FetchCoordinator():
+
+    def __init__(self, time_key: str = 'timeVerified', time_format: str = '%Y-%m-%dT%H:%M:%S', window_unit: timedelta = timedelta(hours=1)) -> None:
+        """
+            :param time_key: str - The key of the timestamp on each data point, used to slice responses.
+            :param time_format: str - The format of that timestamp.
+            :param window_unit: timedelta - The resolution the API reads windows at. A window covers whole units, so the
+                unit holding to_time is returned entirely (ex. a window to 05:00 includes 05:54 when the unit is an hour).
+        """
+        self.time_key = time_key
+        self.time_format = time_format
+        self.window_unit = window_unit
+        self.requests_served = 0
+        self.requests_made = 0
+
+        self.__lock = Lock()
+        self.__windows: dict[tuple, list[tuple[datetime, datetime]]] = {}
+        self.__fetches: dict[tuple, _Fetch] = {}
+
+
+    def register(self, key: tuple, from_time: datetime, to_time: datetime) -> None:
+        """ Registers a future request so it can be merged with overlapping requests for the same key.
+            :param key: tuple - Identifies the series, every field that changes the request except the window.
+            :param from_time: datetime - The start of the window (inclusive).
+            :param to_time: datetime - The end of the window (inclusive).
+        """
+        if from_time > to_time: return # Reversed windows are passed through as is, never merged
+        with self.__lock:
+            self.__merge_window(key, from_time, to_time)
+
+
+    def fetch(self, key: tuple, from_time: datetime, to_time: datetime, fetch_method: Callable[[datetime, datetime], dict | None]) -> dict | None:
+        """ Returns the response for a window, fetching the merged window that covers it if no one has yet.
+            :param key: tuple - Identifies the series, every field that changes the request except the window.
+            :param from_time: datetime - The start of the window (inclusive).
+            :param to_time: datetime - The end of the window (inclusive).
+            :param fetch_method: Callable - Fetches a window, returning the parsed response or None on failure.
+            :return dict | None - The response holding only the data points in the window, or None if the fetch failed.
+        """
+        with self.__lock:
+            window = (from_time, to_time) if from_time > to_time else self.__merge_window(key, from_time, to_time)
+            fetch = self.__fetches.setdefault((key, window), _Fetch())
+            self.requests_served += 1
+
+        # Only the first caller for a window fetches it, the others wait for its response
+        with fetch.lock:
+            if not fetch.done:
+                fetch.response = fetch_method(*window)
+                fetch.done = True
+                with self.__lock:
+                    self.requests_made += 1
+
+        if window == (from_time, to_time): return fetch.response
+        return self.__slice(fetch.response, from_time, to_time)
+
+
+    def __merge_window(self, key: tuple, from_time: datetime, to_time: datetime) -> tuple[datetime, datetime]:
+        """ Merges a window into the windows of a key. The lock must be held.
+            :return tuple[datetime, datetime] - The merged window that now covers the passed window.
+        """
+        merged_from, merged_to = from_time, to_time
+        remaining = []
+        for window_from, window_to in self.__windows.get(key, []):
+            if window_from <= merged_to and merged_from <= window_to:
+                merged_from, merged_to = min(merged_from, window_from), max(merged_to, window_to)
+            else:
+                remaining.append((window_from, window_to))
+        remaining.append((merged_from, merged_to))
+        self.__windows[key] = remaining
+        return merged_from, merged_to
+
+
+    def __slice(self, response: dict | None, from_time: datetime, to_time: datetime) -> dict | None:
+        """ Copies a response keeping the data points the API would have returned for the window on its own."""
+        if response is None: return None
+        lower = self.__floor(from_time)
+        upper = self.__floor(to_time) + self.window_unit # Exclusive, the whole unit of to_time is in the window
+        data_points = response['_Series__data']
+        positions = [i for i, time in enumerate(data_points[self.time_key]) if lower <= datetime.strptime(time, self.time_format) < upper]
+        return {**response, '_Series__data': data_points.take(positions)}
+
+
+    def __floor(self, time: datetime) -> datetime:
+        """ Rounds a time down to the start of its window unit."""
+        return time - (time - datetime.min) % self.window_unit
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+#HTTP_Client.py
+#----------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""A small HTTP/1.1 client built on the standard library that keeps connections alive between requests.
+Connections are pooled per host, SSL contexts are built once, responses are requested gzipped and
+decompressed while they stream in, and every request has a connect and a read timeout.
+NOTE:: unlike urlopen this does not read proxy settings from the environment.
+ """
+#----------------------------------
+#
+#
+#Imports
+from http.client import HTTPConnection, HTTPSConnection, HTTPException, HTTPResponse
+from threading import BoundedSemaphore, Lock
+from urllib.error import HTTPError, URLError
+from urllib.parse import urljoin, urlsplit
+import ssl
+import zlib
+
+
+class _HostPool():
+    def __init__(self, max_connections: int) -> None:
+        self.slots = BoundedSemaphore(max_connections)
+        self.lock = Lock()
+        self.idle: list[HTTPConnection] = []
+
+
+class HTTPClient():
+
+    CHUNK_SIZE = 64 * 1024
+    MAX_REDIRECTS = 5
+    REDIRECT_CODES = {301, 302, 303, 307, 308}
+
+    def __init__(self, connect_timeout: float = 10, read_timeout: float = 60, max_connections_per_host: int = 4) -> None:
+        """
+            :param connect_timeout: float - Seconds to wait for a connection (and TLS handshake) to a host.
+            :param read_timeout: float - Seconds to wait on any single read from the socket.
+            :param max_connections_per_host: int - The most connections open at once to a single host, extra requests wait for a free one.
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_connections_per_host = max_connections_per_host
+
+        self.__lock = Lock()
+        self.__pools: dict[tuple[str, str, int], _HostPool] = {}
+        self.__ssl_contexts: dict[bool, ssl.SSLContext] = {}
+
+
+    def get(self, url: str) -> bytes:
+        """ Executes a GET request returning the (decompressed) body.
+            :param url: str - The url to request.
+            :return bytes - The response body.
+            :raises HTTPError - When the server responds with an error status.
+            :raises URLError - When the url can not be requested.
+        """
+        for _ in range(self.MAX_REDIRECTS + 1):
+            status, reason, headers, body = self.__request(url)
+            if status in self.REDIRECT_CODES and headers.get('Location'):
+                url = urljoin(url, headers['Location'])
+                continue
+            if status >= 400:
+                raise HTTPError(url, status, reason, headers, None)
+            return body
+        raise URLError(f'Too many redirects for {url}')
+
+
+    def close(self) -> None:
+        """ Closes every idle connection."""
+        with self.__lock:
+            pools = list(self.__pools.values())
+        for pool in pools:
+            with pool.lock:
+                idle, pool.idle = pool.idle, []
+            for connection in idle: connection.close()
+
+
+    def __request(self, url: str) -> tuple[int, str, dict, bytes]:
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise URLError(f'unknown url type: {parts.scheme!r} for {url}')
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        pool = self.__get_pool((parts.scheme, parts.hostname, port))
+        target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        headers = {'Accept-Encoding': 'gzip', 'Connection': 'keep-alive', 'User-Agent': 'Flare'}
+
+        with pool.slots:
+            connection, reused = self.__checkout(pool, parts.scheme, parts.hostname, port)
+            try:
+                try:
+                    connection.request('GET', target, headers=headers)
+                    response = connection.getresponse()
+                except (HTTPException, ConnectionError) as e:
+                    # A kept alive connection may have been closed by the server while idle, retry once on a new one
+                    connection.close()
+                    if not reused: raise URLError(e) from e
+                    connection = self.__connect(parts.scheme, parts.hostname, port)
+                    connection.request('GET', target, headers=headers)
+                    response = connection.getresponse()
+
+                body = self.__read_body(response)
+            except OSError as e:
+                connection.close()
+                if isinstance(e, URLError): raise
+                raise URLError(e) from e
+            except BaseException:
+                connection.close()
+                raise
+
+            if response.will_close:
+                connection.close()
+            else:
+                with pool.lock:
+                    pool.idle.append(connection)
+        return response.status, response.reason, dict(response.getheaders()), body
+
+
+    def __read_body(self, response: HTTPResponse) -> bytes:
+        """ Reads the whole body, decompressing gzip as it streams in."""
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if response.getheader('Content-Encoding', '').lower() == 'gzip' else None
+        chunks = []
+        while chunk := response.read(self.CHUNK_SIZE):
+            chunks.append(decompressor.decompress(chunk) if decompressor else chunk)
+        if decompressor: chunks.append(decompressor.flush())
+        return b''.join(chunks)
+
+
+    def __get_pool(self, host_key: tuple[str, str, int]) -> _HostPool:
+        with self.__lock:
+            pool = self.__pools.get(host_key)
+            if pool is None:
+                pool = self.__pools[host_key] = _HostPool(self.max_connections_per_host)
+            return pool
+
+
+    def __checkout(self, pool: _HostPool, scheme: str, host: str, port: int) -> tuple[HTTPConnection, bool]:
+        """ Returns an idle connection to the host if there is one, otherwise a new one.
+            :return tuple[HTTPConnection, bool] - The connection and whether it was reused.
+        """
+        with pool.lock:
+            if pool.idle: return pool.idle.pop(), True
+        return self.__connect(scheme, host, port), False
+
+
+    def __connect(self, scheme: str, host: str, port: int) -> HTTPConnection:
+        try:
+            if scheme == 'https':
+                connection = HTTPSConnection(host, port, timeout=self.connect_timeout, context=self.__ssl_context(host))
+            else:
+                connection = HTTPConnection(host, port, timeout=self.connect_timeout)
+            connection.connect()
+        except OSError as e:
+            raise URLError(e) from e
+        # The connect timeout covered the handshake, from here on every read gets the read timeout
+        connection.sock.settimeout(self.read_timeout)
+        return connection
+
+
+    def __ssl_context(self, host: str) -> ssl.SSLContext:
+        # As of writing this 10/26/2025 sherlock-dev has no ssl cert, so if we are hitting the dev server we disable ssl verification
+        verify = "sherlock-dev" not in host
+        with self.__lock:
+            context = self.__ssl_contexts.get(verify)
+            if context is None:
+                context = self.__ssl_contexts[verify] = ssl.create_default_context() if verify else ssl._create_unverified_context()
+            return context
@@ -13,18 +13,48 @@ New data will be inserted into the dataframe by reference
 #
 #Imports
 from abc import ABC, abstractmethod
-from importlib import import_module
-from pandas import DataFrame
+from pandas import DataFrame, Series
 from datetime import datetime
+from PluginRegistry import PluginRegistry
 
 
 
 class IDataIngestion(ABC):
 
+    # True for classes that keep no state on self between calls, one instance is then shared by every call
+    STATELESS = False
+
     @abstractmethod
     def ingest_data(self, data: DataFrame, ref_time: datetime, **kwargs) -> DataFrame:
         raise NotImplementedError
     
+    def ingest_series(self, ref_time: datetime, **kwargs) -> Series | DataFrame:
+        """Called with the same kwargs as ingest_data, returns only the ingested data (a Series named after its column)
+        so the runner can assemble every call into one frame at once. By default it calls ingest_data with an empty data frame."""
+        return self.ingest_data(DataFrame(), ref_time, **kwargs)
+
+    def register_request(self, ref_time: datetime, **kwargs) -> None:
+        """Called with the same arguments as ingest_data for every request in a run, before any ingestion starts.
+        Classes can override this to plan their requests (ex. merge overlapping requests), by default it does nothing."""
+        pass
+    
+    def output_columns(self, **kwargs) -> list[str] | None:
+        """Called with the same kwargs as ingest_data to plan a CSPEC, returns the columns the call adds to the data frame.
+        By default it returns None (unknown), a call with unknown columns is never dropped."""
+        return None
+
+
+# The IngestionClasses plugins, each module is imported the first time its key is used
+ingestion_registry = PluginRegistry('Ingestion', 'IngestionClasses')
+
+
+def data_ingestion_class(key: str) -> type[IDataIngestion]:
+    """ Returns the class of IDataIngestion for a key.
+        :param key: str - The string key that will be used to detect the correct module.
+        :returns type[IDataIngestion] - The class, named the same as its module.
+    """
+    return ingestion_registry.get_class(key)
+    
 
 def data_ingestion_factory(data: DataFrame, ref_time: datetime,  key: str, kwargs) -> DataFrame:
     """ Initiates a call to a class of IDataIngestion returning the result. The call is determined by a passed key, and arguments through the kwargs.
@@ -35,13 +65,37 @@ def data_ingestion_factory(data: DataFrame, ref_time: datetime,  key: str, kwarg
         :returns DataFrame - A reference to the most updated DataFrame
     """
 
+    ingestion_class: IDataIngestion = ingestion_registry.get_instance(key)
     try:
-        ingestion_class: IDataIngestion = getattr(import_module(f'.IngestionClasses.{key}', 'Ingestion'), key)()
         return ingestion_class.ingest_data(data, ref_time, **kwargs)
-    except ModuleNotFoundError as e:
-        raise ModuleNotFoundError(f'No module named {key} in IngestionClasses!') from e
-        
     except TypeError as e:
         raise TypeError(f'kwargs mismatch for key: {key} and kwargs: {kwargs}') from e
-        
-    
\ No newline at end of file
+
+
+def data_ingestion_series_factory(ref_time: datetime, key: str, kwargs) -> Series | DataFrame:
+    """ Initiates a call to a class of IDataIngestion returning only the ingested data, see IDataIngestion.ingest_series.
+        :ref_time: DateTime - The datetime to base the ingestion off of.
+        :param key: str - The string key that will be used to detect the correct module.
+        :kwargs: dict - The keyword args to pas to the resulting method. Make sure this is formatted as the targeted method wants.
+        :returns Series | DataFrame - The ingested data, a Series named after its column.
+    """
+
+    ingestion_class: IDataIngestion = ingestion_registry.get_instance(key)
+    try:
+        return ingestion_class.ingest_series(ref_time, **kwargs)
+    except TypeError as e:
+        raise TypeError(f'kwargs mismatch for key: {key} and kwargs: {kwargs}') from e
+
+
+def data_ingestion_register(ref_time: datetime, key: str, kwargs) -> None:
+    """ Registers an upcoming call to a class of IDataIngestion so requests can be planned across a whole run.
+        :ref_time: DateTime - The datetime the ingestion will be based off of.
+        :param key: str - The string key that will be used to detect the correct module.
+        :kwargs: dict - The keyword args that will be passed to ingest_data.
+    """
+
+    ingestion_class: IDataIngestion = ingestion_registry.get_instance(key)
+    try:
+        ingestion_class.register_request(ref_time, **kwargs)
+    except TypeError as e:
+        raise TypeError(f'kwargs mismatch for key: {key} and kwargs: {kwargs}') from e
@@ -5,6 +5,7 @@
 #----------------------------------
 """This class ingests data from the Semaphore API. This specifically targets the input endpoint.
 NOTE:: reads the env "SEMAPHORE_API_URL" for the base url to hit.
+NOTE:: when the runner sets run_storage.inputs_fetcher, identical and overlapping requests across the run are fetched once.
  """ 
 #----------------------------------
 # 
@@ -12,40 +13,85 @@ NOTE:: reads the env "SEMAPHORE_API_URL" for the base url to hit.
 #Imports
 from Ingestion.I_Ingestion import IDataIngestion
 from datetime import datetime, timedelta
-from Ingestion.Ingestion_Utility import api_request, add_empty_column
-from pandas import DataFrame
-from numpy import nan
-from runtimeContext import thread_storage
+from Ingestion.Ingestion_Utility import api_request, empty_series, join_series, SeriesColumns
+from pandas import DataFrame, Series, to_datetime, to_numeric
+from numpy import array, full, nan
+from runtimeContext import thread_storage, run_storage
+from Ensemble import EnsembleArray
 from os import getenv
 import ast
 
 
 class SemaphoreInputs(IDataIngestion):
 
-    def ingest_data(self, data: DataFrame, ref_time: datetime, column_name: str, range: list[int], source: str, series: str, location: str, interval: str, datum: str = None):
-        '''Ingests data from the Semaphore Inputs API.'''
+    # How long (seconds) a response may be served from the response cache, by source. Observations change
+    # often so they are only reused for a short time, forecasts are only regenerated every few hours.
+    CACHE_TTLS = {
+        'NOAATANDC': 600,
+        'TWC': 3600,
+        'NDFD_JSON': 3600,
+        'NDFD_EXP': 3600,
+    }
+    DEFAULT_CACHE_TTL = 600
+
+    # The only data point fields we read, everything else is dropped while the response is parsed
+    SERIES_COLUMNS = ('timeVerified', 'dataValue')
+
+    # Values Semaphore uses for a null datapoint, these become NaN without being reported
+    NULL_VALUES = ('None', 'nan', 'NaN')
+
+    def ingest_data(self, data: DataFrame, ref_time: datetime, column_name: str, range: list[int], source: str, series: str, location: str, interval: str, datum: str = None, ensemble_dtype: str = 'float64'):
+        '''Ingests data from the Semaphore Inputs API. Ensemble series are stored as an ensemble column of ensemble_dtype (float64 or float32) members.'''
+        return join_series(data, self.ingest_series(ref_time, column_name, range, source, series, location, interval, datum, ensemble_dtype))
+
+
+    def ingest_series(self, ref_time: datetime, column_name: str, range: list[int], source: str, series: str, location: str, interval: str, datum: str = None, ensemble_dtype: str = 'float64') -> Series:
+        '''Ingests data from the Semaphore Inputs API as a series named column_name.'''
+        self.ensemble_dtype = ensemble_dtype
         self.source = source
         self.series = series
         self.location = location
         
-        url = self.__prepare_url(ref_time, range, source, series, location, interval, datum)
+        from_time, to_time = self.__prepare_window(ref_time, range, interval)
+        cache_ttl = self.CACHE_TTLS.get(source, self.DEFAULT_CACHE_TTL)
+        fetch_window = lambda from_time, to_time: api_request(self.__prepare_url(from_time, to_time, source, series, location, datum), cache_ttl, self.SERIES_COLUMNS)
+
+        fetcher = getattr(run_storage, 'inputs_fetcher', None)
+        if fetcher is None:
+            response = fetch_window(from_time, to_time)
+        else:
+            response = fetcher.fetch((source, series, location, datum), from_time, to_time, fetch_window)
 
-        response = api_request(url)
         if not self.__validate_response(response):
-            return add_empty_column(data, column_name)
+            return empty_series(column_name)
         
-        return self.__add_data(df= data, data_points= response['_Series__data'], col_name= column_name)
+        return self.__to_series(data_points= response['_Series__data'], col_name= column_name)
 
 
-    def __prepare_url(self, ref_time: datetime, range: list[int], source: str, series: str, location: str, interval: str, datum: str = None) -> str:
-        '''Builds the URL for the Semaphore API given the request parameters.'''
-        # Computer time range using range and interval
+    def register_request(self, ref_time: datetime, column_name: str, range: list[int], source: str, series: str, location: str, interval: str, datum: str = None, ensemble_dtype: str = 'float64') -> None:
+        '''Registers the request window with the run's fetcher so overlapping requests are fetched once.'''
+        fetcher = getattr(run_storage, 'inputs_fetcher', None)
+        if fetcher is None: return
+        fetcher.register((source, series, location, datum), *self.__prepare_window(ref_time, range, interval))
+
+
+    def output_columns(self, column_name: str, **kwargs) -> list[str]:
+        '''The only column added is column_name.'''
+        return [column_name]
+
+
+    def __prepare_window(self, ref_time: datetime, range: list[int], interval: str) -> tuple[datetime, datetime]:
+        '''Computes the requested time window using range and interval. The API only takes hours so the window is truncated to the hour.'''
         fromTimeOffset = timedelta(seconds=float(interval) * range[0]) 
         toTimeOffset = timedelta(seconds=float(interval) * range[1]) 
 
-        fromDateTime = ref_time + fromTimeOffset
-        toDateTime = ref_time + toTimeOffset
+        fromDateTime = (ref_time + fromTimeOffset).replace(minute=0, second=0, microsecond=0)
+        toDateTime = (ref_time + toTimeOffset).replace(minute=0, second=0, microsecond=0)
+        return fromDateTime, toDateTime
 
+
+    def __prepare_url(self, fromDateTime: datetime, toDateTime: datetime, source: str, series: str, location: str, datum: str = None) -> str:
+        '''Builds the URL for the Semaphore API given the request parameters.'''
         # Convert to urlsafe datetime
         fromDateTime = datetime.strftime(fromDateTime, '%Y%m%d%H')
         toDateTime = datetime.strftime(toDateTime, '%Y%m%d%H')
@@ -66,38 +112,58 @@ class SemaphoreInputs(IDataIngestion):
         return True
     
     
-    def __add_data(self, df: DataFrame, data_points: list[dict[any]], col_name: str) -> DataFrame:
-        '''Takes the data returned by the semaphore API, parses it into a pandas series, and adds it to the
-        dataframe with all the other data.'''
-        index = []
-        data = []
+    def __to_series(self, data_points: SeriesColumns, col_name: str) -> Series:
+        '''Takes the data returned by the semaphore API and parses it into a pandas series.'''
+        # Convert the string datetimes into proper datetimes all at once
+        index = to_datetime(data_points['timeVerified'], format='%Y-%m-%dT%H:%M:%S')
+
+        values = Series(data_points['dataValue'], dtype=object)
+        is_array = values.astype(str).str.lstrip().str.startswith('[').to_numpy(dtype=bool)
+        if is_array.any():
+            # Ensemble series, any plain number in it becomes a one member row
+            arrays = self.__parse_arrays(values[is_array])
+            members = full((len(values), arrays.members.shape[1]), nan, dtype=arrays.members.dtype)
+            members[is_array] = arrays.members
+            members[~is_array, 0] = self.__to_floats(values[~is_array]).to_numpy()
+            data = EnsembleArray(members, arrays.dtype)
+        else:
+            data = self.__to_floats(values).to_numpy()
+
+        return Series(data, index=index, name=col_name)
+
+
+    def __to_floats(self, values: Series) -> Series:
+        '''Converts scalar values to floats in one pass. Null datapoints become NaN, as do values that can not
+        be converted, which are reported once as a count and a sample.'''
+        floats = to_numeric(values, errors='coerce')
+        bad = floats.isna() & values.notna() & ~values.isin(self.NULL_VALUES)
+        if bad.any():
+            sample = values[bad].unique()[:5].tolist()
+            thread_storage.logger.log_error(message=f"[source:{self.source} series:{self.series} location: {self.location}] {bad.sum()} of {len(values)} values could not be converted to float and were set to NaN, sample: {sample}",error_type="ValueError")
+        return floats.astype(float)
+
+
+    def __parse_arrays(self, values: Series) -> EnsembleArray:
+        '''Parses ensemble values, strings holding a list of numbers, straight into an ensemble array.
+        All the members are converted in one pass, falling back to parsing row by row if any value is malformed.'''
+        inner = values.str.strip().str[1:-1]
+        lengths = inner.str.count(',').to_numpy() + 1
+        lengths[inner.str.strip().to_numpy() == ''] = 0
+        try:
+            members = array(','.join(inner[lengths > 0]).split(','), dtype=float) if lengths.any() else array([])
+            return EnsembleArray.from_ragged(members, lengths, self.ensemble_dtype)
+        except ValueError:
+            return EnsembleArray.from_rows([self.__parse_array(value) for value in values], self.ensemble_dtype)
+
+
+    def __parse_array(self, value: str):
+        '''Parses an ensemble value, a string holding a list of numbers.'''
         logger = thread_storage.logger
-        for datapoint in data_points:
-            
-            # Convert the string datetime into a proper datetime
-            index.append(datetime.strptime(datapoint['timeVerified'], '%Y-%m-%dT%H:%M:%S'))
-
-            # Check its not a null datapoint
-            value = datapoint['dataValue']
-            if (value == 'None') or (value is None): value = nan
-            elif isinstance(value, str) and value.strip().startswith("[") and value.strip().endswith("]"):
-                try:
-                    value_array = ast.literal_eval(value)
-                    if isinstance(value_array, list):
-                        data.append([float(v) for v in value_array])  # Convert elements to float
-                    else:
-                        logger.log_info(f"Parsed value is not a list: {value_array}")
-                        data.append(nan)  # Append NaN if it's not a list
-                except (ValueError, SyntaxError) as e:
-                    logger.log_error(message=f"[source:{self.source} series:{self.series} location: {self.location}] Error decoding array: {value} -> {e} for source={self.source}, series={self.series}, location={self.location}",error_type="ValueError, SyntaxError")
-                    data.append(nan)  # Append NaN if parsing fails
-            else: 
-                try:
-                    value = float(value)
-                    data.append(value)
-                except ValueError:
-                    logger.log_error(message=f"[source:{self.source} series:{self.series} location: {self.location}] Error converting value to float: {value}",error_type="ValueError")
-                    data.append(nan)  # Append NaN if conversion fails
-
-        # Add this to the collation df with an outer join to ensure all data is preserved
-        return df.join(DataFrame({col_name: data}, index=index), how='outer')
\ No newline at end of file
+        try:
+            value_array = ast.literal_eval(value)
+            if isinstance(value_array, list):
+                return array(value_array, dtype=float)  # Convert elements to float, null members become NaN
+            logger.log_info(f"Parsed value is not a list: {value_array}")
+        except (ValueError, TypeError, SyntaxError) as e:
+            logger.log_error(message=f"[source:{self.source} series:{self.series} location: {self.location}] Error decoding array: {value} -> {e} for source={self.source}, series={self.series}, location={self.location}",error_type="ValueError, SyntaxError")
+        return nan
\ No newline at end of file
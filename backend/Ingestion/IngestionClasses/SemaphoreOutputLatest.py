@@ -12,25 +12,45 @@ NOTE:: reads the env "SEMAPHORE_API_URL" for the base url to hit.
 #Imports
 from Ingestion.I_Ingestion import IDataIngestion
 from datetime import datetime, timedelta
-from Ingestion.Ingestion_Utility import api_request, add_empty_column
-from flareRunner import thread_storage 
-from pandas import DataFrame
+from Ingestion.Ingestion_Utility import api_request, empty_series, join_series
+from runtimeContext import thread_storage
+from pandas import DataFrame, Series
 from numpy import nan
 from os import getenv
+from Ensemble import EnsembleArray
 
 
 class SemaphoreOutputLatest(IDataIngestion):
 
-    def ingest_data(self, data: DataFrame, ref_time: datetime, column_name: str, model_names: list[str]):
+    STATELESS = True
+
+    # How long (seconds) a response may be served from the response cache. The url has no time in it,
+    # so this is also the longest a new model output can go unnoticed.
+    CACHE_TTL = 600
+
+    # The only data point fields we read, everything else is dropped while the response is parsed
+    SERIES_COLUMNS = ('timeGenerated', 'leadTime', 'dataValue')
+
+    def ingest_data(self, data: DataFrame, ref_time: datetime, column_name: str, model_names: list[str], ensemble_dtype: str = 'float64'):
         '''Ingests data from the Semaphore Inputs API.'''
+        return join_series(data, self.ingest_series(ref_time, column_name, model_names, ensemble_dtype))
+
+
+    def ingest_series(self, ref_time: datetime, column_name: str, model_names: list[str], ensemble_dtype: str = 'float64') -> Series:
+        '''Ingests data from the Semaphore Inputs API as a series named column_name.'''
 
         url = self.__prepare_url(model_names)
 
-        response = api_request(url)
+        response = api_request(url, self.CACHE_TTL, self.SERIES_COLUMNS)
         if not self.__validate_response(response, model_names):
-            return add_empty_column(data, column_name)
+            return empty_series(column_name)
+
+        return self.__to_series(response=response, model_names=model_names, col_name= column_name, ensemble_dtype= ensemble_dtype)
 
-        return self.__add_data(df= data, response=response, model_names=model_names, col_name= column_name)
+
+    def output_columns(self, column_name: str, **kwargs) -> list[str]:
+        '''The only column added is column_name.'''
+        return [column_name]
 
 
     def __prepare_url(self, model_names: list[str]) -> str:
@@ -56,29 +76,26 @@ class SemaphoreOutputLatest(IDataIngestion):
         return True
     
     
-    def __add_data(self, df: DataFrame, response: dict[any], model_names: list[str], col_name: str) -> DataFrame:
-        '''Takes the data returned by the semaphore API, parses it into a pandas series, and adds it to the
-        dataframe with all the other data.'''
+    def __to_series(self, response: dict[any], model_names: list[str], col_name: str, ensemble_dtype: str) -> Series:
+        '''Takes the data returned by the semaphore API and parses it into a pandas series.'''
         index = []
         data = []
         for name in model_names:
             model_response  = response[name]
 
-            data_point = model_response['_Series__data'][0]
+            data_points = model_response['_Series__data']
 
-            timeGenerated = datetime.strptime(data_point['timeGenerated'], '%Y-%m-%dT%H:%M:%S')
-            verifiedTime = timeGenerated + timedelta(seconds=data_point['leadTime'])
+            timeGenerated = datetime.strptime(data_points['timeGenerated'][0], '%Y-%m-%dT%H:%M:%S')
+            verifiedTime = timeGenerated + timedelta(seconds=data_points['leadTime'][0])
             index.append(verifiedTime)
 
-            value = data_point['dataValue']
+            value = data_points['dataValue'][0]
             if value is None or value == 'None': value = nan
-            
-            elif isinstance(value, list):
-                # Convert all elements to float
-                value = [float(v) for v in value]
-            
-            else: value = float(value)
+            elif not isinstance(value, list): value = float(value)
             data.append(value)
 
-        # Add this to the collation df with an outerjoin to ensure all data is preserved
-        return df.join(DataFrame({col_name: data}, index=index), how='outer')
\ No newline at end of file
+        # Models that return several members are stored as one ensemble column
+        if any(isinstance(value, list) for value in data):
+            data = EnsembleArray.from_rows(data, ensemble_dtype)
+
+        return Series(data, index=index, name=col_name)
\ No newline at end of file
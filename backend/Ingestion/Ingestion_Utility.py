@@ -1,35 +1,127 @@
 from urllib.error import HTTPError
-from urllib.request import urlopen
-from numpy import nan
-from pandas import DataFrame
+from pandas import DataFrame, DatetimeIndex, Series, concat
 import json
-from runtimeContext import thread_storage
-import ssl
+from runtimeContext import thread_storage, run_storage
+from Ingestion.HTTP_Client import HTTPClient
 
+# Shared by every request in the process so connections (and TLS sessions) are reused between calls
+http_client = HTTPClient(connect_timeout=10, read_timeout=60, max_connections_per_host=4)
 
-def api_request( url: str):
+
+# How long (seconds) a failed request is remembered before the url is tried again
+NEGATIVE_CACHE_TTL = 60
+
+
+class SeriesColumns():
+    """The data points of a Semaphore series ("_Series__data") stored as one list per kept field
+    instead of one dict per data point."""
+
+    def __init__(self, columns: dict[str, list]) -> None:
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), []))
+
+    def __getitem__(self, key: str) -> list:
+        return self.columns[key]
+
+    def take(self, positions: list[int]) -> 'SeriesColumns':
+        """ Returns the data points at positions."""
+        return SeriesColumns({key: [values[i] for i in positions] for key, values in self.columns.items()})
+
+
+def decode_response(body: bytes, series_columns: tuple[str, ...] | None = None):
+    """ Parses a json response body (the whole body, already read by the HTTP client).
+    When series_columns is passed every "_Series__data" list is reduced to a SeriesColumns holding only those fields.
+    Data points are trimmed by the json object hook as each one is parsed, so the parsed response only holds the fields we read.
+        :param body: bytes - The raw response body.
+        :param series_columns: tuple[str, ...] | None - The data point fields to keep, None parses the json as is.
+        :return The parsed response.
+    """
+    if series_columns is None: return json.loads(body)
+
+    def trim(obj: dict):
+        if 'dataValue' in obj and '_Series__data' not in obj:
+            return tuple(obj.get(key) for key in series_columns)
+        data_points = obj.get('_Series__data')
+        if isinstance(data_points, list):
+            data_points = [point if isinstance(point, tuple) else tuple(point.get(key) for key in series_columns) for point in data_points]
+            columns = zip(*data_points) if data_points else [[] for _ in series_columns]
+            obj['_Series__data'] = SeriesColumns({key: list(values) for key, values in zip(series_columns, columns)})
+        return obj
+
+    return json.loads(body, object_hook=trim)
+
+
+def api_request( url: str, cache_ttl: float | None = None, series_columns: tuple[str, ...] | None = None):
 
     """Execute a web get request against  URL returning the response or Non.
     :param url: str 
+    :param cache_ttl: float | None - How long (seconds) the response may be served from run_storage.response_cache. None skips the cache.
+    :param series_columns: tuple[str, ...] | None - The data point fields to keep, see decode_response.
 
     """
     logger = thread_storage.logger
+    cache = getattr(run_storage, 'response_cache', None) if cache_ttl else None
+
+    if cache is not None:
+        found, body = cache.get(url)
+        if found and body is None:
+            logger.log_info(f'[URL:{url}] Warning:: Skipping fetch, this url failed less than {NEGATIVE_CACHE_TTL}s ago.')
+            return None
+        if found:
+            # A truncated or corrupt entry is dropped and fetched again, the cache must never fail a request the API can answer
+            try:
+                return decode_response(body, series_columns)
+            except Exception as ex:
+                logger.log_info(f'[URL:{url}] Warning:: Cached response could not be decoded, fetching it again: {ex}')
+                cache.invalidate(url)
+
     try:
-        # As of writing this 10/26/2025 sherlock-dev has no ssl cert, so if we are hitting the dev server we disable ssl verification
-        context = ssl.create_default_context() if not "sherlock-dev" in url else ssl._create_unverified_context()
-        with urlopen(url, context=context) as response:
-            data = json.loads(''.join([line.decode() for line in response.readlines()])) #Download and parse
-        return data
+        body = http_client.get(url)
+        data = decode_response(body, series_columns) #Parse
     except HTTPError as err:
         logger.log_error(f'[URL:{url}] Fetch failed, HTTPError of code: {err.status} for: {err.reason}',error_type="HTTPError")
+        if cache is not None: cache.put_failure(url, NEGATIVE_CACHE_TTL)
         return None
     except Exception as ex:
         logger.log_error(message=f'[URL:{url}] Fetch failed, unhandled exceptions: {ex}')
+        if cache is not None: cache.put_failure(url, NEGATIVE_CACHE_TTL)
         return None
+
+    if cache is not None: cache.put(url, body, cache_ttl)
+    return data
     
 
-def add_empty_column(data: DataFrame, col_name: str):
+def empty_series(col_name: str) -> Series:
     logger = thread_storage.logger
     logger.log_info(f'Warning:: Column {col_name} is being initialized as all Nans this is likely due to failing to get data back from the ingestion source.')
-    data[col_name] = nan
-    return data
\ No newline at end of file
+    return Series(index=DatetimeIndex([]), dtype=float, name=col_name)
+
+
+def join_series(data: DataFrame, ingested: Series | DataFrame) -> DataFrame:
+    """ Outer joins ingested data into a data frame so every row of both is kept."""
+    return data.join(ingested.to_frame() if isinstance(ingested, Series) else ingested, how='outer')
+
+
+def assemble_frame(ingested: list[Series | DataFrame]) -> DataFrame:
+    """ Builds one data frame from the data of every ingestion call. The union of the indexes is computed once and every
+    column is aligned to it once, instead of realigning a growing frame per call.
+    Duplicate timestamps or column names can not be aligned that way, then the calls are joined one at a time.
+        :param ingested: list[Series | DataFrame] - The data of each call, in CSPEC order.
+        :return DataFrame - The data frame, with the columns in the same order as ingested.
+    """
+    if not ingested: return DataFrame()
+
+    columns = [name for item in ingested for name in (item.columns if isinstance(item, DataFrame) else [item.name])]
+    if len(set(columns)) == len(columns) and all(item.index.is_unique for item in ingested):
+        df = concat(ingested, axis=1, sort=True)
+        # Some pandas versions keep the freq of a regular union, joins never do, the frame must not depend on which path built it
+        if isinstance(df.index, DatetimeIndex) and df.index.freq is not None:
+            df.index = DatetimeIndex(df.index, freq=None)
+        return df
+
+    df = DataFrame()
+    for item in ingested:
+        df = join_series(df, item)
+    return df
\ No newline at end of file
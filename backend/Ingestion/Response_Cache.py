@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#Response_Cache.py
+#----------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""A persistent on disk (SQLite) cache of API responses, keyed by the normalized request URL.
+Each entry has its own time to live, set by the caller (ex. short for observations, long for forecasts).
+Failed requests are cached as negative entries for a short time so a failing endpoint is not hit on every call.
+The cache is safe to share between threads and between processes (ex. several cron jobs at once).
+It is best effort, if the database can not be read or written requests simply go to the API.
+ """
+#----------------------------------
+#
+#
+#Imports
+from contextlib import contextmanager
+from threading import Lock
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import os
+import sqlite3
+import time
+
+
+class ResponseCache():
+
+    # Expired entries older than this many seconds are removed when the cache is opened
+    PURGE_AFTER = 24 * 60 * 60
+
+    def __init__(self, path: str) -> None:
+        """
+            :param path: str - The SQLite file to store responses in, its directory is created if needed.
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.__lock = Lock()
+
+        directory = os.path.dirname(path)
+        if directory: os.makedirs(directory, exist_ok=True)
+        with self.__connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, body BLOB, ok INTEGER NOT NULL, expires REAL NOT NULL)')
+            connection.execute('DELETE FROM responses WHERE expires < ?', (time.time() - self.PURGE_AFTER,))
+
+
+    def get(self, url: str) -> tuple[bool, bytes | None]:
+        """ Looks up a url.
+            :param url: str - The request url.
+            :return tuple[bool, bytes | None] - (found, body). A found entry with a None body is a cached failure.
+        """
+        try:
+            with self.__connect() as connection:
+                row = connection.execute('SELECT body, ok FROM responses WHERE url = ? AND expires > ?', (normalize_url(url), time.time())).fetchone()
+        except sqlite3.Error:
+            row = None
+
+        with self.__lock:
+            if row is None:
+                self.misses += 1
+                return False, None
+            if not row[1]:
+                self.negative_hits += 1
+                return True, None
+            self.hits += 1
+            return True, row[0]
+
+
+    def put(self, url: str, body: bytes, ttl: float) -> None:
+        """ Caches a successful response for ttl seconds."""
+        self.__store(url, body, True, ttl)
+
+
+    def put_failure(self, url: str, ttl: float) -> None:
+        """ Caches a failed request for ttl seconds."""
+        self.__store(url, None, False, ttl)
+
+
+    def invalidate(self, url: str) -> None:
+        """ Removes the entry of a url (ex. a cached body that can no longer be decoded)."""
+        try:
+            with self.__connect() as connection:
+                connection.execute('DELETE FROM responses WHERE url = ?', (normalize_url(url),))
+        except sqlite3.Error:
+            pass
+
+
+    def __store(self, url: str, body: bytes | None, ok: bool, ttl: float) -> None:
+        try:
+            with self.__connect() as connection:
+                connection.execute('INSERT OR REPLACE INTO responses (url, body, ok, expires) VALUES (?, ?, ?, ?)', (normalize_url(url), body, int(ok), time.time() + ttl))
+        except sqlite3.Error:
+            pass
+
+
+    @contextmanager
+    def __connect(self):
+        # A short lived connection per call keeps this safe across threads, the timeout waits out other writers
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection: # Commits on success, rolls back on error
+                yield connection
+        finally:
+            connection.close()
+
+
+def normalize_url(url: str) -> str:
+    """ Normalizes a url so equivalent requests share a cache entry. The scheme and host are lower cased,
+    query parameters are sorted, and an empty query is dropped.
+        :param url: str - The url to normalize.
+        :return str - The normalized url.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ''))
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#PluginRegistry.py
+#----------------------------------
+# Created By: Flare Team
+#----------------------------------
+""" Ingestion and post processing classes are plugins, each lives in a module named the same as its class inside a
+plugin package (ex. Ingestion/IngestionClasses/SemaphoreInputs.py). A registry finds the class for a key, importing its
+module the first time it is asked for and caching the class from then on. Only the plugins a run uses are ever imported.
+Classes that keep no state between calls set STATELESS = True and share one instance.
+ """
+#----------------------------------
+#
+#
+#Imports
+from functools import lru_cache
+from importlib import import_module
+from inspect import Signature, signature
+from threading import Lock
+import os
+import pkgutil
+
+
+class PluginRegistry():
+
+    def __init__(self, package: str, plugin_package: str) -> None:
+        """
+            :param package: str - The package holding the plugin package (ex. 'Ingestion').
+            :param plugin_package: str - The package holding the plugin modules (ex. 'IngestionClasses').
+        """
+        self.package = package
+        self.plugin_package = plugin_package
+
+        self.__lock = Lock()
+        self.__classes: dict[str, type] = {}
+        self.__instances: dict[str, object] = {}
+        self.__available: list[str] | None = None
+
+
+    def get_class(self, key: str) -> type:
+        """ Returns the plugin class for a key, importing its module the first time.
+            :param key: str - The name of the plugin module and class.
+            :return type - The class.
+            :raises ModuleNotFoundError - If there is no plugin module named key.
+        """
+        plugin_class = self.__classes.get(key)
+        if plugin_class is not None: return plugin_class
+
+        try:
+            plugin_class = getattr(import_module(f'.{self.plugin_package}.{key}', self.package), key)
+        except ModuleNotFoundError as e:
+            raise ModuleNotFoundError(f'No module named {key} in {self.plugin_package}! Available: {self.available()}') from e
+        with self.__lock:
+            return self.__classes.setdefault(key, plugin_class)
+
+
+    def get_instance(self, key: str) -> object:
+        """ Returns an instance of the plugin class for a key. Stateless classes share one instance, the rest get a new one per call.
+            :param key: str - The name of the plugin module and class.
+            :return object - The instance.
+        """
+        instance = self.__instances.get(key)
+        if instance is not None: return instance
+
+        plugin_class = self.get_class(key)
+        if not getattr(plugin_class, 'STATELESS', False): return plugin_class()
+        with self.__lock:
+            return self.__instances.setdefault(key, plugin_class())
+
+
+    def available(self) -> list[str]:
+        """ Lists the plugin keys in the plugin package without importing any of them. The package is only scanned once.
+            :return list[str] - The plugin keys.
+        """
+        if self.__available is None:
+            paths = [os.path.join(path, self.plugin_package) for path in import_module(self.package).__path__]
+            self.__available = sorted(module.name for module in pkgutil.iter_modules(paths))
+        return self.__available
+
+
+@lru_cache(maxsize=None)
+def method_signature(plugin_class: type, method: str) -> Signature:
+    """ Returns the (cached) signature of a method of a plugin class.
+        :param plugin_class: type - The plugin class.
+        :param method: str - The method name (ex. 'post_process').
+        :return Signature - The signature of the unbound method, self included.
+    """
+    return signature(getattr(plugin_class, method))
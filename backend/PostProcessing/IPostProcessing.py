@@ -14,31 +14,57 @@ New data will be inserted into the DataFrame by reference
 #
 #Imports
 from abc import ABC, abstractmethod
-from importlib import import_module
+from datetime import datetime
 from pandas import DataFrame
+from PluginRegistry import PluginRegistry, method_signature
 
 
 
 class IPostProcessing(ABC):
 
+    # True for classes whose result depends on the whole index of the data frame, not only on the columns they read
+    # (ex. LinearInterpolation builds its grid from the first to the last timestamp). The planner never drops these.
+    USES_INDEX = False
+
+    # True for classes that keep no state on self between calls, one instance is then shared by every call
+    STATELESS = False
+
     @abstractmethod
     def post_process(self, data: DataFrame, **kwargs) -> DataFrame:
         raise NotImplementedError
     
+    def column_usage(self, **kwargs) -> tuple[list[str], list[str]] | None:
+        """Called with the same kwargs as post_process to plan a CSPEC, returns the columns the call reads and the columns it writes.
+        A column that is only partly overwritten is both read and written. By default it returns None (unknown),
+        a call with unknown usage is never dropped and is assumed to read every column."""
+        return None
+    
+
+# The PostProcessingClasses plugins, each module is imported the first time its key is used
+post_processing_registry = PluginRegistry('PostProcessing', 'PostProcessingClasses')
+
+
+def post_process_class(key: str) -> type[IPostProcessing]:
+    """ Returns the class of IPostProcessing for a key.
+        :param key: str - The string key that will be used to detect the correct module.
+        :returns type[IPostProcessing] - The class, named the same as its module.
+    """
+    return post_processing_registry.get_class(key)
+
 
-def post_process_factory(data: DataFrame, key: str, kwargs) -> DataFrame:
+def post_process_factory(data: DataFrame, key: str, kwargs, ref_time: datetime | None = None) -> DataFrame:
     """ Initiates a call to a class of IDataIngestion returning the result. The call is determined by a passed key, and arguments through the kwargs.
         :param data: DataFrame - A pre initialized data frame to insert collected data into
         :param key: str - The string key that will be used to detect the correct module.
         :kwargs: dict - The keyword args to pas to the resulting method. Make sure this is formatted as the targeted method wants.
+        :param ref_time: datetime | None - The reference time of the run. Only passed on to classes whose post_process takes a ref_time argument.
         :returns bool - True indicated the process succeeded while false indicated it failed for some reason. 
     """
 
+    post_processing_class: IPostProcessing = post_processing_registry.get_instance(key)
     try:
-        post_processing_class: IPostProcessing = getattr(import_module(f'.PostProcessingClasses.{key}', 'PostProcessing'), key)()
+        if ref_time is not None and 'ref_time' in method_signature(type(post_processing_class), 'post_process').parameters:
+            kwargs = {**kwargs, 'ref_time': ref_time}
         return post_processing_class.post_process(data, **kwargs)
-    except ModuleNotFoundError as e:
-        raise ModuleNotFoundError(f'No module named {key} in PostProcessingClasses!') from e
     except TypeError as e:
         raise TypeError(f'{e}.kwargs mismatch for key: {key} and kwargs: {kwargs}') from e
-    
\ No newline at end of file
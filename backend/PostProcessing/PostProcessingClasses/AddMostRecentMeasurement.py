@@ -11,12 +11,15 @@ The post-processing in this file adds the most recent measurement to the predict
 #
 # Imports
 from PostProcessing.IPostProcessing import IPostProcessing
-from pandas import DataFrame, isna
+from pandas import DataFrame, DatetimeIndex, to_datetime
 from datetime import datetime
+import numpy as np
 
 class AddMostRecentMeasurement(IPostProcessing):
-    
-    def post_process(self, data: DataFrame, measurement_col_key: str, prediction_col_key: str) -> DataFrame:
+
+    STATELESS = True
+
+    def post_process(self, data: DataFrame, measurement_col_key: str, prediction_col_key: str, ref_time: datetime | None = None) -> DataFrame:
         """
         Replaces the prediction value with the most recent measurement for the same date, 
         ensuring only one update is made.
@@ -25,40 +28,42 @@ class AddMostRecentMeasurement(IPostProcessing):
             data (DataFrame): The DataFrame containing the measurement, prediction, and date columns.
             measurement_col_key (str): The key for the measurement column.
             prediction_col_key (str): The key for the prediction column.
-            date_col_key (str): The key for the date column.
+            ref_time (datetime | None): The reference time of the run, passed in by the runner. Defaults to now.
 
         Returns:
-            DataFrame: A DataFrame with the prediction updated for the closest measurement to now.
+            DataFrame: A DataFrame with the prediction updated for the measurement closest to the reference time.
         """
-        
-        # Isolate the relevant series
-        s_measurement = data[measurement_col_key]
-        s_prediction = data[prediction_col_key]
-        s_date = data.index
-        # Get the current date
-        now = datetime.now()
 
-        # Find the row with the closest date to now and a non-NaN measurement
-        closest_index = None
-        closest_time_diff = None
-        for i in range(len(data)):
-            if not isna(s_measurement.iloc[i]):  # Only consider rows with valid measurements
-                row_date =s_date[i]  # Convert date string to datetime
-                if isinstance(row_date, str):  # In case the index values are strings
-                    row_date = datetime.strptime(row_date, '%Y-%m-%d %H:%M:%S') 
+        # The time to look around, the run's reference time so every step of a run agrees on "now"
+        now = ref_time if ref_time is not None else datetime.now()
 
-                
-                time_diff = abs((row_date - now).total_seconds())  # Calculate time difference in seconds
-                
-                if closest_time_diff is None or time_diff < closest_time_diff:
-                    closest_time_diff = time_diff
-                    closest_index = i
+        # Only rows with valid measurements are considered
+        valid = data[measurement_col_key].notna().to_numpy()
+        if not valid.any():
+            return data
 
-        # Update the prediction for the closest row
-        if closest_index is not None:
-            s_prediction.iloc[closest_index] = s_measurement.iloc[closest_index]
+        # In case the index values are strings
+        dates = data.index if isinstance(data.index, DatetimeIndex) else to_datetime(data.index, format='%Y-%m-%d %H:%M:%S')
+        valid_positions = np.flatnonzero(valid)
+        valid_dates = dates[valid_positions]
 
-        # Update the DataFrame with the modified prediction column
-        data[prediction_col_key] = s_prediction
+        # Find the row with the closest date to now and a non-NaN measurement
+        if valid_dates.is_monotonic_increasing:
+            # Only the valid measurements just before and just after now can be the closest
+            after = valid_dates.searchsorted(now)
+            candidates = [i for i in (after - 1, after) if 0 <= i < len(valid_dates)]
+            distances = [abs(valid_dates[i] - now) for i in candidates]
+            closest = candidates[distances.index(min(distances))] # Ties go to the earlier row
+        else:
+            closest = int(np.argmin(np.abs((valid_dates - now).to_numpy())))
+        closest_index = valid_positions[closest]
+
+        # Update the prediction for the closest row
+        data.iloc[closest_index, data.columns.get_loc(prediction_col_key)] = data[measurement_col_key].iloc[closest_index]
 
         return data
+
+
+    def column_usage(self, measurement_col_key: str, prediction_col_key: str) -> tuple[list[str], list[str]]:
+        # Only one value of the prediction is replaced, so it is read as well
+        return [measurement_col_key, prediction_col_key], [prediction_col_key]
@@ -18,6 +18,8 @@ from pandas import DataFrame
 
 class ArithmeticOperation(IPostProcessing):
 
+    STATELESS = True
+
     def post_process(self, data: DataFrame, op: str, left_col_key: str, right_col_key: str, out_col_key: str) -> DataFrame:
         """The post processing in this file preforms a set-wise arithmetic operation columns in a data frame.
         By the index of the data frame!
@@ -67,4 +69,8 @@ class ArithmeticOperation(IPostProcessing):
             case _:
                 raise NotImplementedError(f'{op} not found in ArithmeticOperation class')
 
-        return data
\ No newline at end of file
+        return data
+
+
+    def column_usage(self, op: str, left_col_key: str, right_col_key: str, out_col_key: str) -> tuple[list[str], list[str]]:
+        return [left_col_key, right_col_key], [out_col_key]
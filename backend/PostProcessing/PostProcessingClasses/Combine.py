@@ -4,26 +4,34 @@
 # Created By : Matthew Kastl
 #-------------------------------
 """ The post processing in this file preforms combines two columns together. If there are non Nan values
-on the same index it will always prefer the left value.
+on the same index it will always prefer the left value. Any number of columns can be combined, in order of preference.
  """ 
 #-------------------------------
 # 
 #
 #Imports
 from PostProcessing.IPostProcessing import IPostProcessing
-from pandas import DataFrame, isna
+from pandas import DataFrame, Series
+from Ensemble import EnsembleArray, EnsembleDtype, to_member_matrix
+import numpy as np
 
 
 class Combine(IPostProcessing):
 
-    def post_process(self, data: DataFrame, left_col_key: str, right_col_key: str) -> DataFrame:
+    STATELESS = True
+
+    def post_process(self, data: DataFrame, left_col_key: str = None, right_col_key: str = None, col_keys: list[str] = None, out_col_key: str = None) -> DataFrame:
         """The post processing in this file preforms combines two columns together. If there are non Nan values
         on the same index it will always prefer the left value.
+        Any number of columns can be combined by passing col_keys instead, the first non Nan value (in the order of
+        col_keys) wins. Ensemble (list valued) cells are taken whole, they are never mixed member by member.
 
         Args:
             data DataFrame: The DataFrame containing this collation of the data that has been collected.
             left_col_key - The key the column that will be on the left side of the operation.
             right_col_key - The key for the column on the right side of the operation.
+            col_keys - The keys of the columns to combine, most preferred first. Used instead of left_col_key and right_col_key.
+            out_col_key - The key to save the combined column under, defaults to the first (left) column.
 
         Returns:
             DataFrame : A new dataframe obj might have to be created, this will always be a reference to the most updated version.
@@ -38,14 +46,62 @@ class Combine(IPostProcessing):
                     "right_col_key": "",
                 }
             },
+            {
+                "key": "Combine",
+                "args": {
+                    "col_keys": ["", "", ""],
+                    "out_col_key": ""
+                }
+            },
         """
+        col_keys = self.resolve_col_keys(left_col_key, right_col_key, col_keys)
+
         # Isolate the series
-        s_left = data[left_col_key]
-        s_right = data[right_col_key]
+        columns = [data[key] for key in col_keys]
+
+        # Ensemble cells are combined as whole rows of the member matrix, everything else (including list cells) value by value
+        if any(isinstance(column.dtype, EnsembleDtype) for column in columns):
+            combined = self.__coalesce_ensembles(columns)
+        else:
+            combined = columns[0]
+            for column in columns[1:]:
+                # Prefer what we have, unless its nan, then take the next column
+                combined = combined.where(combined.notna(), column)
+
+        # Write the combined data to the output (by default the left) column name
+        data[out_col_key or col_keys[0]] = combined
+
+        return data
+
+
+    def column_usage(self, left_col_key: str = None, right_col_key: str = None, col_keys: list[str] = None, out_col_key: str = None) -> tuple[list[str], list[str]]:
+        col_keys = self.resolve_col_keys(left_col_key, right_col_key, col_keys)
+        return col_keys, [out_col_key or col_keys[0]]
+
+
+    def resolve_col_keys(self, left_col_key: str | None, right_col_key: str | None, col_keys: list[str] | None) -> list[str]:
+        """Returns the columns to combine in order of preference, from either left_col_key and right_col_key or col_keys."""
+        if col_keys is None:
+            if left_col_key is None or right_col_key is None:
+                raise TypeError('Combine needs either left_col_key and right_col_key, or col_keys')
+            col_keys = [left_col_key, right_col_key]
+        elif left_col_key is not None or right_col_key is not None:
+            raise TypeError('Combine takes either left_col_key and right_col_key, or col_keys, not both')
+        if len(col_keys) == 0:
+            raise ValueError('Combine needs at least one column to combine')
+        return col_keys
+    
 
-        # A method that will prefer the left value, unless its nan, then it will take the right
-        prefer_left = lambda left, right: (right if isna(left) else left)
+    def __coalesce_ensembles(self, columns: list[Series]) -> EnsembleArray:
+        """ Takes each row from the first column that has any member in it. Plain columns are one member rows."""
+        matrices = [to_member_matrix(column) for column in columns]
+        width = max(matrix.shape[1] for matrix in matrices)
+        dtype = next((column.dtype for column in columns if isinstance(column.dtype, EnsembleDtype)), EnsembleDtype())
 
-        # Combine the data with the above rule and write it to the left column name
-        data[left_col_key] = s_left.combine(s_right, prefer_left)
-        return data
\ No newline at end of file
+        combined = np.full((len(columns[0]), width), np.nan, dtype=dtype.subtype)
+        missing = np.ones(len(columns[0]), dtype=bool)
+        for matrix in matrices:
+            take = missing & ~np.isnan(matrix).all(axis=1)
+            combined[take, :matrix.shape[1]] = matrix[take]
+            missing &= ~take
+        return EnsembleArray(combined, dtype)
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+#Expression.py
+#-------------------------------
+# Created By: Flare Team
+#-------------------------------
+""" This file is a postprocessing class under the IPostProcessing interface.
+The post processing in this file evaluates an arithmetic expression over the columns of a data frame, saving the
+result as a single new column. A formula that would need a chain of ArithmeticOperation and ImmediateArithmeticOperation
+steps (ex. datum shift, unit conversion, then scaling) is done in one step, without any intermediate columns.
+By the index of the data frame!
+ """
+#-------------------------------
+#
+#
+#Imports
+from PostProcessing.IPostProcessing import IPostProcessing
+from pandas import DataFrame
+from functools import lru_cache
+from typing import Callable
+import numpy as np
+import ast
+import re
+
+
+class Expression(IPostProcessing):
+
+    STATELESS = True
+
+    def post_process(self, data: DataFrame, expression: str, out_col_key: str) -> DataFrame:
+        """The post processing in this file evaluates an arithmetic expression over the columns of a data frame.
+        By the index of the data frame!
+
+        Args:
+            data DataFrame: The DataFrame containing this collation of the data that has been collected.
+            expression - The expression to evaluate (ex. "(`Water Level` - 0.3) * 3.28084").
+            out_col_key - The key to save the column under.
+
+        Returns:
+            DataFrame : A new dataframe obj might have to be created, this will always be a reference to the most updated version.
+
+        NOTE::
+        Columns are referenced by name, names that are not valid identifiers are wrapped in backticks (ex. `Water Level`).
+        The expression can use numbers, True, False, nan, and:
+            arithmetic:  + - * / % ** and unary -
+            comparisons: < <= > >= == != (chains like 0 < `a` < 1 work)
+            logic:       and, or, not (element wise)
+            functions:   where(condition, if_true, if_false), clip(value, lower, upper), min(a, b, ...), max(a, b, ...), abs(value)
+        Nan propagates through arithmetic, min, and max. Comparisons with nan are False, the same as pandas.
+        A nan condition in where gives nan (it is neither true nor false). Names starting with __column_ are reserved, quote such a column.
+
+        JSON Call :
+            {
+                "key": "Expression",
+                "args": {
+                    "expression": "",
+                    "out_col_key": ""
+                }
+            },
+        """
+        evaluate = compile_expression(expression)
+
+        # Each column is read once, no matter how many times it is used
+        columns: dict[str, np.ndarray] = {}
+        def column(name: str) -> np.ndarray:
+            if name not in columns:
+                if name not in data.columns:
+                    raise KeyError(f'Column {name} used in expression {expression} not found in data!')
+                columns[name] = data[name].to_numpy(dtype=float, na_value=np.nan)
+            return columns[name]
+
+        with np.errstate(all='ignore'): # Division by zero and the like give inf/nan, the same as pandas
+            result = evaluate(column)
+
+        data[out_col_key] = np.broadcast_to(result, len(data.index)).copy() if np.ndim(result) == 0 else result
+        return data
+
+
+    def column_usage(self, expression: str, out_col_key: str) -> tuple[list[str], list[str]]:
+        return list(compile_expression(expression).columns), [out_col_key]
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expression: str) -> Callable[[Callable[[str], np.ndarray]], np.ndarray]:
+    """ Parses and validates an expression once, returning a function that evaluates it.
+        :param expression: str - The expression, see Expression.post_process for the syntax.
+        :return Callable - Takes a function returning the values of a column by name, returns the result of the expression.
+        :raises ValueError - If the expression is not valid or uses anything that is not allowed.
+    """
+    # Backticked names become placeholder identifiers so the rest can be parsed as python
+    if re.search(r'\b__column_', re.sub(r'`[^`]*`', '', expression)):
+        raise ValueError(f'Invalid expression {expression}: names starting with __column_ are reserved, wrap the column name in backticks')
+    quoted: list[str] = []
+    def quote(match: re.Match) -> str:
+        quoted.append(match.group(1))
+        return f'__column_{len(quoted) - 1}'
+    source = re.sub(r'`([^`]*)`', quote, expression)
+
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f'Invalid expression {expression}: {e.msg}') from e
+
+    compiler = _Compiler(expression, quoted)
+    evaluate = compiler.compile(tree.body)
+    evaluate.columns = tuple(dict.fromkeys(compiler.columns)) # The columns read, in order of first use
+    return evaluate
+
+
+class _Compiler():
+    """ Turns an expression tree into nested closures over numpy operations."""
+
+    BINARY_OPERATORS = {
+        ast.Add: np.add,
+        ast.Sub: np.subtract,
+        ast.Mult: np.multiply,
+        ast.Div: np.true_divide,
+        ast.Mod: np.remainder,
+        ast.Pow: np.power,
+    }
+
+    COMPARISONS = {
+        ast.Lt: np.less,
+        ast.LtE: np.less_equal,
+        ast.Gt: np.greater,
+        ast.GtE: np.greater_equal,
+        ast.Eq: np.equal,
+        ast.NotEq: np.not_equal,
+    }
+
+    CONSTANTS = {'nan': np.nan, 'inf': np.inf}
+
+    def __init__(self, expression: str, quoted: list[str]) -> None:
+        self.expression = expression
+        self.quoted = quoted
+        self.columns: list[str] = []
+
+
+    def compile(self, node: ast.AST) -> Callable:
+        match node:
+            case ast.Constant(value=value) if isinstance(value, (bool, int, float)):
+                return lambda column: value
+            case ast.Name(id=name):
+                if name in self.CONSTANTS:
+                    value = self.CONSTANTS[name]
+                    return lambda column: value
+                if name.startswith('__column_'):
+                    name = self.quoted[int(name.removeprefix('__column_'))]
+                self.columns.append(name)
+                return lambda column: column(name)
+            case ast.BinOp(op=op, left=left, right=right) if type(op) in self.BINARY_OPERATORS:
+                return self.__binary(self.BINARY_OPERATORS[type(op)], self.compile(left), self.compile(right))
+            case ast.UnaryOp(op=ast.USub(), operand=operand):
+                inner = self.compile(operand)
+                negative = lambda column: np.negative(inner(column))
+                negative.fresh = True
+                return negative
+            case ast.UnaryOp(op=ast.UAdd(), operand=operand):
+                return self.compile(operand)
+            case ast.UnaryOp(op=ast.Not(), operand=operand):
+                inner = self.compile(operand)
+                return lambda column: np.logical_not(inner(column))
+            case ast.BoolOp(op=op, values=values):
+                function = np.logical_and if isinstance(op, ast.And) else np.logical_or
+                return self.__reduce(function, [self.compile(value) for value in values])
+            case ast.Compare(left=left, ops=ops, comparators=comparators) if all(type(op) in self.COMPARISONS for op in ops):
+                # a < b < c is (a < b) and (b < c), each operand is still only evaluated once
+                operands = [self.compile(left)] + [self.compile(comparator) for comparator in comparators]
+                functions = [self.COMPARISONS[type(op)] for op in ops]
+                def compare(column):
+                    values = [operand(column) for operand in operands]
+                    result = functions[0](values[0], values[1])
+                    for i in range(1, len(functions)):
+                        result = np.logical_and(result, functions[i](values[i], values[i + 1]))
+                    return result
+                return compare
+            case ast.Call(func=ast.Name(id=name), args=args, keywords=[]):
+                return self.__call(name, [self.compile(arg) for arg in args])
+        raise ValueError(f'Invalid expression {self.expression}: {ast.unparse(node)} is not allowed')
+
+
+    def __call(self, name: str, args: list[Callable]) -> Callable:
+        match name, len(args):
+            case 'where', 3:
+                condition, if_true, if_false = args
+                def where(column):
+                    values = condition(column)
+                    result = np.where(values, if_true(column), if_false(column))
+                    # nan is truthy to numpy, a missing condition gives a missing result instead
+                    if np.asarray(values).dtype.kind == 'f':
+                        result = np.where(np.isnan(values), np.nan, result)
+                    return result
+                return where
+            case 'clip', 3:
+                value, lower, upper = args
+                return lambda column: np.minimum(np.maximum(value(column), lower(column)), upper(column))
+            case 'abs', 1:
+                value, = args
+                return lambda column: np.abs(value(column))
+            case 'min', count if count >= 2:
+                return self.__reduce(np.minimum, args)
+            case 'max', count if count >= 2:
+                return self.__reduce(np.maximum, args)
+        raise ValueError(f'Invalid expression {self.expression}: {name} with {len(args)} arguments is not allowed')
+
+
+    def __binary(self, function: np.ufunc, left: Callable, right: Callable) -> Callable:
+        # The result of another operation is not shared with anything, so it can be overwritten with this result.
+        # Columns are never overwritten, they may be views of the data frame.
+        scratch = 0 if getattr(left, 'fresh', False) else 1 if getattr(right, 'fresh', False) else None
+        def binary(column):
+            values = left(column), right(column)
+            out = values[scratch] if scratch is not None else None
+            if isinstance(out, np.ndarray) and out.dtype == np.float64 and out.shape == np.broadcast_shapes(*map(np.shape, values)):
+                return function(*values, out=out)
+            return function(*values)
+        binary.fresh = True
+        return binary
+
+
+    def __reduce(self, function: np.ufunc, args: list[Callable]) -> Callable:
+        def reduce(column):
+            result = args[0](column)
+            for arg in args[1:]:
+                result = function(result, arg(column))
+            return result
+        return reduce
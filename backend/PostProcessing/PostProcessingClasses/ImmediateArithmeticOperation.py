@@ -18,6 +18,8 @@ from pandas import DataFrame
 
 class ImmediateArithmeticOperation(IPostProcessing):
 
+    STATELESS = True
+
     def post_process(self, data: DataFrame, op: str, left_col_key: str, value: float, out_col_key: str) -> DataFrame:
         """The post processing in this file preforms an arithmetic operation on columns in a data frame by a constant.
         By the index of the data frame!
@@ -68,3 +70,6 @@ class ImmediateArithmeticOperation(IPostProcessing):
 
         return data
 
+
+    def column_usage(self, op: str, left_col_key: str, value: float, out_col_key: str) -> tuple[list[str], list[str]]:
+        return [left_col_key], [out_col_key]
@@ -5,7 +5,8 @@
 # Last Updated: 09/16/2025
 #-------------------------------
 """
-The post processing in this file performs linear interpolation of a column.
+The post processing in this file performs linear interpolation of a column, or of several columns at once.
+Ensemble (list valued) columns are interpolated member by member.
 """ 
 #-------------------------------
 # 
@@ -16,34 +17,40 @@ from pandas import DataFrame, date_range
 import numpy as np
 import pandas as pd
 from datetime import timedelta
-import logging
+from Ensemble import EnsembleArray, EnsembleDtype, to_member_matrix
 
 class LinearInterpolation(IPostProcessing):
 
-    # Dummy values used to mark to large time gaps that should not be interpolated
-    DUMMY_VALUE = -9999
+    STATELESS = True
 
-    def post_process(self, df: DataFrame, col_name: str, interpolation_interval: int, limit: int) -> DataFrame:
-        """The post processing in this file performs a linear interpolation of a column.
+    # The interpolation grid runs from the first to the last timestamp of the whole data frame
+    USES_INDEX = True
+
+    def post_process(self, df: DataFrame, col_name: str | list[str], interpolation_interval: int, limit: int | dict[str, int]) -> DataFrame:
+        """The post processing in this file performs a linear interpolation of a column, or of several columns at once.
 
         Args:
             df: DataFrame: The DataFrame containing the data we want to interpolate.
-            col_name: str - The column in the DataFrame to interpolate.
+            col_name: str | list[str] - The column(s) in the DataFrame to interpolate.
             interpolation_interval: int - The interval to interpolate data on, in seconds.
-            limit: int - The amount of time between 2 real values that will be interpolated, in seconds.
+            limit: int | dict[str, int] - The amount of time between 2 real values that will be interpolated, in seconds.
+                Either one limit for every column, or a map of column name to its own limit.
 
         Returns:
             DataFrame : A new dataframe obj might have to be created, this will always be a reference to the most updated version.
 
         NOTE::This function actually uses time based interpolation which is the same as linear interpolation.
+        NOTE::Ensemble (list valued) columns are interpolated member by member, with the same limit for every member.
+        NOTE::Interpolating several columns in one call gives the same result as one call per column (in the same order),
+        but the target grid is built and aligned once and all the columns are interpolated as one block.
 
         JSON Call:
         {
             "key": "LinearInterpolation",
             "args": {
-                "col_name": "",
+                "col_name": "",                 # OR ["", ""]
                 "interpolation_interval": -1,
-                "limit": -1
+                "limit": -1                     # OR {"": -1, "": -1}
             }
         },
         """
@@ -51,12 +58,15 @@ class LinearInterpolation(IPostProcessing):
         # Validate the arguments passed to the post_process method
         self.validate_args(df, col_name, interpolation_interval, limit)
 
-        # A limit of 0 is a special case that will not interpolate any data, but will return the original DataFrame.
-        if limit == 0:
-            return df
+        # Normalize to one limit per column
+        col_names = [col_name] if isinstance(col_name, str) else col_name
+        limits = {name: limit[name] if isinstance(limit, dict) else limit for name in col_names}
 
-        # Create a copy to avoid modifying the input parameter
-        df = df.copy()
+        # A limit of 0 is a special case that will not interpolate the column.
+        # When no column is interpolated the original DataFrame is returned.
+        col_names = [name for name in col_names if limits[name] != 0]
+        if not col_names:
+            return df
 
         # Build a uniform interval index because the original index may be irregular
         target_interval_index = date_range(
@@ -64,37 +74,59 @@ class LinearInterpolation(IPostProcessing):
             end=df.index[-1],
             freq=timedelta(seconds=interpolation_interval)
         )
-        
-        # make a union of the original index and the target interval index
-        combined_index = df.index.union(target_interval_index)
 
-        # Reindex the DataFrame to include the new and original indices
-        # This will insert NaNs into the DataFrame 
-        df = df.reindex(combined_index)
-
-        # isolate the series we are looking at
-        data_series = df[col_name]
-
-        # Mask large gaps with dummy values
-        masked_data_series = self.fill_large_gaps(data_series, limit)
+        # Reindex once to the union of the original index and the target interval index
+        # This will insert NaNs into the DataFrame at the new timestamps
+        df = df.reindex(df.index.union(target_interval_index))
+
+        # Seconds since the first timestamp, interpolation is based on time not position
+        # The values themselves are interpolated over the integer timestamps, the same x pandas passes to np.interp
+        seconds = np.asarray((df.index - df.index[0]) / timedelta(seconds=1), dtype=float)
+        positions = df.index.asi8.astype(float)
+
+        # Every column becomes a time x members matrix, one member for a plain column and one per member for an ensemble
+        columns = [df.pop(name) for name in col_names]
+        is_ensemble = [self.is_ensemble(column) for column in columns]
+        matrices = [to_member_matrix(column) for column in columns]
+
+        # Interpolate the small gaps of every column (and member) as one block, each column keeps its own limit
+        # Large gaps and values outside of the real values are left as NaN
+        block = np.hstack(matrices).astype(float)
+        block_limits = np.concatenate([np.full(matrix.shape[1], limits[name]) for name, matrix in zip(col_names, matrices)])
+        interpolated = self.interpolate_block(seconds, block, block_limits, positions)
+
+        # Only keep the values that land on the requested interval
+        interpolated[~df.index.isin(target_interval_index)] = np.nan
+
+        # Replace the original columns in the DataFrame, they end up as the last columns
+        start = 0
+        for name, column, matrix, ensemble in zip(col_names, columns, matrices, is_ensemble):
+            values = interpolated[:, start:start + matrix.shape[1]]
+            start += matrix.shape[1]
+            if ensemble:
+                dtype = column.dtype if isinstance(column.dtype, EnsembleDtype) else None
+                df[name] = EnsembleArray(values, dtype)
+            else:
+                df[name] = values[:, 0]
 
-        # Interpolate small gaps only
-        interpolated_data_series = masked_data_series.interpolate(limit_area="inside", method="time")
+        return df
 
-        # Replace dummy values with NaN
-        interpolated_data_series.loc[interpolated_data_series == self.DUMMY_VALUE] = np.nan
 
-        # Reindex the data to only return the requested interval
-        final_data_series = interpolated_data_series.reindex(date_range(start=interpolated_data_series.index[0], end=interpolated_data_series.index[-1], freq=timedelta(seconds=interpolation_interval)))
+    def column_usage(self, col_name: str | list[str], interpolation_interval: int, limit: int | dict[str, int]) -> tuple[list[str], list[str]]:
+        col_names = col_name if isinstance(col_name, list) else [col_name]
+        return col_names, col_names
+    
 
-        # Replace the original column in the DataFrame
-        df.drop(columns=[col_name], inplace=True)
-        df = df.join(final_data_series, how="outer")
+    def is_ensemble(self, column: pd.Series) -> bool:
+        """
+        An ensemble column, or an older list in cell column. Object columns of plain numbers (ex. with None for missing values) are not.
+        """
+        if isinstance(column.dtype, EnsembleDtype): return True
+        if column.dtype.kind in 'fiub': return False
+        return any(isinstance(value, (list, tuple, np.ndarray)) for value in column)
 
-        return df
-    
 
-    def validate_args(self, df: DataFrame, col_name: str, interpolation_interval: int, limit: int):
+    def validate_args(self, df: DataFrame, col_name: str | list[str], interpolation_interval: int, limit: int | dict[str, int]):
         """
         This method validates the arguments passed to the post_process method.
 
@@ -114,13 +146,20 @@ class LinearInterpolation(IPostProcessing):
         if not isinstance(df.index, pd.DatetimeIndex):
             raise TypeError("[ERROR]:: DataFrame must have a DatetimeIndex for time-based interpolation.")
         
-        # col_name must be a string
-        if not isinstance(col_name, str):
-            raise TypeError(f"[ERROR]:: Column name must be a string, got {type(col_name)} instead.")
+        # col_name must be a string or a non empty list of strings
+        col_names = col_name if isinstance(col_name, list) else [col_name]
+        if not col_names:
+            raise ValueError("[ERROR]:: At least one column name is required.")
+        for name in col_names:
+            if not isinstance(name, str):
+                raise TypeError(f"[ERROR]:: Column name must be a string, got {type(name)} instead.")
         
-        # col_name must be a valid column in the DataFrame
-        if col_name not in df.columns:
-            raise KeyError(f"Column '{col_name}' not found. Available columns: {df.columns.tolist()}")
+            # col_name must be a valid column in the DataFrame
+            if name not in df.columns:
+                raise KeyError(f"Column '{name}' not found. Available columns: {df.columns.tolist()}")
+
+        if len(set(col_names)) != len(col_names):
+            raise ValueError(f"[ERROR]:: Column names must be unique, got {col_names}.")
         
         # interpolation_interval must be a positive integer
         if not isinstance(interpolation_interval, int):
@@ -130,81 +169,64 @@ class LinearInterpolation(IPostProcessing):
         if interpolation_interval <= 0:
             raise ValueError(f"[ERROR]:: Interpolation interval must be greater than 0, got {interpolation_interval} instead.")
         
-        # limit must be an integer
-        if not isinstance(limit, int):
-            raise TypeError(f"[ERROR]:: Limit must be an integer, got {type(limit)} instead.")
-        
-        # limit must be greater than or equal to 0.
-        # A limit of 0 is a special case that will not interpolate any data, but will return the original DataFrame.
-        if limit < 0:
-            raise ValueError(f"[ERROR]:: Limit must be greater than or equal to 0, got {limit} instead.")
-
-
-    def fill_large_gaps(self, data_series: pd.Series, limit: int) -> pd.Series:
-        """ 
-        This method is used to find the time gaps whose difference is larger than the limit.
-        That is, if the time difference (in seconds) is > limit, the time between 2 real values is too long
-        and we will not interpolate the values in between. Instead, we will replace the NaN values in large
-        time gaps with a dummy value to mark them as invalid for interpolation.
-        This will leave time gaps <= limit as NaN, and time gaps > limit will be replaced with the dummy value.
-        
-        Args:
-            data_series: pd.Series - The series of data to find gaps in.
-            limit: int - The maximum number of seconds between 2 real values that will be interpolated.
+        # a limit map must have a limit for exactly the columns being interpolated
+        if isinstance(limit, dict):
+            if set(limit) != set(col_names):
+                raise KeyError(f"[ERROR]:: Limit map must have one limit per column, got {list(limit)} for columns {col_names}.")
+            limits = list(limit.values())
+        else:
+            limits = [limit]
+
+        for value in limits:
+            # limit must be an integer
+            if not isinstance(value, int):
+                raise TypeError(f"[ERROR]:: Limit must be an integer, got {type(value)} instead.")
+            
+            # limit must be greater than or equal to 0.
+            # A limit of 0 is a special case that will not interpolate any data, but will return the original DataFrame.
+            if value < 0:
+                raise ValueError(f"[ERROR]:: Limit must be greater than or equal to 0, got {value} instead.")
 
-        Returns:
-            pd.Series : A new series with dummy values in place of long time gaps and with NaNs left in place for small time gaps.
-        
-        """
 
-        # Create a copy to avoid modifying the input parameter
-        data_series = data_series.copy()
+    def interpolate_block(self, seconds: np.ndarray, block: np.ndarray, limits: np.ndarray, positions: np.ndarray | None = None) -> np.ndarray:
+        """
+        Linearly interpolates (in time) every column of a 2-D block at once.
+        A NaN is only filled when it is between 2 real values of its column that are at most that column's limit apart.
+        NaNs before the first and after the last real value are never filled.
 
-        # initialize variables 
-        previous_real_value_index = None               # holds the index of the previous real value before a gap
-        next_real_value_index = None                   # holds the index of the next real value after a gap
-        i = 0                                          # iterator
+        Args:
+            seconds: np.ndarray - The time of every row, in seconds. Must be increasing.
+            block: np.ndarray - A time x columns block of values, NaN where there is no value.
+            limits: np.ndarray - The limit (seconds) of each column.
+            positions: np.ndarray | None - The x of every row the values are interpolated over, defaults to seconds.
+                Pass the integer timestamps for results identical to Series.interpolate(method='time').
 
-        # iterate over the data series
-        while i < len(data_series):
-            
-            # when a NaN is found...
-            if pd.isna(data_series.iloc[i]):
-                
-                # ...move back 1 to find the previous real value
-                if i > 0 and not pd.isna(data_series.iloc[i - 1]):
-                    previous_real_value_index = i - 1
-                else:
-                    # if the series starts with NaNs, there is no previous real value
-                    i = i + 1
-                    continue
-
-                # from the first NaN, continue to iterate until a real value is found
-                while i < len(data_series) and pd.isna(data_series.iloc[i]):
-                    i = i + 1
-                
-                # mark the end of a NaN gap (holds a real value)
-                next_real_value_index = i
-
-                # this handles the case where the series ends with NaNs
-                # and also prevents index out of range errors
-                if next_real_value_index >= len(data_series):
-                    # Mark all trailing NaNs AFTER THE REAL VALUE as dummy values since there's no next real value
-                    data_series.iloc[previous_real_value_index + 1: ] = self.DUMMY_VALUE
-                    break
-
-                # calculate how many seconds are between the previous and next real values
-                time_difference = data_series.index[next_real_value_index] - data_series.index[previous_real_value_index]
-                time_difference_seconds = time_difference.total_seconds()
-
-                # if the time difference is larger than the limit, replace the NaNs in between with the dummy value
-                # we add 1 to the previous index to avoid replacing the real value at previous_real_value_index
-                if time_difference_seconds > limit:
-                    data_series.iloc[previous_real_value_index + 1 : next_real_value_index] = self.DUMMY_VALUE
-                
-            else:
-                i = i + 1
-        # end while loop
-        
-        # return the modified copy with dummy values in place of large NaN gaps
-        return data_series
\ No newline at end of file
+        Returns:
+            np.ndarray : A new block with the small gaps filled.
+        """
+        rows = np.arange(block.shape[0])[:, None]
+        valid = ~np.isnan(block)
+
+        # The position of the previous and next real value of every cell, -1 / len when there is none
+        previous = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+        following = np.minimum.accumulate(np.where(valid, rows, block.shape[0])[::-1], axis=0)[::-1]
+
+        # Only gaps that have a real value on both sides and span no more than the limit are filled
+        fillable = ~valid & (previous >= 0) & (following < block.shape[0])
+        previous, following = np.where(fillable, previous, 0), np.where(fillable, following, 0)
+        span = seconds[following] - seconds[previous]
+        fillable &= span <= limits
+
+        # The same arithmetic, in the same order, as np.interp (what pandas uses for time interpolation)
+        x = seconds if positions is None else positions
+        columns = np.arange(block.shape[1])
+        start, end = block[previous, columns], block[following, columns]
+        x_start, x_end = x[previous], x[following]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            slope = (end - start) / (x_end - x_start)
+            filled = slope * (x[:, None] - x_start) + start
+            # np.interp tries from the other end when one gives NaN (ex. infinite values), then falls back to a flat segment
+            filled = np.where(np.isnan(filled), slope * (x[:, None] - x_end) + end, filled)
+            filled = np.where(np.isnan(filled) & (start == end), start, filled)
+
+        return np.where(fillable, filled, block)
@@ -7,34 +7,40 @@
 """
 This file is a postprocessing class under the IPostProcessing interface.
 
-This class calculates a specified percentile for a column where each cell contains a list of values.
-It then creates a new column showing the computed percentile value per row.
+This class calculates one or more percentiles for a column where each cell contains a list of values.
+It then creates a new column showing the computed percentile value per row, for each percentile.
 """
 # -------------------------------
 
 # imports
 from PostProcessing.IPostProcessing import IPostProcessing  
-from pandas import DataFrame                               
+from pandas import DataFrame, concat
+from Ensemble import sorted_members
 import numpy as np                                          
 
 
 class Percentile(IPostProcessing):
 
-    def post_process(self, df: DataFrame, col_key: str, percentile: int, output_col_key: str) -> DataFrame:
+    STATELESS = True
+
+    def post_process(self, df: DataFrame, col_key: str, percentile: int | list[int], output_col_key: str | list[str]) -> DataFrame:
         """
         This method creates a new column for the percentile value of a specified column in the DataFrame.
+        Several percentiles can be requested at once, they are all computed from one sort of the members.
         
-        The computed percentile value is NaN if the input list is empty or not a list.
+        A cell holding a single number is one member, so every percentile of it is the number itself.
+        The computed percentile value is NaN if the cell is missing or its list is empty.
+        Missing (NaN) members are ignored, the same as np.nanpercentile with linear interpolation.
 
         Args:
             df (DataFrame): The DataFrame containing the collected data.
             col_key (str): The column name to calculate the percentiles from.
-            percentile (int): The requested percentile to calculate. 
+            percentile (int | list[int]): The requested percentile(s) to calculate. 
                 The percentile is in percentage form, so the value must be an integer between 0-100.
-            output_col_key (str): The base name for the output column.
+            output_col_key (str | list[str]): The name for the output column, or one name per percentile.
 
         Returns:
-            DataFrame : The dataframe with the added percentile value column.
+            DataFrame : The dataframe with the added percentile value column(s).
 
         JSON Call:
         {
@@ -44,58 +50,94 @@ class Percentile(IPostProcessing):
                 "percentile": 5,         # the percentile to compute, for example 5 for the 5th percentile
                 "output_col_key": ""     # the base name for the output columns
             }
-        },  
+        },
+        {
+            "key": "Percentile",
+            "args": {
+                "col_key": "",
+                "percentile": [5, 95],                 # several percentiles in one pass
+                "output_col_key": ["", ""]             # one output column per percentile
+            }
+        },
         """
 
-        # make a copy of the data to prevent changing the original data frame 
-        df = df.copy()
-
         # validate the input column 
         if col_key not in df.columns:
             raise KeyError(f"Column '{col_key}' not found. Available columns: {df.columns.tolist()}")
-        
+
+        # the single value form is a list of one
+        percentiles = percentile if isinstance(percentile, list) else [percentile]
+        output_col_keys = output_col_key if isinstance(output_col_key, list) else [output_col_key]
+        if len(percentiles) != len(output_col_keys):
+            raise ValueError(f"Got {len(percentiles)} percentiles but {len(output_col_keys)} output column keys, there must be one output column key per percentile.")
+
+        percentiles = [self.validate_percentile(p) for p in percentiles]
+
+        # sort the members of every row once, missing members sort to the end
+        # for ensemble columns the sort is shared with any other step on the same column (ex. RowStatistics)
+        ordered, counts = sorted_members(df[col_key])
+        values = self.calculate(ordered, counts, percentiles)
+
+        # add the percentile value columns all at once, inserting them one at a time fragments the frame
+        # keys that are already columns are replaced where they are
+        new_columns = DataFrame({f"{output_key}": column for output_key, column in zip(output_col_keys, values)}, index=df.index)
+        existing = [key for key in new_columns.columns if key in df.columns]
+        for key in existing:
+            df[key] = new_columns[key]
+        df = concat([df, new_columns.drop(columns=existing)], axis=1)
+
+        # return the data frame with the added column(s)
+        return df
+
+
+    def column_usage(self, col_key: str, percentile: int | list[int], output_col_key: str | list[str]) -> tuple[list[str], list[str]]:
+        return [col_key], output_col_key if isinstance(output_col_key, list) else [output_col_key]
+
+
+    def validate_percentile(self, percentile) -> int:
+        """
+        Casts a percentile to an integer and checks it is between 0 and 100.
+
+        Raises:
+            ValueError: if the percentile is not an integer or is out of range.
+        """
         # try to cast the input into an integer
         # this will raise a ValueError if the input is not an integer
         try:
-            percentile = int(percentile)
+            value = int(percentile)
         except (ValueError, TypeError):
             raise ValueError(f"Percentile '{percentile}' must be an integer.")
 
         # now validate the integers range
-        if not 0 <= percentile <= 100:
-            raise ValueError(f"Percentile '{percentile}' is not in a valid range. Must be between 0 and 100.")
-
-        
-        def calc_percentile(values):
-            """
-            calc_percentile method
-
-            calculates the percentile value for a list of values in a row
+        if not 0 <= value <= 100:
+            raise ValueError(f"Percentile '{value}' is not in a valid range. Must be between 0 and 100.")
+        return value
 
-            runs for each row in the data frame
-            
-            Args:
-                values (list): A list of numerical values from the specified column.
 
-            Returns:
-                float: The computed percentile value for the list of values.
-                NaN: if the list is empty or not a list.
-            """
-
-            # if 'values' is an empty list or not a list, return NaN
-            if not isinstance(values, (list, tuple, np.ndarray)) or len(values) == 0:
-                return np.nan
-
-            # cast to a float array
-            arr = np.array(values, dtype=float)
+    def calculate(self, ordered: np.ndarray, counts: np.ndarray, percentiles: list[int]) -> np.ndarray:
+        """
+        Calculates percentiles of every row from the sorted members.
 
-            # nanpercentile will ignore NaNs in the values array
-            return np.nanpercentile(arr, percentile)
-            
-           
-        # add the percentile value column using .apply on each list of values
-        df[f"{output_col_key}"] = df[col_key].apply(calc_percentile)
+        Args:
+            ordered (np.ndarray): A time x members matrix with each row sorted, missing members (NaN) at the end.
+            counts (np.ndarray): The number of present members in each row.
+            percentiles (list[int]): The percentiles to calculate.
 
-        # return the data frame with the added column
-        return df
-    
+        Returns:
+            np.ndarray: A percentiles x time matrix, NaN for rows with no members.
+        """
+        rows = np.arange(ordered.shape[0])
+        last = np.maximum(counts - 1, 0)
+
+        # linear interpolation between the two closest ranks, the same as numpy's default method
+        positions = np.asarray(percentiles, dtype=float)[:, None] / 100 * last
+        below = np.floor(positions).astype(np.intp)
+        above = np.minimum(below + 1, last)
+        weight = positions - below
+        lower, upper = ordered[rows, below], ordered[rows, above]
+
+        # numpy interpolates from the closer side so the result is exact at the ends
+        difference = upper - lower
+        values = np.where(weight >= 0.5, upper - difference * (1 - weight), lower + difference * weight)
+        values[:, counts == 0] = np.nan
+        return values
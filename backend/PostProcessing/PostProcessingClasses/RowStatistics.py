@@ -5,68 +5,119 @@
 # -------------------------------
 """
 This file is a postprocessing class under the IPostProcessing interface.
-It calculates the min, max, and/or median for each row in the DataFrame containing a list of values.
+It calculates the min, max, median, mean, std and/or count for each row in the DataFrame containing a list of values.
 
 JSON Call:
     {
         "key": "RowStatistics",
         "args": {
-            "metrics": "all"                # OR "median" OR ["min", "max"]
-            "col_name": "Name of the column"
+            "metrics": "all"                # OR "median" OR ["min", "max"] OR ["mean", "std", "count"]
+            "col_name": "Name of the column",
+            "ddof": 0                       # Optional, std divides by (count - ddof): 0 is the population std, 1 the sample std (the pandas default)
         }
     }
 """
 # -------------------------------
 
 from PostProcessing.IPostProcessing import IPostProcessing
-from pandas import DataFrame
-from statistics import median  
+from pandas import DataFrame, Series
+from Ensemble import to_member_matrix, sorted_members, missing_members
+import numpy as np
 
 class RowStatistics(IPostProcessing):
 
-    def post_process(self, data: DataFrame, metrics: str, col_name: str, **kwargs) -> DataFrame:
+    STATELESS = True
+
+    # The metrics "all" expands to
+    ALL_METRICS = ["min", "max", "median"]
+    ALLOWED_METRICS = {"min", "max", "median", "mean", "std", "count"}
+
+    def post_process(self, data: DataFrame, metrics: str, col_name: str, ddof: int = 0, **kwargs) -> DataFrame:
         """
         Calculates statistics for each model and appends ot the dataframe.
+        The column is turned into a time x members matrix once and every metric is a NumPy reduction along the member axis.
+        Missing members are ignored, a row with no members gets NaN (and a count of 0).
 
         Args:
             data (DataFrame): The DataFrame with input data. Should include a 'timestamp' column.
-            metrics (str or list): One or more of ["min", "max", "median"], or "all".
+            metrics (str or list): One or more of ["min", "max", "median", "mean", "std", "count"], or "all" (min, max and median).
+            ddof (int): The delta degrees of freedom of std, which divides by (count - ddof). Defaults to 0, the population std
+                (the same as numpy). Use 1 for the sample std pandas gives by default.
 
         Returns:
             DataFrame: Original DataFrame with new columns based on selected statistics.
         """
 
-        
-        df = data.copy()
-        
-        if col_name not in df.columns:
-            raise KeyError(f"Column '{col_name}' not found. Available columns: {df.columns.tolist()}")
+        if col_name not in data.columns:
+            raise KeyError(f"Column '{col_name}' not found. Available columns: {data.columns.tolist()}")
+
+        metrics = self.normalize_metrics(metrics)
+        statistics = self.calculate(data[col_name], metrics, ddof)
+
+        # Add requested statistics
+        for metric in metrics:
+            data[f"{col_name} {metric.capitalize()}"] = statistics[metric]
+
+        return data
+
+
+    def column_usage(self, metrics: str, col_name: str, **kwargs) -> tuple[list[str], list[str]]:
+        return [col_name], [f"{col_name} {metric.capitalize()}" for metric in self.normalize_metrics(metrics)]
 
-        # Normalize input
+
+    def normalize_metrics(self, metrics: str | list[str]) -> list[str]:
+        """Validates the requested metrics, returning them in the order their columns are added (median, max, min, then the rest)."""
         if isinstance(metrics, str):
             if metrics.lower() == "all":
-                metrics = ["min", "max", "median"]
+                metrics = self.ALL_METRICS
             else:
                 metrics = [metrics.lower()]
 
         # Validate input
-        allowed_metrics = {"min", "max", "median"}
-        invalid = set(metrics) - allowed_metrics
+        if not metrics:
+            raise ValueError(f"No metrics requested. Allowed: {self.ALLOWED_METRICS}")
+        invalid = set(metrics) - self.ALLOWED_METRICS
         if invalid:
-            raise ValueError(f"Invalid metric(s): {invalid}. Allowed: {allowed_metrics}")
-        
-        def is_valid_list(val):
-            return isinstance(val, list) and len(val) > 0
+            raise ValueError(f"Invalid metric(s): {invalid}. Allowed: {self.ALLOWED_METRICS}")
 
+        return sorted(metrics, key=["median", "max", "min", "mean", "std", "count"].index)
 
-        # Add requested statistics
-        if "median" in metrics:
-            df[f"{col_name} Median"] = df[col_name].apply(lambda x: median(x) if is_valid_list(x) else None)
-        if "max" in metrics:
-            df[f"{col_name} Max"] = df[col_name].apply(lambda x: max(x) if is_valid_list(x) else None)
-        if "min" in metrics:
-            df[f"{col_name} Min"] = df[col_name].apply(lambda x: min(x) if is_valid_list(x) else None)
-
-        return df
-    
-  
\ No newline at end of file
+
+    def calculate(self, column: Series, metrics: list[str], ddof: int = 0) -> dict[str, np.ndarray]:
+        """
+        Calculates the metrics of every row of a column.
+        The sorted members and missing member masks of ensemble columns are shared with other steps (ex. Percentile).
+
+        Args:
+            column (Series): The column, an ensemble or a list in cell column.
+            metrics (list[str]): The metrics to calculate.
+            ddof (int): std divides by (count - ddof), 0 is the population std. Rows with count <= ddof get NaN.
+
+        Returns:
+            dict[str, np.ndarray]: One value per row for each metric.
+        """
+        statistics = {}
+
+        # min, max and median all come from one sort, missing members sort to the end of each row
+        if {"min", "max", "median"} & set(metrics):
+            ordered, counts = sorted_members(column)
+            rows = np.arange(ordered.shape[0])
+            empty = counts == 0
+            lower = ordered[rows, np.maximum((counts - 1) // 2, 0)]
+            upper = ordered[rows, counts // 2 - empty]
+            statistics["min"] = ordered[:, 0]
+            statistics["max"] = ordered[rows, np.maximum(counts - 1, 0)]
+            statistics["median"] = np.where(empty, np.nan, (lower + upper) / 2)
+
+        if {"mean", "std", "count"} & set(metrics):
+            members = to_member_matrix(column)
+            missing = missing_members(column)
+            counts = members.shape[1] - np.count_nonzero(missing, axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = np.where(missing, 0, members).sum(axis=1) / counts
+                statistics["mean"] = mean
+                squares = (np.where(missing, 0, members - mean[:, None]) ** 2).sum(axis=1)
+                statistics["std"] = np.where(counts > ddof, np.sqrt(squares / (counts - ddof)), np.nan)
+            statistics["count"] = counts
+
+        return statistics
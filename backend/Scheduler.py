@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+#Scheduler.py
+#----------------------------------
+# Created By : Flare Team
+#----------------------------------
+""" The scheduler lets Flare run as a single long lived process (a daemon) instead of a new interpreter
+per CSPEC per cron tick. It loads every CSPEC in a directory once, reloads a CSPEC only when its file changes,
+and runs each one on its own schedule. Imports, connections and caches stay warm between runs.
+
+A schedule can be declared in the CSPEC:
+    "schedule": {"interval": 900, "offset": 0}
+or in a schedule file, which takes priority over the CSPEC:
+    {"test_1-0-0.json": {"interval": 1800}}
+A CSPEC with neither is not run, unless the daemon is given a default schedule.
+ """
+#----------------------------------
+#
+#
+#Imports
+from CSPEC_Parser import CSPEC_Parser, parse_schedule
+from DataClasses import CSPEC, Logger
+from datetime import datetime, timedelta
+from json import load
+from threading import Event
+from typing import Callable
+import os
+
+
+class ScheduledCSPEC():
+    def __init__(self, path: str, mtime: float, CSPEC: CSPEC, schedule: dict, next_run: datetime) -> None:
+        self.path = path
+        self.mtime = mtime
+        self.CSPEC = CSPEC
+        self.schedule = schedule
+        self.next_run = next_run
+
+
+class CSPEC_Scheduler():
+
+    # How often (seconds) the CSPEC directory is rescanned for new, changed, or removed files
+    RESCAN_INTERVAL = 30
+
+    def __init__(self, cspec_dir: str, run_callback: Callable[[list[ScheduledCSPEC]], None], default_schedule: dict | None = None, schedule_file_path: str | None = None) -> None:
+        """
+            :param cspec_dir: str - The directory holding the CSPEC files.
+            :param run_callback: Callable - Called with the list of CSPECs that are due.
+            :param default_schedule: dict | None - The schedule used by CSPECs that do not declare one, None to not run them.
+            :param schedule_file_path: str | None - An optional json file mapping CSPEC file names to schedules.
+        """
+        self.cspec_dir = cspec_dir
+        self.run_callback = run_callback
+        self.default_schedule = default_schedule
+        self.schedule_file_path = schedule_file_path
+        self.logger = Logger('Scheduler')
+        self.stop_event = Event()
+
+        self.__entries: dict[str, ScheduledCSPEC] = {}
+        self.__broken: dict[str, float] = {}
+        self.__unscheduled: dict[str, float] = {}
+        self.__schedule_file_mtime = None
+        self.__schedule_overrides: dict[str, dict] = {}
+
+
+    def run_forever(self) -> None:
+        """ Runs due CSPECs until stop() is called."""
+        self.logger.log_info(f'============ Flare daemon started, watching {self.cspec_dir} ============')
+        while not self.stop_event.is_set():
+            self.refresh()
+            now = datetime.now()
+
+            due = [entry for entry in self.__entries.values() if entry.next_run <= now]
+            if due:
+                self.run_callback(due)
+                # Reschedule from after the run so a slow run skips missed ticks instead of stacking them
+                now = datetime.now()
+                for entry in due:
+                    entry.next_run = self.next_run_time(entry.schedule, now)
+
+            # Sleep until the next CSPEC is due, but wake up to rescan the directory
+            next_wake = min([entry.next_run for entry in self.__entries.values()], default=now + timedelta(seconds=self.RESCAN_INTERVAL))
+            sleep_seconds = min(max((next_wake - datetime.now()).total_seconds(), 0), self.RESCAN_INTERVAL)
+            self.stop_event.wait(sleep_seconds)
+        self.logger.log_info('============ Flare daemon stopped ============')
+
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+
+    def refresh(self) -> None:
+        """ Loads new CSPECs, reloads CSPECs whose file modification time changed, and drops deleted ones."""
+        schedule_file_changed = self.__refresh_schedule_file()
+
+        try:
+            file_names = sorted(name for name in os.listdir(self.cspec_dir) if name.endswith('.json'))
+        except FileNotFoundError:
+            self.logger.log_error(f'CSPEC directory {self.cspec_dir} not found!', error_type='FileNotFoundError', include_traceback=False)
+            return
+
+        seen = set()
+        for file_name in file_names:
+            path = os.path.join(self.cspec_dir, file_name)
+            seen.add(path)
+            try:
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                continue
+
+            entry = self.__entries.get(path)
+            unchanged = (entry is not None and entry.mtime == mtime) or self.__broken.get(path) == mtime or self.__unscheduled.get(path) == mtime
+            if unchanged and not schedule_file_changed:
+                continue
+
+            try:
+                parsed_CSPEC = CSPEC_Parser(path).parse_CSPEC()
+                schedule = self.__schedule_for(file_name, parsed_CSPEC)
+            except Exception as e:
+                self.logger.log_error(f'Failed to load CSPEC {path}, it will not be scheduled until it changes: {e}', error_type='CSPECLoadError')
+                self.__entries.pop(path, None)
+                self.__broken[path] = mtime # Remember the mtime so a broken file is not reparsed every rescan
+                continue
+            self.__broken.pop(path, None)
+
+            # Only CSPECs that ask to be scheduled are run, a test CSPEC dropped in the directory stays idle
+            if schedule is None:
+                self.logger.log_info(f'CSPEC {file_name} has no schedule, it will not be run until it declares one.')
+                self.__entries.pop(path, None)
+                self.__unscheduled[path] = mtime
+                continue
+            self.__unscheduled.pop(path, None)
+
+            if entry is None:
+                self.logger.log_info(f'Loaded CSPEC {file_name} with schedule {schedule}')
+                next_run = self.next_run_time(schedule, datetime.now())
+            else:
+                self.logger.log_info(f'Reloaded CSPEC {file_name} with schedule {schedule}')
+                next_run = entry.next_run if entry.schedule == schedule else self.next_run_time(schedule, datetime.now())
+            self.__entries[path] = ScheduledCSPEC(path, mtime, parsed_CSPEC, schedule, next_run)
+
+        for path in [path for path in self.__entries if path not in seen]:
+            self.logger.log_info(f'CSPEC {path} was removed, unscheduling it.')
+            del self.__entries[path]
+        self.__broken = {path: mtime for path, mtime in self.__broken.items() if path in seen}
+        self.__unscheduled = {path: mtime for path, mtime in self.__unscheduled.items() if path in seen}
+
+
+    @staticmethod
+    def next_run_time(schedule: dict, now: datetime) -> datetime:
+        """ Computes the next time a schedule fires after now. Runs are aligned to local midnight, so an interval
+        of 900 fires at :00, :15, :30 and :45 just like the cron */15.
+            :param schedule: dict - The schedule with "interval" and "offset" in seconds.
+            :param now: datetime - The time to compute the next run from.
+            :return datetime - The next run time.
+        """
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        seconds_since_midnight = (now - midnight).total_seconds()
+        interval, offset = schedule['interval'], schedule['offset']
+        ticks = (seconds_since_midnight - offset) // interval + 1
+        return midnight + timedelta(seconds=ticks * interval + offset)
+
+
+    def __schedule_for(self, file_name: str, parsed_CSPEC: CSPEC) -> dict | None:
+        if file_name in self.__schedule_overrides: return self.__schedule_overrides[file_name]
+        if parsed_CSPEC.schedule is not None: return parsed_CSPEC.schedule
+        return self.default_schedule
+
+
+    def __refresh_schedule_file(self) -> bool:
+        """ Reloads the schedule file if it changed.
+            :return bool - True if the schedule file changed since the last refresh.
+        """
+        if self.schedule_file_path is None: return False
+        try:
+            mtime = os.stat(self.schedule_file_path).st_mtime
+        except FileNotFoundError:
+            self.logger.log_error(f'Schedule file {self.schedule_file_path} not found!', error_type='FileNotFoundError', include_traceback=False)
+            return False
+        if mtime == self.__schedule_file_mtime: return False
+
+        try:
+            with open(self.schedule_file_path) as schedule_file:
+                self.__schedule_overrides = {name: parse_schedule(schedule) for name, schedule in load(schedule_file).items()}
+        except Exception as e:
+            self.logger.log_error(f'Failed to load schedule file {self.schedule_file_path}: {e}', error_type='ScheduleLoadError')
+        self.__schedule_file_mtime = mtime
+        return True
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# bench_RowStatistics.py
+#-------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""Benchmarks RowStatistics on a 240 hour x 50 member ensemble against the previous row by row implementation.
+Run from the backend directory: python Tests/Benchmarks/bench_RowStatistics.py
+ """
+#----------------------------------
+#
+#
+import os
+import sys
+import timeit
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+from pandas import DataFrame, Series, date_range
+from statistics import median
+from Ensemble import EnsembleArray
+from PostProcessing.IPostProcessing import post_process_factory
+from PostProcessing.PostProcessingClasses.RowStatistics import RowStatistics
+
+HOURS = 240
+MEMBERS = 50
+REPEAT = 20
+
+
+def previous_row_statistics(data: DataFrame, col_name: str) -> DataFrame:
+    """The row by row implementation RowStatistics used before it was vectorized."""
+    df = data.copy()
+    is_valid_list = lambda val: isinstance(val, list) and len(val) > 0
+    df[f"{col_name} Median"] = df[col_name].apply(lambda x: median(x) if is_valid_list(x) else None)
+    df[f"{col_name} Max"] = df[col_name].apply(lambda x: max(x) if is_valid_list(x) else None)
+    df[f"{col_name} Min"] = df[col_name].apply(lambda x: min(x) if is_valid_list(x) else None)
+    return df
+
+
+def main():
+    rng = np.random.default_rng(0)
+    members = rng.normal(20, 3, size=(HOURS, MEMBERS))
+    index = date_range('2025-01-01', periods=HOURS, freq='h')
+    lists = DataFrame({'Ensemble': [row.tolist() for row in members]}, index=index)
+    ensemble = DataFrame({'Ensemble': EnsembleArray(members)}, index=index)
+
+    previous = previous_row_statistics(lists, 'Ensemble')
+    current = post_process_factory(ensemble.copy(), 'RowStatistics', {'metrics': 'all', 'col_name': 'Ensemble'})
+    for metric in ('Median', 'Max', 'Min'):
+        assert np.allclose(previous[f'Ensemble {metric}'].astype(float), current[f'Ensemble {metric}']), metric
+
+    timings = {
+        'previous (list cells, apply)': lambda: previous_row_statistics(lists, 'Ensemble'),
+        'vectorized (list cells)': lambda: post_process_factory(lists.copy(), 'RowStatistics', {'metrics': 'all', 'col_name': 'Ensemble'}),
+        'vectorized (ensemble column)': lambda: post_process_factory(ensemble.copy(), 'RowStatistics', {'metrics': 'all', 'col_name': 'Ensemble'}),
+        'reductions only (no frame work)': lambda: RowStatistics().calculate(Series(EnsembleArray(members)), ['min', 'max', 'median']),
+        'vectorized, all six metrics': lambda: post_process_factory(ensemble.copy(), 'RowStatistics', {'metrics': ['min', 'max', 'median', 'mean', 'std', 'count'], 'col_name': 'Ensemble'}),
+    }
+    baseline = None
+    print(f'RowStatistics, {HOURS} hours x {MEMBERS} members, best of {REPEAT} runs')
+    for name, run in timings.items():
+        seconds = min(timeit.repeat(run, number=1, repeat=REPEAT))
+        baseline = baseline or seconds
+        print(f'  {name:<32} {seconds * 1000:8.2f} ms  {baseline / seconds:6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
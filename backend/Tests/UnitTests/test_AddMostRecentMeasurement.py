@@ -66,4 +66,19 @@ def test_post_process(test_df: DataFrame, measurement_key: str, prediction_key:
     expected_results.reset_index(drop=True, inplace=True)
 
     # Assert that the result matches the expected DataFrame
-    assert result.equals(expected_results), "The post_process method did not produce the expected result."
\ No newline at end of file
+    assert result.equals(expected_results), "The post_process method did not produce the expected result."
+
+def test_post_process_uses_ref_time():
+    """The measurement closest to the run's reference time is used, not the one closest to the wall clock."""
+    index = to_datetime(['2025-01-01 00:00', '2025-01-01 01:00', '2025-01-01 02:00', '2025-01-01 03:00', '2025-01-01 04:00'])
+    df = DataFrame({
+        'measurement': [1.0, nan, 3.0, 4.0, nan],
+        'prediction': [nan, nan, nan, nan, 5.0],
+    }, index=index)
+
+    kwargs = {'measurement_col_key': 'measurement', 'prediction_col_key': 'prediction'}
+    result = post_process_factory(df, 'AddMostRecentMeasurement', kwargs, ref_time=datetime(2025, 1, 1, 1, 20))
+
+    # 01:00 has no measurement, so 02:00 is the closest valid one
+    assert result['prediction'].iloc[2] == 3.0
+    assert result['prediction'].isna().tolist() == [True, True, False, True, False]
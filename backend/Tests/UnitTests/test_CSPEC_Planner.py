@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# test_CSPEC_Planner.py
+#-------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""This file tests the CSPEC planner, which validates calls and drops and frees columns that never reach the CSV
+ """
+#----------------------------------
+#
+#
+
+import pytest
+import CSPEC_Planner
+from CSPEC_Planner import plan_CSPEC
+from DataClasses import Call, CSPEC
+from PostProcessing.IPostProcessing import IPostProcessing
+
+
+def inputs(column_name: str, series: str = "dWl") -> Call:
+    return Call('SemaphoreInputs', kwargs={"column_name": column_name, "location": "SBI", "source": "NOAATANDC", "series": series, "interval": 3600, "range": [-6, 0]})
+
+
+def arithmetic(left: str, right: str, out: str) -> Call:
+    return Call('ArithmeticOperation', kwargs={"op": "addition", "left_col_key": left, "right_col_key": right, "out_col_key": out})
+
+
+def interpolation(col_name: str) -> Call:
+    return Call('LinearInterpolation', kwargs={"col_name": col_name, "interpolation_interval": 3600, "limit": 5})
+
+
+def test_drops_dead_steps_and_ingestion():
+    cspec = CSPEC('test', [inputs('a'), inputs('b'), inputs('unused')], [
+        arithmetic('a', 'b', 'sum'),
+        arithmetic('sum', 'a', 'total'),
+        arithmetic('b', 'b', 'never used'),
+    ], 'test.csv', ['total'])
+
+    plan = plan_CSPEC(cspec)
+
+    assert [call.kwargs['kwargs']['column_name'] for call in plan.data_requests] == ['a', 'b']
+    assert [step.call.kwargs['kwargs']['out_col_key'] for step in plan.post_processing] == ['sum', 'total']
+    assert [(stage, call.call_key) for stage, call, _ in plan.dropped] == [('data_requests', 'SemaphoreInputs'), ('post_processing', 'ArithmeticOperation')]
+
+    # b is freed after its last reader, sum and a after theirs, total is exported
+    assert plan.post_processing[0].free_after == ['b']
+    assert plan.post_processing[1].free_after == ['sum', 'a']
+    assert 'Dropped:' in plan.explain()
+
+
+def test_unused_ingestion_is_kept_for_its_rows():
+    """The timestamps of every call are rows of the CSV, so unused ingestion with its own request is kept but freed right away."""
+    cspec = CSPEC('test', [inputs('a'), inputs('unused', series='dAirTmp')], [arithmetic('a', 'a', 'double')], 'test.csv', ['double'])
+
+    plan = plan_CSPEC(cspec)
+
+    assert [call.kwargs['kwargs']['column_name'] for call in plan.data_requests] == ['a', 'unused']
+    assert plan.free_after_ingestion == ['unused']
+    assert plan.dropped == []
+
+
+def test_index_steps_keep_ingestion():
+    """LinearInterpolation builds its grid from every ingested row, so unused ingestion is kept but freed right away."""
+    cspec = CSPEC('test', [inputs('a'), inputs('unused', series='dAirTmp')], [interpolation('a')], 'test.csv', ['a'])
+
+    plan = plan_CSPEC(cspec)
+
+    assert len(plan.data_requests) == 2
+    assert plan.free_after_ingestion == ['unused']
+    assert len(plan.post_processing) == 1
+
+
+def test_index_steps_are_never_dropped():
+    cspec = CSPEC('test', [inputs('a'), inputs('b')], [interpolation('b')], 'test.csv', ['a'])
+
+    plan = plan_CSPEC(cspec)
+
+    assert len(plan.post_processing) == 1
+    assert plan.post_processing[0].free_after == ['b']
+
+
+def test_unknown_usage_keeps_everything(monkeypatch):
+    class Unknown(IPostProcessing):
+        def post_process(self, data, **kwargs):
+            return data
+
+    real_class = CSPEC_Planner.post_process_class
+    monkeypatch.setattr(CSPEC_Planner, 'post_process_class', lambda key: Unknown if key == 'Unknown' else real_class(key))
+    cspec = CSPEC('test', [inputs('a'), inputs('b')], [arithmetic('a', 'b', 'sum'), Call('Unknown', kwargs={})], 'test.csv', ['a'])
+
+    plan = plan_CSPEC(cspec)
+
+    assert len(plan.data_requests) == 2
+    assert len(plan.post_processing) == 2
+    assert plan.post_processing[0].free_after == []
+    assert plan.dropped == []
+
+
+@pytest.mark.parametrize("cspec, error", [
+    (CSPEC('test', [Call('SemaphoreInputs', kwargs={"column_name": "a"})], [], 'test.csv', ['a']), TypeError),
+    (CSPEC('test', [inputs('a')], [Call('ArithmeticOperation', kwargs={"op": "addition", "left_col_key": "a"})], 'test.csv', ['a']), TypeError),
+    (CSPEC('test', [inputs('a')], [Call('Combine', kwargs={"left_col_key": "a"})], 'test.csv', ['a']), TypeError),
+    (CSPEC('test', [inputs('a')], [Call('RowStatistics', kwargs={"metrics": "mode", "col_name": "a"})], 'test.csv', ['a']), ValueError),
+    (CSPEC('test', [inputs('a')], [Call('NotAClass', kwargs={})], 'test.csv', ['a']), ModuleNotFoundError),
+    (CSPEC('test', [inputs('a')], [], 'test.csv', ['a'], exports=[Call('ColumnarJSON', kwargs={"precision": 2})]), TypeError),
+])
+def test_invalid_calls_fail_while_planning(cspec: CSPEC, error: type):
+    """Bad calls fail while planning, even ones that would be dropped, before any request is made."""
+    with pytest.raises(error):
+        plan_CSPEC(cspec)
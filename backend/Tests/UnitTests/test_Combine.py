@@ -60,3 +60,37 @@ def test_post_process_data(test_df: DataFrame, left: str, right: str, expected_r
         elif not isclose(actual, expected, abs_tol=tolerance):
             assert False
     assert True
+
+
+@pytest.mark.parametrize("col_keys, out_col_key, expected_results", [
+    (['s1', 's3', 's4', 's5'], 'out', [2, 2, 2, 3, 3]),     # First non nan value wins
+    (['s1', 's5', 's4'], None, [4, 4, 4, 4, 3]),             # Written to the first column by default
+    (['s1', 's4'], 'out', [nan, nan, nan, 3, 3]),            # nan persisting if in every column
+])
+def test_combine_many_columns(col_keys: list[str], out_col_key: str, expected_results: list[any]):
+    df = test_df.copy()
+    df = post_process_factory(df, "Combine", {"col_keys": col_keys, "out_col_key": out_col_key})
+
+    result = df[out_col_key or col_keys[0]]
+    assert result.isna().tolist() == [isna(value) for value in expected_results]
+    assert result.dropna().tolist() == [value for value in expected_results if not isna(value)]
+    assert df['s1'].isna().all() or out_col_key is None # Sources are untouched when there is an output column
+
+
+def test_combine_ensembles_takes_whole_cells():
+    from Ensemble import EnsembleArray
+    df = DataFrame({
+        'observed': [nan, 1.0, nan, nan],
+        'model': EnsembleArray.from_rows([[1.0, nan, 3.0], [5.0, 6.0], None, None]),
+        'fallback': EnsembleArray.from_rows([[9.0, 9.0, 9.0], [9.0], [7.0, 8.0], None]),
+    })
+
+    df = post_process_factory(df, "Combine", {"col_keys": ['observed', 'model', 'fallback'], "out_col_key": 'out'})
+
+    # Row 0 keeps the model's missing member instead of filling it from the fallback
+    assert df['out'].array.members.shape == (4, 3)
+    assert df['out'].iloc[1] == [1.0]
+    assert df['out'].iloc[2] == [7.0, 8.0]
+    assert df['out'].isna().tolist() == [False, False, False, True]
+    members = df['out'].array.members[0]
+    assert members[0] == 1.0 and members[1] != members[1] and members[2] == 3.0
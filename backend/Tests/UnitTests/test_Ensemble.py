@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# test_Ensemble.py
+#-------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""This file tests the dense ensemble column type
+ """
+#----------------------------------
+#
+#
+
+import pytest
+import numpy as np
+from pandas import DataFrame, Series, date_range
+from Ensemble import EnsembleArray, EnsembleDtype, to_member_matrix, sorted_members, missing_members
+
+index = date_range('2025-01-01', periods=4, freq='h')
+
+
+def ensemble_frame() -> DataFrame:
+    return DataFrame({'Ensemble': EnsembleArray.from_rows([[1, 2, 3], [4.5], None, [7, 8]]), 'Scalar': [1.0, 2.0, 3.0, 4.0]}, index=index)
+
+
+def test_rows_are_padded_and_read_back_as_lists():
+    df = ensemble_frame()
+    members = df['Ensemble'].array.members
+
+    assert members.shape == (4, 3) and members.dtype == np.float64
+    assert np.isnan(members[1, 1:]).all()
+    assert df['Ensemble'].tolist() == [[1.0, 2.0, 3.0], [4.5], df['Ensemble'].iloc[2], [7.0, 8.0]]
+    assert df['Ensemble'].isna().tolist() == [False, False, True, False]
+
+
+def test_from_ragged_matches_from_rows():
+    ragged = EnsembleArray.from_ragged(np.array([1, 2, 3, 4.5, 7, 8]), np.array([3, 1, 0, 2]))
+    assert np.array_equal(ragged.members, ensemble_frame()['Ensemble'].array.members, equal_nan=True)
+
+
+def test_join_and_reindex_keep_the_ensemble_dtype():
+    df = ensemble_frame()
+    joined = df.join(DataFrame({'Other': [1.0]}, index=[index[0] + (index[1] - index[0]) / 2]), how='outer')
+
+    assert joined['Ensemble'].dtype == EnsembleDtype()
+    assert len(joined) == 5 and joined['Ensemble'].isna().tolist() == [False, True, False, True, False]
+    assert joined['Ensemble'].iloc[4] == [7.0, 8.0]
+
+
+def test_csv_output_is_unchanged():
+    csv = ensemble_frame().to_csv()
+    assert '"[1.0, 2.0, 3.0]",1.0' in csv
+    assert ',[4.5],2.0' in csv
+    assert '2025-01-01 02:00:00,,3.0' in csv
+
+
+def test_float32_dtype():
+    series = Series([[1, 2], [3]]).astype('ensemble[float32]')
+    assert series.dtype == EnsembleDtype('float32')
+    assert series.array.members.dtype == np.float32
+    with pytest.raises(TypeError):
+        EnsembleDtype('int64')
+
+
+def test_setitem_widens_the_matrix():
+    series = ensemble_frame()['Ensemble']
+    series.iloc[2] = [9, 9, 9, 9]
+    assert series.array.members.shape == (4, 4)
+    assert series.iloc[2] == [9.0, 9.0, 9.0, 9.0]
+    assert series.iloc[0] == [1.0, 2.0, 3.0]
+
+
+def test_to_member_matrix():
+    df = ensemble_frame()
+    members = to_member_matrix(df['Ensemble'])
+    assert np.shares_memory(members, df['Ensemble'].array.members) # No copy
+    assert not members.flags.writeable # The storage can only change through the column
+    assert to_member_matrix(df['Scalar']).shape == (4, 1)
+
+    lists = Series([[1, 2], np.nan, [3]], dtype=object)
+    assert np.array_equal(to_member_matrix(lists), np.array([[1, 2], [np.nan, np.nan], [3, np.nan]]), equal_nan=True)
+
+
+def test_derived_values_are_shared_until_the_column_changes(monkeypatch):
+    df = ensemble_frame()
+    sorts = []
+    real_sort = np.sort
+    monkeypatch.setattr(np, 'sort', lambda *args, **kwargs: sorts.append(1) or real_sort(*args, **kwargs))
+
+    first, counts = sorted_members(df['Ensemble'])
+    assert sorted_members(df['Ensemble'])[0] is first
+    assert counts.tolist() == [3, 1, 0, 2]
+    assert missing_members(df['Ensemble']) is missing_members(df['Ensemble'])
+    assert len(sorts) == 1
+
+    # Setting a value drops what was derived from the old members
+    df.loc[df.index[2], 'Ensemble'] = [0.5]
+    assert sorted_members(df['Ensemble'])[1].tolist() == [3, 1, 1, 2]
+    assert len(sorts) == 2
+
+    # A replaced column starts over
+    df['Ensemble'] = EnsembleArray.from_rows([[2, 1]] * 4)
+    assert sorted_members(df['Ensemble'])[0][0].tolist() == [1.0, 2.0]
+    assert len(sorts) == 3
+
+
+def test_slices_see_changes_made_through_their_parent():
+    parent = EnsembleArray.from_rows([[3, 1], [2, 4], [6, 5]])
+    view = parent[1:]
+    assert view.derived('max', lambda members: members.max(axis=1)).tolist() == [4.0, 6.0]
+
+    # The slice shares the parent's members, so the parent's write must drop what the slice derived
+    parent[2] = [9, 7]
+    assert view.derived('max', lambda members: members.max(axis=1)).tolist() == [4.0, 9.0]
+
+    # And the other way around
+    assert parent.derived('min', lambda members: members.min(axis=1)).tolist() == [1.0, 2.0, 7.0]
+    view[0] = [0, 8]
+    assert parent.derived('min', lambda members: members.min(axis=1)).tolist() == [1.0, 0.0, 7.0]
+
+
+def test_copies_keep_derived_values_until_they_change():
+    original = EnsembleArray.from_rows([[3, 1], [2, 4]])
+    maximum = original.derived('max', lambda members: members.max(axis=1))
+    copy = original.copy()
+    assert copy.derived('max', lambda members: members.max(axis=1)) is maximum
+
+    copy[0] = [5, 0]
+    assert copy.derived('max', lambda members: members.max(axis=1)).tolist() == [5.0, 4.0]
+    assert original.derived('max', lambda members: members.max(axis=1)) is maximum
+
+
+def test_statistic_steps_share_one_sort(monkeypatch):
+    from PostProcessing.IPostProcessing import post_process_factory
+    df = ensemble_frame()
+    sorts = []
+    real_sort = np.sort
+    monkeypatch.setattr(np, 'sort', lambda *args, **kwargs: sorts.append(1) or real_sort(*args, **kwargs))
+
+    df = post_process_factory(df, 'RowStatistics', {'metrics': 'all', 'col_name': 'Ensemble'})
+    df = post_process_factory(df, 'Percentile', {'col_key': 'Ensemble', 'percentile': [5, 95], 'output_col_key': ['5th', '95th']})
+    df = post_process_factory(df, 'Percentile', {'col_key': 'Ensemble', 'percentile': 50, 'output_col_key': '50th'})
+
+    assert len(sorts) == 1
+    assert df['50th'].tolist()[:2] == df['Ensemble Median'].tolist()[:2]
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# test_Export.py
+#-------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""This file tests the export classes, which write the included columns as CSV, columnar JSON, Parquet, or Arrow IPC
+ """
+#----------------------------------
+#
+#
+
+import pytest
+import io
+import json
+import sys
+from numpy import nan
+from pandas import DataFrame, date_range
+from Ensemble import EnsembleArray
+from Export.Export_Utility import ExportTable
+from Export.I_Export import export_factory, export_file_name
+
+
+def make_table() -> ExportTable:
+    df = DataFrame({
+        'Measurement': [1.23456, nan, 3.0],
+        'Prediction': EnsembleArray.from_rows([[1.0, 2.0], [3.0], [nan, nan]]),
+    }, index=date_range('2025-01-01', periods=3, freq='1h'))
+    df.index.name = 'Date'
+    return ExportTable(df)
+
+
+def test_csv_is_the_frame_as_csv():
+    table = make_table()
+    assert export_factory(table, 'CSV', {}) == table.frame.to_csv().encode()
+
+
+@pytest.mark.parametrize("float_precision, measurement", [
+    (None, [1.23456, None, 3.0]),
+    (2, [1.23, None, 3.0]),
+])
+def test_columnar_json(float_precision, measurement):
+    kwargs = {} if float_precision is None else {'float_precision': float_precision}
+
+    result = json.loads(export_factory(make_table(), 'ColumnarJSON', kwargs))
+
+    assert result['time'] == [1735689600000, 1735693200000, 1735696800000]
+    assert result['columns']['Measurement'] == measurement
+    assert result['columns']['Prediction'] == [[1.0, 2.0], [3.0, None], [None, None]]
+
+
+def test_columnar_json_rejects_bad_precision():
+    with pytest.raises(ValueError):
+        export_factory(make_table(), 'ColumnarJSON', {'float_precision': -1})
+
+
+def test_shared_conversions_are_done_once():
+    table = make_table()
+    export_factory(table, 'ColumnarJSON', {})
+    assert table.column('Prediction') is table.column('Prediction')
+    assert table.epoch_ms is table.epoch_ms
+
+
+def test_file_names():
+    assert export_file_name('chart.csv', 'CSV', {}) == 'chart.csv'
+    assert export_file_name('chart.csv', 'ColumnarJSON', {}) == 'chart.json'
+    assert export_file_name('chart.csv', 'Parquet', {'file_name': 'other.parquet'}) == 'other.parquet'
+
+
+def test_kwargs_mismatch():
+    with pytest.raises(TypeError, match='kwargs mismatch'):
+        export_factory(make_table(), 'CSV', {'float_precision': 2})
+
+
+@pytest.mark.parametrize("key", ['Parquet', 'ArrowIPC'])
+def test_arrow_formats(key):
+    pyarrow = pytest.importorskip('pyarrow')
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    content = export_factory(make_table(), key, {})
+
+    table = pyarrow.parquet.read_table(io.BytesIO(content)) if key == 'Parquet' else pyarrow.ipc.open_file(pyarrow.BufferReader(content)).read_all()
+    assert table.column_names == ['Date', 'Measurement', 'Prediction']
+    assert table.column('Measurement').to_pylist() == [1.23456, None, 3.0]
+    assert table.column('Prediction').to_pylist() == [[1.0, 2.0], [3.0, None], [None, None]]
+
+
+@pytest.mark.parametrize("key", ['Parquet', 'ArrowIPC'])
+def test_arrow_formats_without_pyarrow(key, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pyarrow', None) # Makes import pyarrow raise ImportError
+
+    with pytest.raises(ImportError, match='pip install pyarrow'):
+        export_factory(make_table(), key, {})
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+# test_Export_Utility.py
+#-------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""This file tests the atomic, change aware file writes used to export CSVs, their compressed sidecars, and the manifest of exported files
+ """
+#----------------------------------
+#
+#
+
+import pytest
+import gzip
+import json
+import os
+import numpy as np
+from datetime import datetime
+from pandas import DataFrame, date_range
+from hashlib import sha256
+from Export import Export_Utility
+from Export.Export_Utility import ExportTable, manifest_entry, update_manifest, write_if_changed, compress, HASH_SUFFIX, MANIFEST_NAME
+
+
+def test_writes_file_and_hash(tmp_path):
+    path = str(tmp_path / 'chart.csv')
+
+    assert write_if_changed(path, b'Date,a\n2025-01-01,1.0\n')
+
+    with open(path, 'rb') as file: assert file.read() == b'Date,a\n2025-01-01,1.0\n'
+    with open(path + HASH_SUFFIX) as hash_file: assert hash_file.read().strip() == sha256(b'Date,a\n2025-01-01,1.0\n').hexdigest()
+    assert oct(os.stat(path).st_mode & 0o777) == oct(0o644)
+    assert sorted(os.listdir(tmp_path)) == ['chart.csv', 'chart.csv' + HASH_SUFFIX] # No temp files left behind
+
+
+def test_unchanged_content_is_not_rewritten(tmp_path):
+    path = str(tmp_path / 'chart.csv')
+    write_if_changed(path, b'same')
+    os.utime(path, (0, 0))
+
+    assert not write_if_changed(path, b'same')
+    assert os.stat(path).st_mtime == 0
+
+    assert write_if_changed(path, b'different')
+    assert os.stat(path).st_mtime != 0
+
+
+def test_missing_hash_falls_back_to_the_file(tmp_path):
+    path = str(tmp_path / 'chart.csv')
+    with open(path, 'wb') as file: file.write(b'same')
+
+    assert not write_if_changed(path, b'same')
+    assert os.path.exists(path + HASH_SUFFIX)
+
+
+def test_failed_write_keeps_old_file(tmp_path, monkeypatch):
+    path = str(tmp_path / 'chart.csv')
+    write_if_changed(path, b'old')
+
+    def failing_replace(source, destination):
+        raise OSError('disk full')
+    monkeypatch.setattr(Export_Utility.os, 'replace', failing_replace)
+
+    with pytest.raises(OSError):
+        write_if_changed(path, b'new')
+
+    with open(path, 'rb') as file: assert file.read() == b'old'
+    assert sorted(os.listdir(tmp_path)) == ['chart.csv'] # The next export hashes the file itself
+
+
+def test_missing_directory_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        write_if_changed(str(tmp_path / 'missing' / 'chart.csv'), b'content')
+
+
+def test_precompress_writes_gzip_sidecar(tmp_path, monkeypatch):
+    monkeypatch.setattr(Export_Utility, 'brotli', None)
+    path = str(tmp_path / 'chart.csv')
+
+    assert write_if_changed(path, b'Date,a\n' * 100, precompress=True)
+
+    with open(path + '.gz', 'rb') as file: assert gzip.decompress(file.read()) == b'Date,a\n' * 100
+    assert sorted(os.listdir(tmp_path)) == ['chart.csv', 'chart.csv.gz', 'chart.csv' + HASH_SUFFIX]
+    assert compress(b'same', '.gz') == compress(b'same', '.gz') # No timestamp in the header
+
+
+def test_precompress_only_writes_on_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(Export_Utility, 'brotli', None)
+    path = str(tmp_path / 'chart.csv')
+    write_if_changed(path, b'same', precompress=True)
+    os.utime(path + '.gz', (0, 0))
+
+    assert not write_if_changed(path, b'same', precompress=True)
+    assert os.stat(path + '.gz').st_mtime == 0
+
+    assert write_if_changed(path, b'different', precompress=True)
+    with open(path + '.gz', 'rb') as file: assert gzip.decompress(file.read()) == b'different'
+
+
+def test_precompress_adds_missing_sidecar_to_unchanged_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(Export_Utility, 'brotli', None)
+    path = str(tmp_path / 'chart.csv')
+    write_if_changed(path, b'same')
+
+    assert not write_if_changed(path, b'same', precompress=True)
+    with open(path + '.gz', 'rb') as file: assert gzip.decompress(file.read()) == b'same'
+
+
+def test_stale_sidecars_are_removed(tmp_path, monkeypatch):
+    monkeypatch.setattr(Export_Utility, 'brotli', None)
+    path = str(tmp_path / 'chart.csv')
+    write_if_changed(path, b'old', precompress=True)
+    with open(path + '.br', 'wb') as file: file.write(b'old brotli')
+
+    assert write_if_changed(path, b'new')
+
+    assert sorted(os.listdir(tmp_path)) == ['chart.csv', 'chart.csv' + HASH_SUFFIX]
+
+
+def test_precompress_writes_brotli_sidecar(tmp_path):
+    brotli = pytest.importorskip('brotli')
+    path = str(tmp_path / 'chart.csv')
+
+    assert write_if_changed(path, b'Date,a\n' * 100, precompress=True)
+
+    with open(path + '.br', 'rb') as file: assert brotli.decompress(file.read()) == b'Date,a\n' * 100
+    assert os.path.exists(path + '.gz')
+
+
+def test_manifest_entry_describes_table():
+    index = date_range('2025-01-01 00:00', periods=3, freq='h', name='Date')
+    members = [[1.0, 2.0], [np.nan, np.nan], [np.nan, 3.0]]
+    table = ExportTable(DataFrame({'a': [1.0, np.nan, np.nan], 'ens': members}, index=index))
+
+    entry = manifest_entry(table, 'abc', 10, datetime(2025, 1, 1, 1, 0), datetime(2025, 1, 1, 1, 5))
+
+    assert entry == {
+        'sha256': 'abc',
+        'size': 10,
+        'generated': '2025-01-01T01:05:00',
+        'reference_time': '2025-01-01T01:00:00',
+        'rows': 3,
+        'first': '2025-01-01T00:00:00',
+        'last': '2025-01-01T02:00:00',
+        'null_counts': {'a': 2, 'ens': 1}, # An ensemble time is only null when every member is missing
+    }
+
+
+def test_manifest_entry_counts_text_nulls():
+    index = date_range('2025-01-01 00:00', periods=3, freq='h', name='Date')
+    table = ExportTable(DataFrame({'label': ['x', None, 'y'], 'a': [1.0, 2.0, np.nan]}, index=index))
+
+    entry = manifest_entry(table, 'abc', 10, datetime(2025, 1, 1), datetime(2025, 1, 1))
+
+    assert entry['null_counts'] == {'label': 1, 'a': 1}
+
+
+def test_update_manifest_keeps_other_files_and_change_times(tmp_path):
+    update_manifest(str(tmp_path), {'a.csv': {'sha256': '1', 'generated': 'T1'}, 'b.csv': {'sha256': '2', 'generated': 'T1'}})
+    update_manifest(str(tmp_path), {'a.csv': {'sha256': '1', 'generated': 'T2'}})
+    update_manifest(str(tmp_path), {'b.csv': {'sha256': '3', 'generated': 'T3'}})
+
+    with open(tmp_path / MANIFEST_NAME) as manifest_file:
+        files = json.load(manifest_file)['files']
+    assert files['a.csv'] == {'sha256': '1', 'generated': 'T2', 'changed': 'T1'}
+    assert files['b.csv'] == {'sha256': '3', 'generated': 'T3', 'changed': 'T3'}
+
+
+def test_broken_manifest_is_started_over(tmp_path):
+    (tmp_path / MANIFEST_NAME).write_text('{not json')
+
+    update_manifest(str(tmp_path), {'a.csv': {'sha256': '1', 'generated': 'T1'}})
+
+    with open(tmp_path / MANIFEST_NAME) as manifest_file:
+        assert list(json.load(manifest_file)['files']) == ['a.csv']
+
+
+def test_state_dir_keeps_bookkeeping_out_of_the_export_directory(tmp_path):
+    export_dir, state_dir = tmp_path / 'csv', tmp_path / 'state'
+    export_dir.mkdir(), state_dir.mkdir()
+    path = str(export_dir / 'chart.csv')
+
+    assert write_if_changed(path, b'same', state_dir=str(state_dir))
+    assert not write_if_changed(path, b'same', state_dir=str(state_dir))
+    update_manifest(str(export_dir), {'chart.csv': {'sha256': '1', 'generated': 'T1'}}, str(state_dir))
+
+    assert sorted(os.listdir(export_dir)) == ['chart.csv', MANIFEST_NAME]
+    assert sorted(os.listdir(state_dir)) == ['chart.csv' + HASH_SUFFIX, MANIFEST_NAME + '.lock']
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#test_Expression.py
+#-------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""This file tests the Expression PPC
+ """
+#----------------------------------
+#
+#
+
+import pytest
+from numpy import nan
+from pandas import DataFrame, Series
+from pandas.testing import assert_series_equal
+from PostProcessing.IPostProcessing import post_process_factory
+from PostProcessing.PostProcessingClasses.Expression import compile_expression
+
+
+def make_df() -> DataFrame:
+    return DataFrame({
+        'data': [1.5, 2.5, nan, 4.5, 5.5],
+        'Water Level': [0.5, 0.0, 1.0, -2.0, 3.0],
+    })
+
+
+@pytest.mark.parametrize("expression, expected_results", [
+    ("(`Water Level` - 0.3) * 2 + data", make_df()['Water Level'].sub(0.3).mul(2).add(make_df()['data'])),
+    ("data / `Water Level`", make_df()['data'] / make_df()['Water Level']),
+    ("data % 2", make_df()['data'] % 2),
+    ("-data ** 2", -(make_df()['data'] ** 2)),
+    ("where(`Water Level` > 0, data, 0)", Series([1.5, 0.0, nan, 0.0, 5.5])),
+    ("where(data, 1, 0)", Series([1.0, 1.0, nan, 1.0, 1.0])), # A nan condition gives nan, not the true branch
+    ("clip(data, 2, 5)", make_df()['data'].clip(2, 5)),
+    ("min(data, `Water Level`, 1)", Series([0.5, 0.0, nan, -2.0, 1.0])),
+    ("max(data, 3)", Series([3.0, 3.0, nan, 4.5, 5.5])),
+    ("abs(`Water Level`)", make_df()['Water Level'].abs()),
+    ("0 <= `Water Level` < 3 and data > 2", Series([False, True, False, False, False])),
+    ("not data > 2 or `Water Level` == 3", Series([True, False, True, False, True])),
+    ("2 * 3.5", Series([7.0] * 5)),
+])
+def test_post_process_data(expression: str, expected_results: Series):
+    """Tests the post process method in the Expression post process class against the equivalent pandas operations."""
+    test_df = make_df()
+    kwargs = {"expression": expression, "out_col_key": "result"}
+
+    test_df = post_process_factory(test_df, "Expression", kwargs)
+
+    assert_series_equal(test_df['result'], expected_results, check_names=False)
+    assert list(test_df.columns) == ['data', 'Water Level', 'result'] # No intermediate columns
+    assert_series_equal(test_df['data'], make_df()['data']) # Inputs are never overwritten
+
+
+def test_compiled_once():
+    """Compiled expressions are cached and reused across calls."""
+    compile_expression.cache_clear()
+    for _ in range(3):
+        post_process_factory(make_df(), "Expression", {"expression": "data * 2 + 1", "out_col_key": "result"})
+    assert compile_expression.cache_info().misses == 1
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os')",
+    "data.real",
+    "lambda: 1",
+    "[data]",
+    "min(data)",
+    "print(data)",
+    "data +",
+    "__column_0 + 1",          # Reserved for backticked names
+    "`Water Level` + __column_0",
+])
+def test_invalid_expression(expression: str):
+    with pytest.raises(ValueError):
+        post_process_factory(make_df(), "Expression", {"expression": expression, "out_col_key": "result"})
+
+
+def test_missing_column():
+    with pytest.raises(KeyError):
+        post_process_factory(make_df(), "Expression", {"expression": "data + other", "out_col_key": "result"})
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# test_FetchCoordinator.py
+#-------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""This file tests the run scoped FetchCoordinator used to deduplicate and merge Semaphore input requests
+ """
+#----------------------------------
+#
+#
+
+import pytest
+from datetime import datetime, timedelta
+from Ingestion.Fetch_Coordinator import FetchCoordinator
+from Ingestion.Ingestion_Utility import SeriesColumns
+from Ingestion.I_Ingestion import data_ingestion_factory, data_ingestion_register
+from Ingestion.IngestionClasses import SemaphoreInputs as semaphore_inputs_module
+from runtimeContext import thread_storage, run_storage
+from DataClasses import Logger
+from pandas import DataFrame
+
+start = datetime(2025, 1, 1, 0)
+
+
+def hour(n: int) -> datetime:
+    return start + timedelta(hours=n)
+
+
+def fake_fetch(calls: list):
+    """Returns a fetch method that records its windows and returns one point per hour in the window."""
+    def fetch(from_time, to_time):
+        calls.append((from_time, to_time))
+        hours = int((to_time - from_time).total_seconds() // 3600)
+        return {
+            'isComplete': True,
+            '_Series__data': SeriesColumns({
+                'timeVerified': [datetime.strftime(from_time + timedelta(hours=h), '%Y-%m-%dT%H:%M:%S') for h in range(hours + 1)],
+                'dataValue': [str(h) for h in range(hours + 1)],
+            })
+        }
+    return fetch
+
+
+def test_identical_requests_fetch_once():
+    calls = []
+    coordinator = FetchCoordinator()
+    coordinator.register(('a',), hour(0), hour(5))
+    coordinator.register(('a',), hour(0), hour(5))
+
+    first = coordinator.fetch(('a',), hour(0), hour(5), fake_fetch(calls))
+    second = coordinator.fetch(('a',), hour(0), hour(5), fake_fetch(calls))
+
+    assert calls == [(hour(0), hour(5))]
+    assert first is second
+    assert coordinator.requests_served == 2 and coordinator.requests_made == 1
+
+
+def test_overlapping_requests_fetch_union_and_slice():
+    calls = []
+    coordinator = FetchCoordinator()
+    coordinator.register(('a',), hour(0), hour(5))
+    coordinator.register(('a',), hour(3), hour(10))
+    coordinator.register(('a',), hour(20), hour(22)) # Does not overlap
+    coordinator.register(('b',), hour(0), hour(5))   # Different key
+
+    left = coordinator.fetch(('a',), hour(0), hour(5), fake_fetch(calls))
+    right = coordinator.fetch(('a',), hour(3), hour(10), fake_fetch(calls))
+
+    assert calls == [(hour(0), hour(10))]
+    assert len(left['_Series__data']) == 6
+    assert left['_Series__data']['timeVerified'][-1] == '2025-01-01T05:00:00'
+    assert len(right['_Series__data']) == 8
+    assert right['_Series__data']['timeVerified'][0] == '2025-01-01T03:00:00'
+
+    coordinator.fetch(('a',), hour(20), hour(22), fake_fetch(calls))
+    coordinator.fetch(('b',), hour(0), hour(5), fake_fetch(calls))
+    assert len(calls) == 3
+
+
+def test_slices_keep_the_whole_last_hour():
+    """The API returns every point of the to-hour, a merged fetch must give each caller the same points as its own request."""
+    def six_minute_fetch(from_time, to_time):
+        times = [hour(0) + timedelta(minutes=6 * i) for i in range(10 * 10 + 1)] # 00:00 to 10:00
+        return {'_Series__data': SeriesColumns({
+            'timeVerified': [datetime.strftime(time, '%Y-%m-%dT%H:%M:%S') for time in times],
+            'dataValue': [str(i) for i in range(len(times))],
+        })}
+
+    coordinator = FetchCoordinator()
+    coordinator.register(('a',), hour(0), hour(5))
+    coordinator.register(('a',), hour(3) + timedelta(minutes=17), hour(10))
+
+    left = coordinator.fetch(('a',), hour(0), hour(5), six_minute_fetch)['_Series__data']['timeVerified']
+    right = coordinator.fetch(('a',), hour(3) + timedelta(minutes=17), hour(10), six_minute_fetch)['_Series__data']['timeVerified']
+
+    assert (left[0], left[-1], len(left)) == ('2025-01-01T00:00:00', '2025-01-01T05:54:00', 60)
+    assert right[0] == '2025-01-01T03:00:00' # The from-hour is read whole too
+
+
+def test_failed_fetch_is_shared():
+    calls = []
+    coordinator = FetchCoordinator()
+    coordinator.register(('a',), hour(0), hour(5))
+    coordinator.register(('a',), hour(2), hour(8))
+
+    def failing_fetch(from_time, to_time):
+        calls.append((from_time, to_time))
+        return None
+
+    assert coordinator.fetch(('a',), hour(0), hour(5), failing_fetch) is None
+    assert coordinator.fetch(('a',), hour(2), hour(8), failing_fetch) is None
+    assert len(calls) == 1
+
+
+def test_semaphore_inputs_use_run_fetcher(monkeypatch):
+    """Two SemaphoreInputs calls over overlapping ranges of the same series make one upstream request."""
+    urls = []
+    def fake_api_request(url, cache_ttl=None, series_columns=None):
+        urls.append(url)
+        return fake_fetch([])(hour(-6), hour(4))
+    monkeypatch.setattr(semaphore_inputs_module, 'api_request', fake_api_request)
+
+    thread_storage.logger = Logger()
+    run_storage.inputs_fetcher = FetchCoordinator()
+    try:
+        ref_time = datetime(2025, 1, 1, 0, 17)
+        calls = [
+            {"column_name": "Measurement", "location": "SBI", "source": "NOAATANDC", "series": "dAirTmp", "interval": 3600, "range": [-6, 0]},
+            {"column_name": "Later", "location": "SBI", "source": "NOAATANDC", "series": "dAirTmp", "interval": 3600, "range": [-2, 4]},
+        ]
+        for kwargs in calls: data_ingestion_register(ref_time, "SemaphoreInputs", kwargs)
+        frames = [data_ingestion_factory(DataFrame(), ref_time, "SemaphoreInputs", kwargs) for kwargs in calls]
+    finally:
+        run_storage.inputs_fetcher = None
+
+    assert len(urls) == 1
+    assert 'fromDateTime=2024123118/toDateTime=2025010104' in urls[0]
+    assert len(frames[0]) == 7 and frames[0].index[-1] == hour(0)
+    assert len(frames[1]) == 7 and frames[1].index[0] == hour(-2)
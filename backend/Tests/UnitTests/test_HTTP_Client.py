@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# test_HTTP_Client.py
+#-------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""This file tests the pooled keep-alive HTTPClient against a local server
+ """
+#----------------------------------
+#
+#
+
+import pytest
+import gzip
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from urllib.error import HTTPError, URLError
+from Ingestion.HTTP_Client import HTTPClient
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # keep-alive
+    client_ports = []
+
+    def do_GET(self):
+        Handler.client_ports.append(self.client_address[1])
+        if self.path.startswith('/missing'):
+            return self.respond(404, b'not found')
+        if self.path.startswith('/redirect'):
+            self.send_response(302)
+            self.send_header('Location', '/data')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.path.startswith('/slow'):
+            time.sleep(1)
+        body = json.dumps({'path': self.path, 'values': list(range(1000))}).encode()
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            return self.respond(200, gzip.compress(body), {'Content-Encoding': 'gzip'})
+        self.respond(200, body)
+
+    def respond(self, status, body, headers={}):
+        self.send_response(status)
+        for key, value in headers.items(): self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.client_ports = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections_are_reused_and_gzip_is_decoded(server):
+    client = HTTPClient()
+    for i in range(5):
+        body = json.loads(client.get(f'{server}/data?i={i}'))
+        assert body['path'] == f'/data?i={i}'
+        assert body['values'][-1] == 999
+    client.close()
+
+    assert len(Handler.client_ports) == 5
+    assert len(set(Handler.client_ports)) == 1 # Every request went over the same connection
+
+
+def test_error_status_raises_http_error(server):
+    client = HTTPClient()
+    with pytest.raises(HTTPError) as error:
+        client.get(f'{server}/missing')
+    assert error.value.status == 404
+
+
+def test_redirects_are_followed(server):
+    assert json.loads(HTTPClient().get(f'{server}/redirect'))['path'] == '/data'
+
+
+def test_read_timeout(server):
+    client = HTTPClient(read_timeout=0.2)
+    with pytest.raises(URLError):
+        client.get(f'{server}/slow')
+
+
+def test_unknown_scheme():
+    with pytest.raises(URLError):
+        HTTPClient().get('Noneinput/source=NOAATANDC')
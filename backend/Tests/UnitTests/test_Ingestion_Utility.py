@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# test_Ingestion_Utility.py
+#-------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""This file tests decoding Semaphore responses into column buffers, and assembling ingested series into one frame
+ """
+#----------------------------------
+#
+#
+
+import pytest
+import json
+from Ingestion.Ingestion_Utility import decode_response, SeriesColumns, assemble_frame, join_series
+from Ensemble import EnsembleArray
+from pandas import DataFrame, DatetimeIndex, Series, date_range
+from pandas.testing import assert_frame_equal
+
+
+def test_decode_response_keeps_only_series_columns():
+    body = json.dumps({
+        'isComplete': True,
+        'nonCompleteReason': None,
+        '_Series__data': [
+            {'timeVerified': '2025-01-01T00:00:00', 'dataValue': '1.5', 'unit': 'meter', 'latitude': '27.5'},
+            {'timeVerified': '2025-01-01T01:00:00', 'dataValue': None, 'unit': 'meter', 'latitude': '27.5'},
+        ]
+    }).encode()
+
+    response = decode_response(body, ('timeVerified', 'dataValue'))
+
+    data = response['_Series__data']
+    assert isinstance(data, SeriesColumns)
+    assert len(data) == 2
+    assert set(data.columns) == {'timeVerified', 'dataValue'}
+    assert data['dataValue'] == ['1.5', None]
+    assert data.take([1])['timeVerified'] == ['2025-01-01T01:00:00']
+    assert response['isComplete'] is True
+
+
+def test_decode_response_nested_and_empty_series():
+    body = json.dumps({
+        'model_a': {'isComplete': True, '_Series__data': [{'timeGenerated': '2025-01-01T00:00:00', 'leadTime': 3600, 'dataValue': [1, 2]}]},
+        'model_b': {'isComplete': False, '_Series__data': []},
+    }).encode()
+
+    response = decode_response(body, ('timeGenerated', 'leadTime', 'dataValue'))
+
+    assert response['model_a']['_Series__data']['dataValue'] == [[1, 2]]
+    assert len(response['model_b']['_Series__data']) == 0
+
+
+def test_decode_response_without_columns_is_plain_json():
+    assert decode_response(b'{"_Series__data": [{"dataValue": 1}]}') == {'_Series__data': [{'dataValue': 1}]}
+
+
+def joined_one_at_a_time(ingested: list[Series]) -> DataFrame:
+    df = DataFrame()
+    for series in ingested:
+        df = join_series(df, series)
+    return df
+
+
+def test_assemble_frame_matches_joins():
+    ingested = [
+        Series([3.0, 1.0, 2.0], index=DatetimeIndex(['2025-01-01 02:00', '2025-01-01 00:00', '2025-01-01 01:00']), name='unsorted'),
+        Series([1.0, 2.0], index=date_range('2025-01-01 01:00', periods=2, freq='2h'), name='sparse'),
+        Series(EnsembleArray.from_rows([[1.0, 2.0], [3.0]]), index=date_range('2024-12-31 23:00', periods=2, freq='1h'), name='ensemble'),
+        Series(index=DatetimeIndex([]), dtype=float, name='empty'),
+    ]
+
+    df = assemble_frame(ingested)
+
+    assert list(df.columns) == ['unsorted', 'sparse', 'ensemble', 'empty']
+    assert df.index.is_monotonic_increasing
+    assert_frame_equal(df, joined_one_at_a_time(ingested))
+
+
+def test_assemble_frame_duplicate_timestamps_fall_back_to_joins():
+    ingested = [
+        Series([1.0, 2.0], index=DatetimeIndex(['2025-01-01 00:00', '2025-01-01 00:00']), name='duplicated'),
+        Series([3.0], index=DatetimeIndex(['2025-01-01 01:00']), name='other'),
+    ]
+
+    assert_frame_equal(assemble_frame(ingested), joined_one_at_a_time(ingested))
+
+
+def test_assemble_frame_duplicate_columns_raise_like_joins():
+    ingested = [Series([1.0], index=DatetimeIndex(['2025-01-01']), name='a')] * 2
+    with pytest.raises(ValueError):
+        assemble_frame(ingested)
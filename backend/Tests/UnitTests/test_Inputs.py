@@ -50,3 +50,50 @@ def test_post_process_data(column_name: str, location: str, source: str, series:
     print(f'DF: {test_df}')
     assert True
 
+
+
+def test_add_data_converts_values_in_bulk(monkeypatch, capsys):
+    """Null datapoints become NaN quietly, unconvertible values become NaN and are reported once."""
+    from Ingestion.IngestionClasses import SemaphoreInputs as semaphore_inputs_module
+    from Ingestion.Ingestion_Utility import SeriesColumns
+
+    values = ['1.5', None, 'None', 'bad', '2', 'worse', '7']
+    times = [f'2025-01-01T{h:02d}:00:00' for h in range(len(values))]
+    fake_api_request = lambda url, cache_ttl=None, series_columns=None: {'isComplete': True, '_Series__data': SeriesColumns({'timeVerified': times, 'dataValue': values})}
+    monkeypatch.setattr(semaphore_inputs_module, 'api_request', fake_api_request)
+    thread_storage.logger = Logger()
+
+    kwargs = {"column_name": "Value", "location": "SBI", "source": "NOAATANDC", "series": "dAirTmp", "interval": 3600, "range": [0, 6]}
+    df = data_ingestion_factory(DataFrame(), datetime(2025, 1, 1), "SemaphoreInputs", kwargs)
+
+    assert len(df) == 7 and df.index[3] == datetime(2025, 1, 1, 3)
+    assert df['Value'].iloc[0] == 1.5 and df['Value'].iloc[4] == 2.0
+    assert all(value != value for value in df['Value'].iloc[[1, 2, 3, 5]]) # NaN
+    errors = capsys.readouterr().err
+    assert errors.count('could not be converted to float') == 1
+    assert "2 of 7 values" in errors and "'bad'" in errors
+
+
+@pytest.mark.parametrize("values", [
+    ['[1, 2.5, 3]', '[4]', 'None', '[]', '[5, 6]'],
+    ['[1, 2.5, 3]', '[4]', 'None', '[]', '[5, None, 6]'], # Not plain numbers, parsed row by row
+])
+def test_add_data_builds_ensemble_column(monkeypatch, values):
+    from Ingestion.IngestionClasses import SemaphoreInputs as semaphore_inputs_module
+    from Ingestion.Ingestion_Utility import SeriesColumns
+    from Ensemble import EnsembleArray
+
+    times = [f'2025-01-01T{h:02d}:00:00' for h in range(len(values))]
+    fake_api_request = lambda url, cache_ttl=None, series_columns=None: {'isComplete': True, '_Series__data': SeriesColumns({'timeVerified': times, 'dataValue': values})}
+    monkeypatch.setattr(semaphore_inputs_module, 'api_request', fake_api_request)
+    thread_storage.logger = Logger()
+
+    kwargs = {"column_name": "Ensemble", "location": "SBI", "source": "TWC", "series": "pAirTemp", "interval": 3600, "range": [0, 4], "ensemble_dtype": "float32"}
+    df = data_ingestion_factory(DataFrame(), datetime(2025, 1, 1), "SemaphoreInputs", kwargs)
+
+    assert isinstance(df['Ensemble'].array, EnsembleArray)
+    assert str(df['Ensemble'].dtype) == 'ensemble[float32]'
+    assert df['Ensemble'].array.members.shape == (5, 3)
+    assert df['Ensemble'].iloc[0] == [1.0, 2.5, 3.0]
+    assert df['Ensemble'].iloc[1] == [4.0]
+    assert df['Ensemble'].isna().tolist() == [False, False, True, True, False]
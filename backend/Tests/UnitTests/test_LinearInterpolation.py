@@ -464,3 +464,108 @@ def test_limit_integrity():
 
 
 
+
+
+def test_multiple_columns_match_single_calls():
+    """
+    Interpolating several columns in one call must match one call per column, in the same order.
+    Each column keeps its own gap mask (and its own limit when a limit map is used).
+    """
+    test_index = [
+        datetime(2025, 1, 1, 0, 10),
+        datetime(2025, 1, 1, 1, 40),
+        datetime(2025, 1, 1, 2, 15),
+        datetime(2025, 1, 1, 4, 50),
+        datetime(2025, 1, 1, 9, 0),
+    ]
+    test_df = DataFrame(data={
+        'a': [0.0, 1.0, nan, 5.0, 9.0],
+        'other': [1.0, 2.0, 3.0, 4.0, 5.0],
+        'b': [nan, 1.0, 2.0, nan, 9.0],
+    }, index=test_index)
+
+    limits = {'a': 10800, 'b': 21600}
+    expected_df = test_df.copy()
+    for name in ['b', 'a']:
+        expected_df = post_process_factory(expected_df, "LinearInterpolation", {"col_name": name, "interpolation_interval": 3600, "limit": limits[name]})
+
+    result_df = post_process_factory(test_df.copy(), "LinearInterpolation", {"col_name": ['b', 'a'], "interpolation_interval": 3600, "limit": limits})
+    pd.testing.assert_frame_equal(result_df, expected_df, rtol=1e-12, check_freq=False)
+    assert list(result_df.columns) == ['other', 'b', 'a']
+
+    # one limit for every column
+    result_df = post_process_factory(test_df.copy(), "LinearInterpolation", {"col_name": ['a', 'b'], "interpolation_interval": 3600, "limit": 10800})
+    expected_df = post_process_factory(test_df.copy(), "LinearInterpolation", {"col_name": 'a', "interpolation_interval": 3600, "limit": 10800})
+    expected_df = post_process_factory(expected_df, "LinearInterpolation", {"col_name": 'b', "interpolation_interval": 3600, "limit": 10800})
+    pd.testing.assert_frame_equal(result_df, expected_df, rtol=1e-12, check_freq=False)
+
+
+def test_limit_map_must_match_columns():
+    test_df = DataFrame(data={'a': [0.0, nan, 2.0], 'b': [0.0, nan, 2.0]}, index=date_range(datetime(2025, 1, 1), periods=3, freq='3600s'))
+
+    with pytest.raises(KeyError, match="one limit per column"):
+        post_process_factory(test_df, "LinearInterpolation", {"col_name": ['a', 'b'], "interpolation_interval": 3600, "limit": {'a': 7200}})
+
+
+def test_ensemble_members_are_interpolated():
+    """
+    Each member of an ensemble column is interpolated on its own, with the same limit semantics as a plain column.
+    Members that are missing in a row are filled from the same member in the rows around it.
+    """
+    import numpy as np
+    from Ensemble import EnsembleArray
+
+    test_index = date_range(datetime(2025, 1, 1, 0, 0), periods=7, freq='3600s')
+    test_df = DataFrame(data={
+        'ensemble': EnsembleArray.from_rows([[0.0, 10.0], None, [2.0, 12.0], [3.0, nan, 30.0], None, None, [6.0, 16.0]]).astype('ensemble[float32]'),
+        'scalar': [0.0, nan, 2.0, 3.0, nan, nan, 6.0],
+    }, index=test_index)
+
+    result_df = post_process_factory(test_df, "LinearInterpolation", {"col_name": ['ensemble', 'scalar'], "interpolation_interval": 3600, "limit": 7200})
+
+    # 00:00 - 02:00 = 2 hour gap -> interpolate
+    # 03:00 - 06:00 = 3 hour gap -> do not interpolate
+    # the second member is missing at 03:00 so it spans 02:00 - 06:00 and is not interpolated
+    # the third member only exists at 03:00 so it is never interpolated
+    assert str(result_df['ensemble'].dtype) == 'ensemble[float32]'
+    members = result_df['ensemble'].array.members
+    assert members[:3, :2].tolist() == [[0.0, 10.0], [1.0, 11.0], [2.0, 12.0]] and np.isnan(members[:3, 2]).all()
+    assert members[3, 0] == 3.0 and np.isnan(members[3, 1]) and members[3, 2] == 30.0
+    assert result_df['ensemble'].isna().tolist() == [False, False, False, False, True, True, False]
+    assert result_df['scalar'].tolist()[:3] == [0.0, 1.0, 2.0]
+
+    # list in cell columns are interpolated the same way and come back as an ensemble column
+    list_df = DataFrame(data={'lists': [[0.0, 10.0], nan, [2.0, 12.0]]}, index=test_index[:3])
+    result_df = post_process_factory(list_df, "LinearInterpolation", {"col_name": 'lists', "interpolation_interval": 3600, "limit": 7200})
+    assert isinstance(result_df['lists'].array, EnsembleArray)
+    assert result_df['lists'].tolist() == [[0.0, 10.0], [1.0, 11.0], [2.0, 12.0]]
+
+
+def test_matches_pandas_time_interpolation_exactly():
+    """
+    The filled values must be bit for bit what Series.interpolate(method='time') gives, not just close.
+    """
+    import numpy as np
+    rng = np.random.default_rng(1)
+    test_index = pd.DatetimeIndex(sorted(datetime(2025, 1, 1) + pd.Timedelta(minutes=int(m)) for m in rng.choice(24 * 60, 40, replace=False)))
+    test_df = DataFrame(data={'test_col': np.round(rng.normal(1.5, 0.4, 40), 1)}, index=test_index)
+
+    result_df = post_process_factory(test_df.copy(), "LinearInterpolation", {"col_name": "test_col", "interpolation_interval": 360, "limit": 86400})
+
+    # What the original implementation did, every gap is under the limit
+    target_index = date_range(test_index[0], test_index[-1], freq='360s')
+    expected = test_df['test_col'].reindex(test_index.union(target_index)).interpolate(limit_area="inside", method="time").reindex(target_index)
+    pd.testing.assert_series_equal(result_df['test_col'].reindex(target_index), expected, check_exact=True, check_freq=False)
+
+
+def test_object_column_of_numbers_stays_numeric():
+    """
+    An object column of plain numbers (ex. ingested with None for missing values) is a plain column, not an ensemble.
+    """
+    test_index = date_range(datetime(2025, 1, 1, 0, 0), periods=4, freq='3600s')
+    test_df = DataFrame(data={'test_col': pd.Series([1.0, None, None, 4.0], index=test_index, dtype=object)})
+
+    result_df = post_process_factory(test_df, "LinearInterpolation", {"col_name": "test_col", "interpolation_interval": 3600, "limit": 21600})
+
+    assert result_df['test_col'].dtype == float
+    assert result_df['test_col'].tolist() == [1.0, 2.0, 3.0, 4.0]
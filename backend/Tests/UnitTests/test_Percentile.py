@@ -138,3 +138,46 @@ def test_invalid_percentile_type(percentile):
 
     with pytest.raises(ValueError, match=f"Percentile '{percentile}' must be an integer."):
         post_process_factory(test_df.copy(), call, kwargs)
+
+
+# ------------------------------------------
+# this runs test_multiple_percentiles to check several percentiles in one call
+# ------------------------------------------
+def test_multiple_percentiles():
+    """
+    This function tests the list form against np.nanpercentile, on an ensemble column
+    with ragged rows, missing members and a row with no members.
+    """
+    from Ensemble import EnsembleArray
+
+    rng = np.random.default_rng(0)
+    rows = [list(rng.normal(20, 3, size=n)) for n in (1, 2, 5, 21, 50)] + [None, [1.0, np.nan, 3.0]]
+    df = pd.DataFrame({"Ensemble": EnsembleArray.from_rows(rows)})
+    percentiles = [0, 5, 25, 50, 75, 95, 100]
+    output_keys = [f"{p}th" for p in percentiles]
+
+    result_df = post_process_factory(df, "Percentile", {"col_key": "Ensemble", "percentile": percentiles, "output_col_key": output_keys})
+
+    for p, key in zip(percentiles, output_keys):
+        expected = [np.nanpercentile(row, p) if row is not None else np.nan for row in rows]
+        np.testing.assert_allclose(result_df[key].to_numpy(), expected, rtol=0, atol=1e-12)
+
+
+def test_percentile_output_keys_must_match():
+    with pytest.raises(ValueError, match="one output column key per percentile"):
+        post_process_factory(test_df.copy(), "Percentile", {"col_key": "Temperature Prediction", "percentile": [5, 95], "output_col_key": ["5th"]})
+
+
+def test_many_percentiles_do_not_fragment_the_frame():
+    import warnings
+    from pandas.errors import PerformanceWarning
+
+    df = pd.DataFrame({"Values": [[1.0, 2.0, 3.0], [4.0, 5.0], 6.0, None]})
+    percentiles = list(range(101))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", PerformanceWarning)
+        result_df = post_process_factory(df, "Percentile", {"col_key": "Values", "percentile": percentiles, "output_col_key": [f"{p}th" for p in percentiles]})
+
+    assert result_df["50th"].tolist()[:3] == [2.0, 4.5, 6.0] # A scalar cell is one member, its percentiles are the value itself
+    assert np.isnan(result_df["50th"].iloc[3])
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# test_PluginRegistry.py
+#-------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""This file tests the plugin registry used by the ingestion and post processing factories
+ """
+#----------------------------------
+#
+#
+
+import pytest
+import PluginRegistry as plugin_registry_module
+from PluginRegistry import PluginRegistry, method_signature
+from PostProcessing.PostProcessingClasses.Combine import Combine
+from Ingestion.IngestionClasses.SemaphoreInputs import SemaphoreInputs
+
+
+def counting_registry(monkeypatch, package: str, plugin_package: str) -> tuple[PluginRegistry, list[str]]:
+    imports = []
+    real_import_module = plugin_registry_module.import_module
+    def import_module(name, package=None):
+        imports.append(name)
+        return real_import_module(name, package)
+    monkeypatch.setattr(plugin_registry_module, 'import_module', import_module)
+    return PluginRegistry(package, plugin_package), imports
+
+
+def test_classes_are_imported_once(monkeypatch):
+    registry, imports = counting_registry(monkeypatch, 'PostProcessing', 'PostProcessingClasses')
+
+    assert registry.get_class('Combine') is Combine
+    assert registry.get_class('Combine') is Combine
+    assert imports == ['.PostProcessingClasses.Combine']
+
+
+def test_stateless_instances_are_shared():
+    post_processing = PluginRegistry('PostProcessing', 'PostProcessingClasses')
+    assert post_processing.get_instance('Combine') is post_processing.get_instance('Combine')
+
+    # SemaphoreInputs keeps the request on self, every call gets its own instance
+    ingestion = PluginRegistry('Ingestion', 'IngestionClasses')
+    first, second = ingestion.get_instance('SemaphoreInputs'), ingestion.get_instance('SemaphoreInputs')
+    assert isinstance(first, SemaphoreInputs) and first is not second
+
+
+def test_available_does_not_import(monkeypatch):
+    registry, imports = counting_registry(monkeypatch, 'Ingestion', 'IngestionClasses')
+
+    assert registry.available() == ['SemaphoreInputs', 'SemaphoreOutputLatest']
+    assert all(name == 'Ingestion' for name in imports)
+
+
+def test_unknown_key_lists_available():
+    registry = PluginRegistry('Ingestion', 'IngestionClasses')
+    with pytest.raises(ModuleNotFoundError, match='SemaphoreOutputLatest'):
+        registry.get_class('NotAPlugin')
+
+
+def test_method_signature_is_cached():
+    assert method_signature(Combine, 'post_process') is method_signature(Combine, 'post_process')
+    assert 'col_keys' in method_signature(Combine, 'post_process').parameters
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# test_Response_Cache.py
+#-------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""This file tests the on disk ResponseCache and its use by api_request
+ """
+#----------------------------------
+#
+#
+
+import pytest
+import json
+import time
+from Ingestion.Response_Cache import ResponseCache, normalize_url
+from Ingestion import Ingestion_Utility
+from runtimeContext import thread_storage, run_storage
+from DataClasses import Logger
+
+
+def test_normalize_url():
+    assert normalize_url('HTTPS://Example.com/output_latest/?modelNames=b&modelNames=a') == 'https://example.com/output_latest/?modelNames=a&modelNames=b'
+    assert normalize_url('https://example.com/input/source=TWC/toDateTime=2025010100?') == 'https://example.com/input/source=TWC/toDateTime=2025010100'
+
+
+def test_hits_misses_and_expiry(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache' / 'responses.sqlite'))
+    assert cache.get('https://example.com/a') == (False, None)
+
+    cache.put('https://example.com/a', b'{"a": 1}', ttl=60)
+    cache.put('https://example.com/expired', b'{}', ttl=-1)
+    cache.put_failure('https://example.com/broken', ttl=60)
+
+    assert cache.get('https://EXAMPLE.com/a') == (True, b'{"a": 1}')
+    assert cache.get('https://example.com/expired') == (False, None)
+    assert cache.get('https://example.com/broken') == (True, None)
+    assert (cache.hits, cache.misses, cache.negative_hits) == (1, 2, 1)
+
+    # Entries persist across cache objects (and processes)
+    assert ResponseCache(cache.path).get('https://example.com/a') == (True, b'{"a": 1}')
+
+
+def test_api_request_uses_cache(monkeypatch, tmp_path):
+    requested = []
+    def fake_get(url):
+        requested.append(url)
+        if 'broken' in url: raise ConnectionError('refused')
+        return json.dumps({'url': url}).encode()
+    monkeypatch.setattr(Ingestion_Utility.http_client, 'get', fake_get)
+
+    thread_storage.logger = Logger()
+    run_storage.response_cache = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    try:
+        for _ in range(3):
+            assert Ingestion_Utility.api_request('https://example.com/a', cache_ttl=60) == {'url': 'https://example.com/a'}
+            assert Ingestion_Utility.api_request('https://example.com/broken', cache_ttl=60) is None
+            Ingestion_Utility.api_request('https://example.com/uncached')
+    finally:
+        run_storage.response_cache = None
+
+    assert requested.count('https://example.com/a') == 1
+    assert requested.count('https://example.com/broken') == 1 # The failure is cached as a negative entry
+    assert requested.count('https://example.com/uncached') == 3
+
+
+def test_corrupt_cached_response_is_fetched_again(monkeypatch, tmp_path):
+    requested = []
+    def fake_get(url):
+        requested.append(url)
+        return b'{"a": 1}'
+    monkeypatch.setattr(Ingestion_Utility.http_client, 'get', fake_get)
+
+    thread_storage.logger = Logger()
+    run_storage.response_cache = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    try:
+        run_storage.response_cache.put('https://example.com/a', b'{"a": 1', ttl=60) # Truncated
+        assert Ingestion_Utility.api_request('https://example.com/a', cache_ttl=60) == {'a': 1}
+        assert run_storage.response_cache.get('https://example.com/a') == (True, b'{"a": 1}') # Replaced by the live response
+    finally:
+        run_storage.response_cache = None
+
+    assert requested == ['https://example.com/a']
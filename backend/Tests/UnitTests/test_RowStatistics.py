@@ -13,6 +13,7 @@ from pandas.testing import assert_frame_equal
 from PostProcessing.IPostProcessing import post_process_factory
 from io import StringIO
 from datetime import datetime
+import numpy as np
 
 # ---------- Mock array of values----------
 test_data = [
@@ -117,3 +118,47 @@ def test_row_statistics_min_and_max_only():
 
     assert_frame_equal(result_df.sort_index(axis=1).reset_index(drop=True),
                        expected_df.sort_index(axis=1).reset_index(drop=True), atol=1e-5)
+
+# ---------- MEAN, STD AND COUNT ----------
+def test_row_statistics_mean_std_count():
+    call = "RowStatistics"
+    kwargs = {
+        "metrics": ["mean", "std", "count"],
+        "col_name": "Water Temperature Prediction"
+    }
+
+    result_df = post_process_factory(base_df.copy(), call, kwargs)
+
+    lists = base_df["Water Temperature Prediction"]
+    assert result_df["Water Temperature Prediction Mean"].tolist() == pytest.approx([np.mean(v) for v in lists])
+    assert result_df["Water Temperature Prediction Std"].tolist() == pytest.approx([np.std(v) for v in lists])
+    assert result_df["Water Temperature Prediction Count"].tolist() == [3] * len(lists)
+
+# ---------- SAMPLE STD ----------
+def test_row_statistics_sample_std():
+    kwargs = {"metrics": ["std"], "col_name": "Water Temperature Prediction", "ddof": 1}
+
+    result_df = post_process_factory(base_df.copy(), "RowStatistics", kwargs)
+
+    lists = base_df["Water Temperature Prediction"]
+    assert result_df["Water Temperature Prediction Std"].tolist() == pytest.approx([np.std(v, ddof=1) for v in lists])
+
+# ---------- ENSEMBLE COLUMN WITH RAGGED AND MISSING ROWS ----------
+def test_row_statistics_ensemble_column():
+    from Ensemble import EnsembleArray
+    df = pd.DataFrame({"Ensemble": EnsembleArray.from_rows([[3, 1, 2], [5, 4], None, [7]])})
+
+    result_df = post_process_factory(df, "RowStatistics", {"metrics": ["median", "min", "max", "count"], "col_name": "Ensemble"})
+
+    assert_frame_equal(result_df[["Ensemble Median", "Ensemble Max", "Ensemble Min"]], pd.DataFrame({
+        "Ensemble Median": [2.0, 4.5, np.nan, 7.0],
+        "Ensemble Max": [3.0, 5.0, np.nan, 7.0],
+        "Ensemble Min": [1.0, 4.0, np.nan, 7.0],
+    }))
+    assert result_df["Ensemble Count"].tolist() == [3, 2, 0, 1]
+    assert result_df is df # Columns are added in place, the frame is not copied
+
+# ---------- NO METRICS ----------
+def test_row_statistics_no_metrics():
+    with pytest.raises(ValueError):
+        post_process_factory(base_df.copy(), "RowStatistics", {"metrics": [], "col_name": "Water Temperature Prediction"})
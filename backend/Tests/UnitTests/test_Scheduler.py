@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# test_Scheduler.py
+#-------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""This file tests the CSPEC_Scheduler used by the flare daemon
+ """
+#----------------------------------
+#
+#
+
+import pytest
+import json
+import os
+from datetime import datetime
+from Scheduler import CSPEC_Scheduler
+
+
+def write_cspec(path, schedule=None):
+    cspec = {
+        "chart_name": "test",
+        "CSPEC_version": "1.0.0",
+        "data_requests": [],
+        "post_processing": [],
+        "csv_config": {"csv_name": "test.csv", "included_columns": []}
+    }
+    if schedule is not None: cspec["schedule"] = schedule
+    with open(path, 'w') as file:
+        json.dump(cspec, file)
+
+
+@pytest.mark.parametrize("schedule, now, expected", [
+    ({"interval": 900, "offset": 0}, datetime(2025, 1, 1, 10, 7, 30), datetime(2025, 1, 1, 10, 15)),   # */15
+    ({"interval": 900, "offset": 0}, datetime(2025, 1, 1, 10, 15), datetime(2025, 1, 1, 10, 30)),      # exactly on a tick goes to the next one
+    ({"interval": 1800, "offset": 0}, datetime(2025, 1, 1, 23, 45), datetime(2025, 1, 2, 0, 0)),       # 0,30 rolls over midnight
+    ({"interval": 3600, "offset": 300}, datetime(2025, 1, 1, 10, 1), datetime(2025, 1, 1, 10, 5)),     # 5 * * * *
+])
+def test_next_run_time(schedule, now, expected):
+    assert CSPEC_Scheduler.next_run_time(schedule, now) == expected
+
+
+def test_schedule_sources_and_reload(tmp_path):
+    """Tests that CSPECs are loaded with the right schedule, run once when due, and reloaded only when changed."""
+    write_cspec(tmp_path / 'declared.json', {"interval": 1800})
+    write_cspec(tmp_path / 'default.json')
+    write_cspec(tmp_path / 'overridden.json', {"interval": 1800})
+    schedule_file = tmp_path / 'schedules.json.txt'
+    schedule_file.write_text(json.dumps({"overridden.json": {"interval": 60}}))
+
+    runs = []
+    scheduler = CSPEC_Scheduler(str(tmp_path), lambda due: runs.extend(due), {"interval": 900, "offset": 0}, str(schedule_file))
+    scheduler.refresh()
+
+    entries = {os.path.basename(entry.path): entry for entry in scheduler._CSPEC_Scheduler__entries.values()}
+    assert entries['declared.json'].schedule == {"interval": 1800, "offset": 0}
+    assert entries['default.json'].schedule == {"interval": 900, "offset": 0}
+    assert entries['overridden.json'].schedule == {"interval": 60, "offset": 0}
+
+    # An unchanged file keeps its parsed CSPEC object
+    declared = entries['declared.json'].CSPEC
+    scheduler.refresh()
+    assert scheduler._CSPEC_Scheduler__entries[str(tmp_path / 'declared.json')].CSPEC is declared
+
+    # A changed file is reparsed, a deleted file is dropped
+    write_cspec(tmp_path / 'declared.json', {"interval": 600})
+    os.utime(tmp_path / 'declared.json', (0, 0))
+    os.remove(tmp_path / 'default.json')
+    scheduler.refresh()
+    entries = {os.path.basename(entry.path): entry for entry in scheduler._CSPEC_Scheduler__entries.values()}
+    assert entries['declared.json'].CSPEC is not declared
+    assert entries['declared.json'].schedule == {"interval": 600, "offset": 0}
+    assert 'default.json' not in entries
+
+
+def test_broken_cspec_is_skipped(tmp_path):
+    (tmp_path / 'broken.json').write_text('{not json')
+    write_cspec(tmp_path / 'good.json')
+
+    scheduler = CSPEC_Scheduler(str(tmp_path), lambda due: None, {"interval": 900, "offset": 0})
+    scheduler.refresh()
+
+    assert list(scheduler._CSPEC_Scheduler__entries) == [str(tmp_path / 'good.json')]
+
+
+def test_cspec_without_schedule_is_not_run(tmp_path):
+    write_cspec(tmp_path / 'scheduled.json', {"interval": 900})
+    write_cspec(tmp_path / 'unscheduled.json')
+
+    scheduler = CSPEC_Scheduler(str(tmp_path), lambda due: None)
+    scheduler.refresh()
+    assert list(scheduler._CSPEC_Scheduler__entries) == [str(tmp_path / 'scheduled.json')]
+
+    # It is scheduled once it declares a schedule
+    write_cspec(tmp_path / 'unscheduled.json', {"interval": 900})
+    os.utime(tmp_path / 'unscheduled.json', (0, 0))
+    scheduler.refresh()
+    assert str(tmp_path / 'unscheduled.json') in scheduler._CSPEC_Scheduler__entries
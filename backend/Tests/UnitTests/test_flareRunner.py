@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# test_flareRunner.py
+#-------------------------------
+# Created By: Flare Team
+#----------------------------------
+"""This file tests running several CSPECs with the flareRunner worker pool
+ """
+#----------------------------------
+#
+#
+
+import pytest
+import time
+import json
+import flareRunner
+from runtimeContext import thread_storage
+
+
+def fake_generate_csv(cspec_file_path, verbose=False, parsed_CSPEC=None, reference_time=None):
+    """Stands in for a real pipeline, sleeps like a network bound CSPEC and fails for paths containing 'bad'."""
+    assert thread_storage.logger.chart_name in cspec_file_path # Each CSPEC has its own logger
+    time.sleep(0.2)
+    if 'bad' in cspec_file_path:
+        raise RuntimeError('Failed on purpose')
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_run_cspecs_isolates_failures(monkeypatch, workers):
+    monkeypatch.setattr(flareRunner, 'generate_csv', fake_generate_csv)
+    paths = ['a.json', 'bad.json', 'c.json']
+
+    results = flareRunner.run_cspecs([(path, None) for path in paths], workers=workers)
+
+    assert [path for path, _, _ in results] == paths
+    assert [ok for _, ok, _ in results] == [True, False, True]
+    assert all(seconds >= 0.2 for _, _, seconds in results)
+
+
+def test_run_cspecs_runs_concurrently(monkeypatch):
+    intervals = []
+    def timed_generate_csv(cspec_file_path, *args, **kwargs):
+        start = time.perf_counter()
+        fake_generate_csv(cspec_file_path, *args, **kwargs)
+        intervals.append((start, time.perf_counter()))
+    monkeypatch.setattr(flareRunner, 'generate_csv', timed_generate_csv)
+    paths = [f'{i}.json' for i in range(4)]
+
+    flareRunner.run_cspecs([(path, None) for path in paths], workers=4)
+
+    # Every CSPEC started before any of them finished, so they all ran at the same time
+    assert len(intervals) == len(paths)
+    assert max(start for start, _ in intervals) < min(end for _, end in intervals)
+
+
+def test_ingestion_calls_run_concurrently_and_join_in_order(monkeypatch, tmp_path):
+    """Slower calls listed first must still end up first in the frame, and the calls must all be in flight at the same time."""
+    from pandas import Series, date_range, read_csv
+    from DataClasses import Call, CSPEC, Logger
+    from Ingestion.I_Ingestion import IDataIngestion
+    import CSPEC_Planner
+
+    intervals = []
+    def fake_series_factory(ref_time, key, kwargs):
+        start = time.perf_counter()
+        time.sleep(kwargs['delay'])
+        intervals.append((start, time.perf_counter()))
+        index = date_range(ref_time, periods=3, freq=kwargs['freq'])
+        return Series([kwargs['delay']] * 3, index=index, name=kwargs['column_name'])
+
+    class Fake(IDataIngestion):
+        def ingest_data(self, data, ref_time, column_name, delay, freq):
+            raise NotImplementedError
+        def output_columns(self, column_name, **kwargs):
+            return [column_name]
+
+    monkeypatch.setattr(flareRunner, 'data_ingestion_series_factory', fake_series_factory)
+    monkeypatch.setattr(CSPEC_Planner, 'data_ingestion_class', lambda key: Fake) # Lets the planner check the fake calls
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data' / 'csv').mkdir(parents=True)
+    thread_storage.logger = Logger('test')
+
+    columns = ['slow', 'medium', 'fast']
+    requests = [
+        Call('Fake', kwargs={'column_name': 'slow', 'delay': 0.3, 'freq': '1h'}),
+        Call('Fake', kwargs={'column_name': 'medium', 'delay': 0.2, 'freq': '2h'}),
+        Call('Fake', kwargs={'column_name': 'fast', 'delay': 0.1, 'freq': '1h'}),
+    ]
+    cspec = CSPEC('test', requests, [], 'test.csv', columns)
+
+    flareRunner.generate_csv('test.json', parsed_CSPEC=cspec)
+
+    result = read_csv(tmp_path / 'data' / 'csv' / 'test.csv', index_col='Date')
+    assert list(result.columns) == columns
+    assert len(result) == 4 # union of the hourly and two hourly timestamps
+    assert max(start for start, _ in intervals) < min(end for _, end in intervals) # Every call started before any finished
+
+    with open(tmp_path / 'data' / 'csv' / 'manifest.json') as manifest_file:
+        entry = json.load(manifest_file)['files']['test.csv']
+    assert entry['rows'] == 4
+    assert entry['null_counts'] == {'slow': 1, 'medium': 1, 'fast': 1}
+
+
+def test_unused_ingestion_keeps_its_rows(monkeypatch, tmp_path):
+    """A call whose column is not exported still adds its timestamps to the CSV, the same as before planning."""
+    from pandas import Series, date_range, read_csv
+    from DataClasses import Call, CSPEC, Logger
+    from Ingestion.I_Ingestion import IDataIngestion
+    import CSPEC_Planner
+
+    def fake_series_factory(ref_time, key, kwargs):
+        index = date_range(ref_time, periods=3, freq=kwargs['freq'])
+        return Series([1.0] * 3, index=index, name=kwargs['column_name'])
+
+    class Fake(IDataIngestion):
+        def ingest_data(self, data, ref_time, column_name, freq):
+            raise NotImplementedError
+        def output_columns(self, column_name, **kwargs):
+            return [column_name]
+
+    monkeypatch.setattr(flareRunner, 'data_ingestion_series_factory', fake_series_factory)
+    monkeypatch.setattr(CSPEC_Planner, 'data_ingestion_class', lambda key: Fake)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data' / 'csv').mkdir(parents=True)
+    thread_storage.logger = Logger('test')
+
+    requests = [Call('Fake', kwargs={'column_name': 'hourly', 'freq': '1h'}), Call('Fake', kwargs={'column_name': 'unused', 'freq': '2h'})]
+    flareRunner.generate_csv('test.json', parsed_CSPEC=CSPEC('test', requests, [], 'test.csv', ['hourly']))
+
+    result = read_csv(tmp_path / 'data' / 'csv' / 'test.csv', index_col='Date')
+    assert list(result.columns) == ['hourly']
+    assert len(result) == 4 # The 4 hour row only comes from the unused call
+
+
+def test_unusable_cache_path_runs_without_cache(monkeypatch, tmp_path):
+    """A cache path that can not be created must not stop the run, it goes to the API instead."""
+    from runtimeContext import run_storage
+    (tmp_path / 'not_a_directory').write_text('')
+    cache_path = tmp_path / 'not_a_directory' / 'responses.sqlite'
+
+    runs = []
+    monkeypatch.setattr(flareRunner, 'run_cspecs', lambda cspecs, verbose, workers: runs.append(run_storage.response_cache))
+    monkeypatch.setattr('sys.argv', ['flareRunner.py', '-c', 'test.json', '--cache_path', str(cache_path)])
+
+    flareRunner.main()
+
+    assert runs == [None]
@@ -10,43 +10,68 @@
 #
 #Imports
 from CSPEC_Parser import CSPEC_Parser
-from DataClasses import Logger
+from CSPEC_Planner import plan_CSPEC
+from DataClasses import Call, CSPEC, Logger
+from Scheduler import CSPEC_Scheduler
 from datetime import datetime
-from pandas import DataFrame
-from runtimeContext import thread_storage
+from pandas import DataFrame, Series
+from runtimeContext import thread_storage, run_storage
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from hashlib import sha256
 import os
 import argparse
-from Ingestion.I_Ingestion import data_ingestion_factory
+import sqlite3
+import signal
+from Ingestion.I_Ingestion import data_ingestion_series_factory, data_ingestion_register
+from Ingestion.Ingestion_Utility import assemble_frame
+from Export.Export_Utility import ExportTable, manifest_entry, update_manifest, write_if_changed
+from Export.I_Export import export_factory, export_file_name
+from Ingestion.Fetch_Coordinator import FetchCoordinator
+from Ingestion.Response_Cache import ResponseCache
 from PostProcessing.IPostProcessing import post_process_factory
 
-def generate_csv(cspec_file_path: str, verbose: bool = False) -> None:
+# The most ingestion requests a single CSPEC will have in flight at once
+MAX_INGESTION_WORKERS = 8
+
+# Export bookkeeping (hash sidecars, the manifest lock) is kept out of ./data/csv, which nginx serves
+EXPORT_STATE_DIR = './data/export_state'
+
+def generate_csv(cspec_file_path: str, verbose: bool = False, parsed_CSPEC: CSPEC | None = None, reference_time: datetime | None = None) -> None:
     
-    # Parse CSPEC
-    try:
-        CSPEC = CSPEC_Parser(cspec_file_path).parse_CSPEC()
-    except Exception as e:
-        raise RuntimeError(f"Failed to parse CSPEC: {cspec_file_path}") from e
+    # Parse CSPEC, the daemon passes in an already parsed CSPEC so it is only parsed when its file changes
+    if parsed_CSPEC is not None:
+        CSPEC = parsed_CSPEC
+    else:
+        try:
+            CSPEC = CSPEC_Parser(cspec_file_path).parse_CSPEC()
+        except Exception as e:
+            raise RuntimeError(f"Failed to parse CSPEC: {cspec_file_path}") from e
         
     logger = thread_storage.logger
 
-    # Initialize reference data and data structures
-    reference_time = datetime.now()
-    reference_time = reference_time.replace(second=0, microsecond=0)
+    # Check every call and drop the ones that do not reach the CSV, before any request is made
+    plan = plan_CSPEC(CSPEC)
+    for stage, call, reason in plan.dropped:
+        logger.log_info(f'Skipping {stage} call {call.call_key}: {reason}')
 
-    df = DataFrame()
+    # Initialize reference data and data structures, CSPECs in the same run share a reference time
+    if reference_time is None: reference_time = datetime.now()
+    reference_time = reference_time.replace(second=0, microsecond=0)
 
     # Run Ingestion
     
     logger.log_info(f'------------Init Ingestion Calls-------------')
-    for ingestion_call in CSPEC.data_requests:
+    for ingestion_call in plan.data_requests:
         logger.log_info(f'\tIngestion Call: {ingestion_call.call_key}')
         logger.log_info(f'\t\tkwargs: {ingestion_call.kwargs}')
-        try:
-            df = data_ingestion_factory(data=df, ref_time=reference_time, key=ingestion_call.call_key, **ingestion_call.kwargs)
-        except Exception as e:
-            raise RuntimeError(f"Ingestion failed for call={ingestion_call.call_key}") from e
-        
-        if verbose: logger.log_info(f'\n{df}')
+
+    # Every call fetches its own series at the same time, then they are assembled into one frame in CSPEC order
+    df = assemble_frame(run_ingestion_calls(plan.data_requests, reference_time))
+    if verbose: logger.log_info(f'\n{df}')
+
+    # Columns only kept for their rows
+    free_columns(df, plan.free_after_ingestion)
         
     logger.log_info(f'Ingestion data columns:\n {df.columns}')
 
@@ -56,17 +81,21 @@ def generate_csv(cspec_file_path: str, verbose: bool = False) -> None:
     logger.log_info('Init Post Process Calls...')
   
     # Run PostProcessing
-    for post_processing_call in CSPEC.post_processing:
+    for step in plan.post_processing:
+        post_processing_call = step.call
         logger.log_info(f'\tPost Processing Call: {post_processing_call.call_key}')
         logger.log_info(f'\t\tkwargs: {post_processing_call.kwargs}')
         try:
-            df = post_process_factory(data=df, key=post_processing_call.call_key, **post_processing_call.kwargs)
+            df = post_process_factory(data=df, key=post_processing_call.call_key, **post_processing_call.kwargs, ref_time=reference_time)
         except IndexError as e:
             raise IndexError(f"IndexError during post processing ({post_processing_call.call_key}). A required DataFrame column may be empty.") from e
         except ValueError as e:
             raise ValueError(f"ValueError during post processing ({post_processing_call.call_key})") from e
         except Exception as e:
             raise RuntimeError(f"Unexpected error during post processing ({post_processing_call.call_key})") from e
+
+        # Intermediate columns are freed as soon as no later step needs them
+        free_columns(df, step.free_after)
         
         if verbose: logger.log_info(f'\n{df}')
         
@@ -77,25 +106,205 @@ def generate_csv(cspec_file_path: str, verbose: bool = False) -> None:
     
     # Rename the index to "Date"
     df.index.name = "Date" 
-    # Export CSV
+    # Export the CSV, and any other formats declared in the csv_config, from one shared table
     logger.log_info('Init csv export...')
-    export_path = f'./data/csv/{CSPEC.csv_name}'
-    logger.log_info(f'Exporting to {export_path}...')
-
     for col in CSPEC.included_columns:
         logger.log_info('\t' + col) 
-    
-    
-    try:
-        df[CSPEC.included_columns].to_csv(export_path)
-    except FileNotFoundError as e:
-        raise FileNotFoundError(f"CSV export failed for path={export_path}") from e
-    logger.log_info(f"CSV successfully generated at {export_path}")
+
+    table = ExportTable(df[CSPEC.included_columns])
+    precompress = getattr(run_storage, 'precompress', False)
+
+    # Every file and its manifest entry are built before any file is written, a failure leaves the old files and manifest as they were
+    exports, manifest_entries = [], {}
+    for export_call in [Call('CSV', kwargs={'file_name': CSPEC.csv_name}), *CSPEC.exports]:
+        export_kwargs = export_call.kwargs.get('kwargs', {})
+        file_name = export_file_name(CSPEC.csv_name, export_call.call_key, export_kwargs)
+        content = export_factory(table, export_call.call_key, export_kwargs)
+        digest = sha256(content).hexdigest()
+        exports.append((export_call.call_key, f'./data/csv/{file_name}', content, digest))
+        manifest_entries[file_name] = manifest_entry(table, digest, len(content), reference_time, datetime.now())
+
+    os.makedirs(EXPORT_STATE_DIR, exist_ok=True)
+    for call_key, export_path, content, digest in exports:
+        logger.log_info(f'Exporting to {export_path}...')
+
+        # Written atomically (with its compressed sidecars), and not at all when the content has not changed since the last export
+        try:
+            written = write_if_changed(export_path, content, precompress, digest, EXPORT_STATE_DIR)
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"{call_key} export failed for path={export_path}") from e
+        if written:
+            logger.log_info(f"{call_key} successfully generated at {export_path}")
+        else:
+            logger.log_info(f"{call_key} at {export_path} is unchanged, skipped writing it")
+
+    # Every run is recorded, even when nothing changed, so the manifest also shows how fresh each chart is
+    update_manifest('./data/csv', manifest_entries, EXPORT_STATE_DIR)
     logger.log_info("============ CSV Export Complete ===================")
        
     
 
 
+def free_columns(df: DataFrame, columns: list[str]) -> None:
+    """ Removes columns from a DataFrame in place, skipping any that are not there."""
+    for column in columns:
+        if column in df.columns: del df[column]
+
+
+def run_ingestion_calls(data_requests: list[Call], reference_time: datetime) -> list[Series | DataFrame]:
+    """ Runs every ingestion call at the same time, each returning its own series, so the slowest
+    request sets the ingestion latency instead of the sum of all of them.
+        :param data_requests: list[Call] - The ingestion calls from the CSPEC.
+        :param reference_time: datetime - The datetime to base the ingestion off of.
+        :return list[Series | DataFrame] - The ingested series, in the same order as data_requests.
+    """
+    logger = thread_storage.logger
+
+    def ingest(ingestion_call: Call) -> Series | DataFrame:
+        thread_storage.logger = logger # The pool threads log as the CSPEC that owns them
+        return data_ingestion_series_factory(ref_time=reference_time, key=ingestion_call.call_key, **ingestion_call.kwargs)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(data_requests), MAX_INGESTION_WORKERS)), thread_name_prefix='flare-ingestion') as pool:
+        futures = [pool.submit(ingest, ingestion_call) for ingestion_call in data_requests]
+
+    results = []
+    for ingestion_call, future in zip(data_requests, futures):
+        try:
+            results.append(future.result())
+        except Exception as e:
+            raise RuntimeError(f"Ingestion failed for call={ingestion_call.call_key}") from e
+    return results
+
+
+def run_cspec(cspec_path: str, verbose: bool = False, parsed_CSPEC: CSPEC | None = None, reference_time: datetime | None = None) -> bool:
+    """ Runs a single CSPEC with its own logger, logging instead of raising any failure so one
+    failing CSPEC never stops the others.
+        :param cspec_path: str - The path of the CSPEC file.
+        :param verbose: bool - Exports the DataFrame after each step.
+        :param parsed_CSPEC: CSPEC | None - An already parsed CSPEC, skips parsing the file.
+        :param reference_time: datetime | None - The reference time of the run, defaults to now.
+        :return bool - True if the CSV was generated.
+    """
+    cspec_name = os.path.splitext(os.path.basename(cspec_path))[0] 
+    thread_storage.logger = Logger(cspec_name)
+    logger = thread_storage.logger
+    logger.log_info('')
+    logger.log_info("============ Running Flare ============")
+    logger.log_info(f"---- Attempting CSPEC: {cspec_name} ----")
+    try:
+        generate_csv(cspec_path, verbose, parsed_CSPEC, reference_time)
+        return True
+    except Exception as e:
+        
+        logger = thread_storage.logger
+        logger.log_error(message=f"Pipeline failed:\n {e}", error_type="PipelineError")
+        return False
+
+
+def run_cspecs(cspecs: list[tuple[str, CSPEC | None]], verbose: bool = False, workers: int = 1) -> list[tuple[str, bool, float]]:
+    """ Runs a collection of CSPECs, concurrently when workers > 1, then logs a summary of the run.
+    Each CSPEC runs on its own thread with its own Logger in thread_storage, and a failing CSPEC
+    does not affect the others.
+        :param cspecs: list[tuple[str, CSPEC | None]] - The CSPEC paths with an optional already parsed CSPEC.
+        :param verbose: bool - Exports the DataFrame after each step.
+        :param workers: int - The number of CSPECs to run at the same time.
+        :return list[tuple[str, bool, float]] - (CSPEC path, succeeded, seconds) for each CSPEC, in the order passed in.
+    """
+    reference_time = datetime.now().replace(second=0, microsecond=0)
+    cspecs = [(cspec_path, parsed_CSPEC or try_parse_CSPEC(cspec_path)) for cspec_path, parsed_CSPEC in cspecs]
+
+    def timed_run(cspec: tuple[str, CSPEC | None]) -> tuple[str, bool, float]:
+        cspec_path, parsed_CSPEC = cspec
+        start = perf_counter()
+        succeeded = run_cspec(cspec_path, verbose, parsed_CSPEC, reference_time)
+        return cspec_path, succeeded, perf_counter() - start
+
+    # Let ingestion classes see every request of the run first so shared requests are only fetched once
+    run_storage.inputs_fetcher = FetchCoordinator()
+    register_ingestion_calls([parsed_CSPEC for _, parsed_CSPEC in cspecs if parsed_CSPEC is not None], reference_time)
+
+    start = perf_counter()
+    try:
+        if workers <= 1 or len(cspecs) <= 1:
+            results = [timed_run(cspec) for cspec in cspecs]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='flare-cspec') as pool:
+                results = list(pool.map(timed_run, cspecs))
+        log_run_summary(results, perf_counter() - start)
+    finally:
+        run_storage.inputs_fetcher = None
+    return results
+
+
+def try_parse_CSPEC(cspec_path: str) -> CSPEC | None:
+    """ Parses a CSPEC, returning None on failure. generate_csv parses it again to report the error under the CSPEC's logger."""
+    try:
+        return CSPEC_Parser(cspec_path).parse_CSPEC()
+    except Exception:
+        return None
+
+
+def register_ingestion_calls(CSPECs: list[CSPEC], reference_time: datetime) -> None:
+    """ Registers every ingestion call of the run before any of them start. Only calls the plan keeps are registered.
+    A CSPEC or call that fails to plan or register is skipped here, it will fail with a proper error when its CSPEC runs."""
+    for parsed_CSPEC in CSPECs:
+        try:
+            data_requests = plan_CSPEC(parsed_CSPEC).data_requests
+        except Exception:
+            continue
+        for ingestion_call in data_requests:
+            try:
+                data_ingestion_register(ref_time=reference_time, key=ingestion_call.call_key, **ingestion_call.kwargs)
+            except Exception:
+                continue
+
+
+def log_run_summary(results: list[tuple[str, bool, float]], total_seconds: float) -> None:
+    """ Logs how long each CSPEC took and whether it succeeded."""
+    logger = Logger('Summary')
+    succeeded = sum(1 for _, ok, _ in results if ok)
+    logger.log_info(f'============ Run Summary: {succeeded}/{len(results)} CSPECs succeeded in {total_seconds:.2f}s ============')
+    for cspec_path, ok, seconds in results:
+        cspec_name = os.path.splitext(os.path.basename(cspec_path))[0]
+        logger.log_info(f'\t{"OK    " if ok else "FAILED"} {seconds:8.2f}s  {cspec_name}')
+
+    fetcher = getattr(run_storage, 'inputs_fetcher', None)
+    if fetcher is not None and fetcher.requests_served:
+        logger.log_info(f'\tSemaphore input requests: {fetcher.requests_served} served with {fetcher.requests_made} upstream fetches')
+
+    cache = getattr(run_storage, 'response_cache', None)
+    if cache is not None:
+        logger.log_info(f'\tResponse cache ({cache.path}): {cache.hits} hits, {cache.misses} misses, {cache.negative_hits} negative hits')
+
+
+def open_response_cache(cache_path: str) -> ResponseCache | None:
+    """ Opens the response cache, the cache is best effort so if it can not be opened runs go without it."""
+    try:
+        return ResponseCache(cache_path)
+    except (OSError, sqlite3.Error) as e:
+        Logger('ResponseCache').log_error(f'Could not open the response cache at {cache_path}, running without it: {e}', error_type='ResponseCacheUnavailable', include_traceback=False)
+        return None
+
+
+def run_daemon(cspec_dir: str, verbose: bool, default_interval: int | None, schedule_file: str | None, workers: int = 1) -> None:
+    """ Keeps Flare resident, running every CSPEC in cspec_dir on its schedule until SIGTERM/SIGINT."""
+
+    def run_due(due_entries):
+        run_cspecs([(entry.path, entry.CSPEC) for entry in due_entries], verbose, workers)
+
+    scheduler = CSPEC_Scheduler(
+        cspec_dir=cspec_dir,
+        run_callback=run_due,
+        default_schedule=None if default_interval is None else {"interval": default_interval, "offset": 0},
+        schedule_file_path=schedule_file
+    )
+
+    # docker stop sends SIGTERM, let the current run finish then exit
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: scheduler.stop())
+    scheduler.run_forever()
+
+
 def main():
 
     parser = argparse.ArgumentParser(
@@ -103,28 +312,50 @@ def main():
         description='Generate a data CSV for use by Flare-Frontend',
         epilog='End Help'
     )
-    parser.add_argument('-c', '--cspec', nargs='+', type=str, required=True,
+    parser.add_argument('-c', '--cspec', nargs='+', type=str, required=False,
                         help= 'The path of the CSPEC file of the model you want to generate the CSPEC for.')
     parser.add_argument('-v', '--verbose', action='store_true', required=False,
                         help= 'Exports the DataFrame after each step.')
+    parser.add_argument('-d', '--daemon', action='store_true', required=False,
+                        help= 'Runs flare as a long lived process that runs every CSPEC in --cspec_dir on its schedule.')
+    parser.add_argument('--cspec_dir', type=str, required=False, default='./data/cspec',
+                        help= 'The directory of CSPECs to schedule in daemon mode.')
+    parser.add_argument('--schedule_file', type=str, required=False, default=None,
+                        help= 'A json file mapping CSPEC file names to schedules, overrides schedules in the CSPECs (daemon mode).')
+    parser.add_argument('--default_interval', type=int, required=False, default=None,
+                        help= 'The interval in seconds for CSPECs with no schedule (daemon mode), without it they are not run.')
+    parser.add_argument('-w', '--workers', type=int, required=False, default=1,
+                        help= 'The number of CSPECs to run at the same time.')
+    parser.add_argument('--cache_path', type=str, required=False, default='./data/cache/semaphore_responses.sqlite',
+                        help= 'The SQLite file API responses are cached in between runs.')
+    parser.add_argument('--no_cache', action='store_true', required=False,
+                        help= 'Always fetch from the API, without reading or writing the response cache.')
+    parser.add_argument('--explain', action='store_true', required=False,
+                        help= 'Prints the optimized plan of each CSPEC passed with --cspec without running it.')
+    parser.add_argument('--precompress', action='store_true', required=False,
+                        help= 'Writes .gz (and .br if brotli is installed) copies of every exported file for nginx to serve.')
 
     args = parser.parse_args()
+
+    if not args.daemon and not args.cspec:
+        parser.error('the following arguments are required: -c/--cspec (unless running with --daemon)')
+
+    if args.explain:
+        if not args.cspec: parser.error('--explain needs -c/--cspec')
+        for cspec_path in args.cspec:
+            print(plan_CSPEC(CSPEC_Parser(cspec_path).parse_CSPEC()).explain())
+        return
+
+    # The response cache lives as long as the process, so the daemon keeps it warm between runs
+    run_storage.response_cache = None if args.no_cache else open_response_cache(args.cache_path)
+    run_storage.precompress = args.precompress
+
+    if args.daemon:
+        run_daemon(args.cspec_dir, args.verbose, args.default_interval, args.schedule_file, args.workers)
+        return
     
-    for cspec_path in args.cspec:
-        cspec_name = os.path.splitext(os.path.basename(cspec_path))[0] 
-        thread_storage.logger = Logger(cspec_name)
-        logger = thread_storage.logger
-        logger.log_info('')
-        logger.log_info("============ Running Flare ============")
-        logger.log_info(f"---- Attempting CSPEC: {cspec_name} ----")
-        try:
-            generate_csv(cspec_path, args.verbose)
-        except Exception as e:
-            
-            logger = thread_storage.logger
-            logger.log_error(message=f"Pipeline failed:\n {e}", error_type="PipelineError")
-            
-            continue #So that the loop will continue despite one cspec failing
+    # Failures are logged per CSPEC so the run will continue despite one cspec failing
+    run_cspecs([(cspec_path, None) for cspec_path in args.cspec], args.verbose, args.workers)
     
             
 
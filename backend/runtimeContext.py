@@ -5,10 +5,14 @@
 #----------------------------------
 """ This script initializes thread-local storage for managing data that 
 should remain isolated across multiple threads.
+It also holds run storage, which is shared by every thread for the lifetime of a
+single run (one flareRunner call, or one daemon tick).
  """ 
 #----------------------------------
 # 
 #
 #Imports
 import threading
-thread_storage = threading.local()
\ No newline at end of file
+from types import SimpleNamespace
+thread_storage = threading.local()
+run_storage = SimpleNamespace()